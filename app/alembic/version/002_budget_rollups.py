@@ -0,0 +1,62 @@
+"""Budget roll-ups — per budget / per category spend + region indexes
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision: str = '002'
+down_revision: Union[str, None] = '001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+
+    # ── 1. budget_category_totals ────────────────
+    op.create_table(
+        'budget_category_totals',
+        sa.Column('id',                sa.Integer(), nullable=False),
+        sa.Column('budget_id',         sa.Integer(), nullable=False),
+        sa.Column('village_id',        sa.Integer(), nullable=False),
+        sa.Column('financial_year',    sa.String(),  nullable=False),
+        sa.Column('category',
+            sa.Enum('road', 'water', 'sanitation', 'education',
+                    'health', 'electricity', 'agriculture', 'other',
+                    name='categoryenum', create_type=False),
+            nullable=False
+        ),
+        sa.Column('total_spent',       sa.Float(),   nullable=False, server_default='0'),
+        sa.Column('transaction_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['budget_id'],  ['budgets.id']),
+        sa.ForeignKeyConstraint(['village_id'], ['villages.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('budget_id', 'category', name='uq_budget_category_totals_budget_category')
+    )
+    op.create_index('ix_budget_category_totals_id', 'budget_category_totals', ['id'])
+    op.create_index('ix_budget_category_totals_year_village', 'budget_category_totals', ['financial_year', 'village_id'])
+
+    # backfill from existing transactions
+    op.execute('''
+        INSERT INTO budget_category_totals (budget_id, category, village_id, financial_year, total_spent, transaction_count)
+        SELECT t.budget_id, t.category, b.village_id, b.financial_year, SUM(t.amount), COUNT(t.id)
+        FROM budget_transactions t
+        JOIN budgets b ON b.id = t.budget_id
+        GROUP BY t.budget_id, t.category, b.village_id, b.financial_year
+    ''')
+
+    # ── 2. region lookups on villages ────────────
+    op.create_index('ix_villages_district', 'villages', ['district'])
+    op.create_index('ix_villages_state',    'villages', ['state'])
+
+
+def downgrade() -> None:
+
+    op.drop_index('ix_villages_state',    table_name='villages')
+    op.drop_index('ix_villages_district', table_name='villages')
+    op.drop_table('budget_category_totals')
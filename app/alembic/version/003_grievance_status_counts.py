@@ -0,0 +1,47 @@
+"""Grievance status counters — per village / per status counts
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision: str = '003'
+down_revision: Union[str, None] = '002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+
+    # ── 1. grievance_status_counts ───────────────
+    op.create_table(
+        'grievance_status_counts',
+        sa.Column('village_id', sa.Integer(), nullable=False),
+        sa.Column('status',
+            sa.Enum('open', 'in_progress', 'resolved', 'rejected',
+                    name='grievancestatusenum', create_type=False),
+            nullable=False
+        ),
+        sa.Column('count',      sa.Integer(), nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['village_id'], ['villages.id']),
+        sa.PrimaryKeyConstraint('village_id', 'status')
+    )
+
+    # backfill from existing grievances
+    op.execute('''
+        INSERT INTO grievance_status_counts (village_id, status, count)
+        SELECT village_id, status, COUNT(*)
+        FROM grievances
+        WHERE status IS NOT NULL
+        GROUP BY village_id, status
+    ''')
+
+
+def downgrade() -> None:
+
+    op.drop_table('grievance_status_counts')
@@ -0,0 +1,35 @@
+"""Grievance search — generated tsvector column + GIN index (Postgres)
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision: str = '004'
+down_revision: Union[str, None] = '003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+
+    # 'simple' config --> no English stemming, works for Hindi and mixed text
+    op.execute('''
+        ALTER TABLE grievances ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(description, '')), 'B') ||
+            setweight(to_tsvector('simple', coalesce(sarpanch_reply, '')), 'C')
+        ) STORED
+    ''')
+    op.execute('CREATE INDEX IF NOT EXISTS ix_grievances_search_vector ON grievances USING GIN (search_vector)')
+
+
+def downgrade() -> None:
+
+    op.execute('DROP INDEX IF EXISTS ix_grievances_search_vector')
+    op.execute('ALTER TABLE grievances DROP COLUMN IF EXISTS search_vector')
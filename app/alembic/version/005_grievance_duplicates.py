@@ -0,0 +1,30 @@
+"""Grievance duplicates — duplicate_of (near-duplicate cluster root)
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision: str = '005'
+down_revision: Union[str, None] = '004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+
+    op.add_column('grievances', sa.Column('duplicate_of', sa.Integer(), nullable=True))
+    op.create_foreign_key('fk_grievances_duplicate_of', 'grievances', 'grievances', ['duplicate_of'], ['id'])
+    op.create_index('ix_grievances_duplicate_of', 'grievances', ['duplicate_of'])
+
+
+def downgrade() -> None:
+
+    op.drop_index('ix_grievances_duplicate_of', table_name='grievances')
+    op.drop_constraint('fk_grievances_duplicate_of', 'grievances', type_='foreignkey')
+    op.drop_column('grievances', 'duplicate_of')
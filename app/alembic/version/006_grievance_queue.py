@@ -0,0 +1,34 @@
+"""Grievance work queue — priority + claim lease columns
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision: str = '006'
+down_revision: Union[str, None] = '005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+
+    op.add_column('grievances', sa.Column('priority',         sa.Integer(),              nullable=False, server_default='0'))
+    op.add_column('grievances', sa.Column('claimed_by',       sa.Integer(),              nullable=True))
+    op.add_column('grievances', sa.Column('claim_expires_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_foreign_key('fk_grievances_claimed_by', 'grievances', 'users', ['claimed_by'], ['id'])
+    op.create_index('ix_grievances_queue', 'grievances', ['village_id', 'status', 'priority', 'created_at'])
+
+
+def downgrade() -> None:
+
+    op.drop_index('ix_grievances_queue', table_name='grievances')
+    op.drop_constraint('fk_grievances_claimed_by', 'grievances', type_='foreignkey')
+    op.drop_column('grievances', 'claim_expires_at')
+    op.drop_column('grievances', 'claimed_by')
+    op.drop_column('grievances', 'priority')
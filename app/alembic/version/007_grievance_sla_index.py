@@ -0,0 +1,26 @@
+"""Grievance SLA — index for resolution time analytics
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision: str = '007'
+down_revision: Union[str, None] = '006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+
+    op.create_index('ix_grievances_sla', 'grievances', ['village_id', 'status', 'resolved_at'])
+
+
+def downgrade() -> None:
+
+    op.drop_index('ix_grievances_sla', table_name='grievances')
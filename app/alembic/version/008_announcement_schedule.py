@@ -0,0 +1,35 @@
+"""Announcements — scheduled publishing and expiry
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision: str = '008'
+down_revision: Union[str, None] = '007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+
+    # existing announcements keep NULL --> published, never expire
+    op.add_column('announcements', sa.Column('publish_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('announcements', sa.Column('expires_at', sa.DateTime(timezone=True), nullable=True))
+
+    # the scheduler only loads upcoming rows --> range scans on these
+    op.create_index('ix_announcements_publish_at', 'announcements', ['publish_at'])
+    op.create_index('ix_announcements_expires_at', 'announcements', ['expires_at'])
+
+
+def downgrade() -> None:
+
+    op.drop_index('ix_announcements_expires_at', table_name='announcements')
+    op.drop_index('ix_announcements_publish_at', table_name='announcements')
+    op.drop_column('announcements', 'expires_at')
+    op.drop_column('announcements', 'publish_at')
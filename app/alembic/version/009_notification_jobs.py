@@ -0,0 +1,59 @@
+"""Notification fan-out — job table + resident lookup index
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision: str = '009'
+down_revision: Union[str, None] = '008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+
+    # ── 1. notification_jobs ─────────────────────
+    op.create_table(
+        'notification_jobs',
+        sa.Column('id',               sa.Integer(),              nullable=False),
+        sa.Column('village_id',       sa.Integer(),              nullable=False),
+        sa.Column('ward_number',      sa.Integer(),              nullable=True),
+        sa.Column('announcement_id',  sa.Integer(),              nullable=True),
+        sa.Column('message',          sa.String(),               nullable=False),
+        sa.Column('status',
+            sa.Enum('pending', 'running', 'done', 'failed', name='notificationjobstatusenum'),
+            nullable=False
+        ),
+        sa.Column('not_before',       sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_user_id',     sa.Integer(),              nullable=False, server_default='0'),
+        sa.Column('sent_count',       sa.Integer(),              nullable=False, server_default='0'),
+        sa.Column('failed_count',     sa.Integer(),              nullable=False, server_default='0'),
+        sa.Column('attempts',         sa.Integer(),              nullable=False, server_default='0'),
+        sa.Column('error',            sa.String(),               nullable=True),
+        sa.Column('claimed_by',       sa.String(),               nullable=True),
+        sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at',       sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('started_at',       sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at',      sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['village_id'],      ['villages.id']),
+        sa.ForeignKeyConstraint(['announcement_id'], ['announcements.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_notification_jobs_id',    'notification_jobs', ['id'])
+    op.create_index('ix_notification_jobs_queue', 'notification_jobs', ['status', 'not_before', 'id'])
+
+    # ── 2. residents of a village / ward in id order ──
+    op.create_index('ix_users_village_ward', 'users', ['village_id', 'ward_number', 'id'])
+
+
+def downgrade() -> None:
+
+    op.drop_index('ix_users_village_ward', table_name='users')
+    op.drop_table('notification_jobs')
+    op.execute('DROP TYPE IF EXISTS notificationjobstatusenum')
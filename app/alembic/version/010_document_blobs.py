@@ -0,0 +1,46 @@
+"""Content addressed document storage — blob table with reference counts
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision: str = '010'
+down_revision: Union[str, None] = '009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+
+    # ── 1. document_blobs ─────────────────────
+    op.create_table(
+        'document_blobs',
+        sa.Column('sha256',      sa.String(length=64),       nullable=False),
+        sa.Column('path',        sa.String(),                nullable=False),
+        sa.Column('size',        sa.Integer(),               nullable=False),
+        sa.Column('ref_count',   sa.Integer(),               nullable=False, server_default='0'),
+        sa.Column('created_at',  sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('released_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('sha256')
+    )
+    op.create_index('ix_document_blobs_released_at', 'document_blobs', ['released_at'])
+
+    # ── 2. documents → blob (NULL for files uploaded before this revision) ──
+    op.add_column('documents', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.create_foreign_key('fk_documents_content_hash', 'documents', 'document_blobs', ['content_hash'], ['sha256'])
+    op.create_index('ix_documents_content_hash', 'documents', ['content_hash'])
+
+
+def downgrade() -> None:
+
+    op.drop_index('ix_documents_content_hash', table_name='documents')
+    op.drop_constraint('fk_documents_content_hash', 'documents', type_='foreignkey')
+    op.drop_column('documents', 'content_hash')
+    op.drop_index('ix_document_blobs_released_at', table_name='document_blobs')
+    op.drop_table('document_blobs')
@@ -0,0 +1,36 @@
+"""Document previews — preview state on document_blobs
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision: str = '011'
+down_revision: Union[str, None] = '010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+preview_status = sa.Enum('processing', 'ready', 'failed', 'unsupported', name='previewstatusenum')
+
+
+def upgrade() -> None:
+
+    preview_status.create(op.get_bind(), checkfirst=True)
+
+    op.add_column('document_blobs', sa.Column('preview_status',     preview_status,             nullable=True))
+    op.add_column('document_blobs', sa.Column('preview_attempts',   sa.Integer(),               nullable=False, server_default='0'))
+    op.add_column('document_blobs', sa.Column('preview_updated_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+
+    op.drop_column('document_blobs', 'preview_updated_at')
+    op.drop_column('document_blobs', 'preview_attempts')
+    op.drop_column('document_blobs', 'preview_status')
+    preview_status.drop(op.get_bind(), checkfirst=True)
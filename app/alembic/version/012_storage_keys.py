@@ -0,0 +1,27 @@
+"""Storage backends — document_blobs.path holds a storage key instead of a local path
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+
+# revision identifiers
+revision: str = '012'
+down_revision: Union[str, None] = '011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# uploads/documents/ab/<sha>.pdf --> documents/ab/<sha>.pdf (key relative to STORAGE_LOCAL_ROOT=uploads)
+
+def upgrade() -> None:
+
+    op.execute("UPDATE document_blobs SET path = substr(path, 9) WHERE path LIKE 'uploads/%'")
+
+
+def downgrade() -> None:
+
+    op.execute("UPDATE document_blobs SET path = 'uploads/' || path WHERE path NOT LIKE 'uploads/%'")
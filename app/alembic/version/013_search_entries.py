@@ -0,0 +1,63 @@
+"""Unified search — search_entries (documents / announcements / projects) + extracted document text
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision: str = '013'
+down_revision: Union[str, None] = '012'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+search_entity = sa.Enum('document', 'announcement', 'project', name='searchentityenum')
+
+
+def upgrade() -> None:
+
+    # ── 1. search_entries ─────────────────────
+    op.create_table(
+        'search_entries',
+        sa.Column('id',            sa.Integer(),               nullable=False),
+        sa.Column('entity_type',   search_entity,              nullable=False),
+        sa.Column('entity_id',     sa.Integer(),               nullable=False),
+        sa.Column('village_id',    sa.Integer(),               nullable=False),
+        sa.Column('title',         sa.String(),                nullable=False),
+        sa.Column('body',          sa.Text(),                  nullable=False, server_default=''),
+        sa.Column('visible_from',  sa.DateTime(timezone=True), nullable=True),
+        sa.Column('visible_until', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at',    sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['village_id'], ['villages.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('entity_type', 'entity_id', name='uq_search_entries_entity')
+    )
+    op.create_index('ix_search_entries_village_id', 'search_entries', ['village_id'])
+
+    # ── 2. full text: 'simple' config like grievance search (Hindi / mixed text) ──
+    op.execute('''
+        ALTER TABLE search_entries ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(body, '')), 'B')
+        ) STORED
+    ''')
+    op.execute('CREATE INDEX IF NOT EXISTS ix_search_entries_search_vector ON search_entries USING GIN (search_vector)')
+
+    # ── 3. text of stored PDF / DOCX files ──
+    op.add_column('document_blobs', sa.Column('extracted_text', sa.Text(), nullable=True))
+
+    # existing rows: python -m app.scripts.reindex_search --extract
+
+
+def downgrade() -> None:
+
+    op.drop_column('document_blobs', 'extracted_text')
+    op.execute('DROP INDEX IF EXISTS ix_search_entries_search_vector')
+    op.drop_index('ix_search_entries_village_id', table_name='search_entries')
+    op.drop_table('search_entries')
+    search_entity.drop(op.get_bind(), checkfirst=True)
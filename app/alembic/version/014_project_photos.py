@@ -0,0 +1,83 @@
+"""Project photos — project_photos table (ordered, rendered in the background) instead of projects.photos JSON
+
+Revision ID: 014
+Revises: 013
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision: str = '014'
+down_revision: Union[str, None] = '013'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+photo_status = sa.Enum('pending', 'processing', 'ready', 'failed', name='projectphotostatusenum')
+
+
+def upgrade() -> None:
+
+    # ── 1. project_photos ─────────────────────
+    op.create_table(
+        'project_photos',
+        sa.Column('id',           sa.Integer(),               nullable=False),
+        sa.Column('project_id',   sa.Integer(),               nullable=False),
+        sa.Column('position',     sa.Integer(),               nullable=False),
+        sa.Column('caption',      sa.String(),                nullable=True),
+        sa.Column('original_key', sa.String(),                nullable=True),
+        sa.Column('external_url', sa.String(),                nullable=True),
+        sa.Column('status',       photo_status,               nullable=False),
+        sa.Column('attempts',     sa.Integer(),               nullable=False, server_default='0'),
+        sa.Column('width',        sa.Integer(),               nullable=True),
+        sa.Column('height',       sa.Integer(),               nullable=True),
+        sa.Column('size',         sa.Integer(),               nullable=True),
+        sa.Column('uploaded_by',  sa.Integer(),               nullable=True),
+        sa.Column('created_at',   sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at',   sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['uploaded_by'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_project_photos_project_position', 'project_photos', ['project_id', 'position'])
+
+    op.add_column('projects', sa.Column('cover_photo_id', sa.Integer(), nullable=True))
+
+    # ── 2. existing photo URLs --> one external, ready row each (JSON order kept) ──
+    op.execute('''
+        INSERT INTO project_photos (project_id, position, external_url, status, attempts)
+        SELECT p.id, u.ordinality - 1, u.url, 'ready', 0
+        FROM projects p
+        CROSS JOIN LATERAL json_array_elements_text(p.photos) WITH ORDINALITY AS u(url, ordinality)
+        WHERE p.photos IS NOT NULL AND json_typeof(p.photos) = 'array'
+    ''')
+    op.execute('''
+        UPDATE projects p SET cover_photo_id = (
+            SELECT ph.id FROM project_photos ph
+            WHERE ph.project_id = p.id AND ph.status = 'ready'
+            ORDER BY ph.position, ph.id LIMIT 1
+        )
+    ''')
+
+    op.drop_column('projects', 'photos')
+
+
+def downgrade() -> None:
+
+    op.add_column('projects', sa.Column('photos', sa.JSON(), nullable=True))
+
+    # uploaded photos have no single URL to go back to --> only the external ones are kept
+    op.execute('''
+        UPDATE projects p SET photos = coalesce((
+            SELECT json_agg(ph.external_url ORDER BY ph.position, ph.id) FROM project_photos ph
+            WHERE ph.project_id = p.id AND ph.external_url IS NOT NULL
+        ), '[]'::json)
+    ''')
+
+    op.drop_column('projects', 'cover_photo_id')
+    op.drop_index('ix_project_photos_project_position', table_name='project_photos')
+    op.drop_table('project_photos')
+    photo_status.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,40 @@
+"""Project listing — indexes for the combined ward / status / category / cost / start date filters
+
+Revision ID: 015
+Revises: 014
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+
+# revision identifiers
+revision: str = '015'
+down_revision: Union[str, None] = '014'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# village first (every listing is per village), id last --> rows come out in "newest" order
+INDEXES = {
+    'ix_projects_village_newest':      ['village_id', 'id'],
+    'ix_projects_village_ward_status': ['village_id', 'ward_number', 'status', 'id'],
+    'ix_projects_village_status':      ['village_id', 'status', 'id'],
+    'ix_projects_village_category':    ['village_id', 'category', 'id'],
+    'ix_projects_village_cost':        ['village_id', 'estimated_cost', 'id'],
+    'ix_projects_village_start':       ['village_id', 'start_date'],
+}
+
+
+def upgrade() -> None:
+
+    for name, columns in INDEXES.items():
+        op.create_index(name, 'projects', columns)
+
+    # check the plans: python -m app.scripts.explain_projects --check
+
+
+def downgrade() -> None:
+
+    for name in INDEXES:
+        op.drop_index(name, table_name='projects')
@@ -0,0 +1,69 @@
+"""Project ward stats — per village / ward / status project totals + projects.completed_at
+
+Revision ID: 016
+Revises: 015
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision: str = '016'
+down_revision: Union[str, None] = '015'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+
+    # ── 1. projects.completed_at (completion latency) ──
+    op.add_column('projects', sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True))
+
+    # already completed: best known moment
+    op.execute('''
+        UPDATE projects SET completed_at = coalesce(end_date, updated_at, created_at)
+        WHERE status = 'completed'
+    ''')
+
+    # ── 2. project_ward_stats ───────────────
+    op.create_table(
+        'project_ward_stats',
+        sa.Column('village_id',        sa.Integer(), nullable=False),
+        sa.Column('ward_number',       sa.Integer(), nullable=False),
+        sa.Column('status',
+            sa.Enum('planned', 'ongoing', 'completed', 'cancelled',
+                    name='project_status_enum', create_type=False),
+            nullable=False
+        ),
+        sa.Column('project_count',     sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('estimated_cost',    sa.Float(),   nullable=False, server_default='0'),
+        sa.Column('actual_cost',       sa.Float(),   nullable=False, server_default='0'),
+        sa.Column('over_budget_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('completion_days',   sa.Float(),   nullable=False, server_default='0'),
+        sa.Column('completion_count',  sa.Integer(), nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['village_id'], ['villages.id']),
+        sa.PrimaryKeyConstraint('village_id', 'ward_number', 'status')
+    )
+
+    # backfill from existing projects (same rules as apply_project_stats)
+    op.execute('''
+        INSERT INTO project_ward_stats (village_id, ward_number, status, project_count, estimated_cost, actual_cost,
+                                        over_budget_count, completion_days, completion_count)
+        SELECT village_id, ward_number, coalesce(status, 'planned'), COUNT(*),
+               SUM(coalesce(estimated_cost, 0)), SUM(coalesce(actual_cost, 0)),
+               COUNT(*) FILTER (WHERE coalesce(actual_cost, 0) > coalesce(estimated_cost, 0)),
+               coalesce(SUM(GREATEST(EXTRACT(EPOCH FROM completed_at - coalesce(start_date, created_at)) / 86400, 0))
+                        FILTER (WHERE status = 'completed'), 0),
+               COUNT(coalesce(start_date, created_at)) FILTER (WHERE status = 'completed' AND completed_at IS NOT NULL)
+        FROM projects
+        WHERE ward_number IS NOT NULL
+        GROUP BY village_id, ward_number, coalesce(status, 'planned')
+    ''')
+
+
+def downgrade() -> None:
+
+    op.drop_table('project_ward_stats')
+    op.drop_column('projects', 'completed_at')
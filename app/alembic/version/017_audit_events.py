@@ -0,0 +1,42 @@
+"""Audit events — append-only history of spending, replies, role changes and deletions
+
+Revision ID: 017
+Revises: 016
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision: str = '017'
+down_revision: Union[str, None] = '016'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+
+    # no foreign keys: history of deleted records / users stays readable
+    op.create_table(
+        'audit_events',
+        sa.Column('id',          sa.BigInteger(),            nullable=False),
+        sa.Column('entity_type', sa.String(length=32),       nullable=False),
+        sa.Column('entity_id',   sa.Integer(),               nullable=False),
+        sa.Column('action',      sa.String(length=32),       nullable=False),
+        sa.Column('actor_id',    sa.Integer(),               nullable=True),
+        sa.Column('village_id',  sa.Integer(),               nullable=True),
+        sa.Column('changes',     sa.JSON(),                  nullable=True),
+        sa.Column('created_at',  sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_audit_events_entity', 'audit_events', ['entity_type', 'entity_id', 'id'])
+    op.create_index('ix_audit_events_village', 'audit_events', ['village_id', 'id'])
+
+
+def downgrade() -> None:
+
+    op.drop_index('ix_audit_events_village', table_name='audit_events')
+    op.drop_index('ix_audit_events_entity', table_name='audit_events')
+    op.drop_table('audit_events')
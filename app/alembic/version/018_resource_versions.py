@@ -0,0 +1,32 @@
+"""Resource versions — per resource counters behind the ETags of public GETs
+
+Revision ID: 018
+Revises: 017
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision: str = '018'
+down_revision: Union[str, None] = '017'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+
+    # no backfill: a missing row reads as version 0, the first write creates it
+    op.create_table(
+        'resource_versions',
+        sa.Column('key',     sa.String(),  nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade() -> None:
+
+    op.drop_table('resource_versions')
@@ -0,0 +1,35 @@
+"""Cache outbox — invalidated cache keys, replayed by workers after a LISTEN reconnect
+
+Revision ID: 019
+Revises: 018
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision: str = '019'
+down_revision: Union[str, None] = '018'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+
+    op.create_table(
+        'cache_outbox',
+        sa.Column('id',         sa.Integer(),               nullable=False),
+        sa.Column('key',        sa.String(),                nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    # replay of the last few seconds after a reconnect and the prune both filter on created_at
+    op.create_index('ix_cache_outbox_created_at', 'cache_outbox', ['created_at'])
+
+
+def downgrade() -> None:
+
+    op.drop_index('ix_cache_outbox_created_at', table_name='cache_outbox')
+    op.drop_table('cache_outbox')
@@ -0,0 +1,28 @@
+"""Grievance SLA — covering index, resolution / ageing analytics without table reads
+
+Revision ID: 020
+Revises: 019
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+
+# revision identifiers
+revision: str = '020'
+down_revision: Union[str, None] = '019'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+
+    # created_at / category added --> index-only scans for the district SLA report
+    op.drop_index('ix_grievances_sla', table_name='grievances')
+    op.create_index('ix_grievances_sla', 'grievances', ['village_id', 'status', 'resolved_at', 'created_at', 'category'])
+
+
+def downgrade() -> None:
+
+    op.drop_index('ix_grievances_sla', table_name='grievances')
+    op.create_index('ix_grievances_sla', 'grievances', ['village_id', 'status', 'resolved_at'])
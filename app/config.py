@@ -11,6 +11,56 @@ class Setting(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
+    GRIEVANCE_CLAIM_LEASE_SECONDS: int = 300     # claimed grievance returns to the queue if not heartbeated
+    EVENTS_QUEUE_SIZE: int = 100                 # per subscriber backlog before a slow client is dropped
+    EVENTS_KEEPALIVE_SECONDS: int = 15           # SSE comment sent on idle streams
+    CACHE_BUS_BACKEND: str = "auto"              # auto / postgres / memory (memory = single worker or tests only)
+    CACHE_BUS_CATCHUP_SLACK_SECONDS: int = 60    # extra outbox window replayed after a LISTEN reconnect
+    CACHE_BUS_RETENTION_HOURS: int = 24          # outbox rows older than this are pruned
+    ANNOUNCEMENT_FEED_SIZE: int = 200            # announcements kept per village feed
+    ANNOUNCEMENT_FEED_VILLAGES: int = 2000       # village feeds kept per worker (LRU)
+    NOTIFY_GATEWAY: str = "file"                 # file / http
+    NOTIFY_GATEWAY_URL: str = ""                 # http gateway endpoint
+    NOTIFY_FILE_PATH: str = "logs/notifications.jsonl"
+    NOTIFY_RATE_PER_SECOND: float = 50           # messages per second per worker towards the gateway
+    NOTIFY_CONCURRENCY: int = 20                 # sends in flight per worker
+    NOTIFY_BATCH_SIZE: int = 500                 # recipients read and checkpointed at a time
+    NOTIFY_MAX_ATTEMPTS: int = 3                 # per message, and per job before it is marked failed
+    NOTIFY_RETRY_BACKOFF_SECONDS: float = 1.0    # doubled after every failed attempt
+    NOTIFY_LEASE_SECONDS: int = 120              # running job is taken over by another worker after this
+    NOTIFY_JOB_RETRY_SECONDS: int = 60           # failed job waits this long before its next attempt, doubled each time
+    NOTIFY_POLL_SECONDS: int = 30                # queue re-checked this often without a wake-up
+    DOCUMENT_MAX_BYTES: int = 10 * 1024 * 1024   # upload size cap, enforced while the file is copied
+    BLOB_GC_INTERVAL_SECONDS: int = 3600         # unreferenced document files are swept this often
+    BLOB_GC_GRACE_SECONDS: int = 3600            # and only once unreferenced for this long
+    DOCUMENT_ACCEL_REDIRECT_PREFIX: str = ""     # e.g. /protected-documents/ --> nginx serves downloads (X-Accel-Redirect)
+    RENDER_WORKERS: int = 2                      # render processes per API worker (document previews, project photos)
+    PREVIEW_MAX_ATTEMPTS: int = 3                # renders tried per file before it stays failed
+    PREVIEW_RETRY_SECONDS: int = 30              # delay before a retry, times the attempt number
+    PREVIEW_LEASE_SECONDS: int = 600             # a render claimed longer ago than this is taken over
+    PREVIEW_MAX_SIDE: int = 480                  # preview size in pixels (longest side)
+    PREVIEW_QUALITY: int = 70                    # WebP quality
+    SEARCH_TEXT_MAX_CHARS: int = 200000          # text kept per document file for search
+    PROJECT_PHOTO_MAX_BYTES: int = 15 * 1024 * 1024     # upload size cap per project photo
+    PROJECT_PHOTO_RENDITIONS: dict = {"thumb" : 320 , "medium" : 1024 , "large" : 2048}   # name --> longest side in pixels
+    PROJECT_PHOTO_QUALITY: int = 80              # WebP quality of the renditions
+    PROJECT_PHOTO_MAX_ATTEMPTS: int = 3          # renders tried per photo before it stays failed
+    PROJECT_PHOTO_RETRY_SECONDS: int = 30        # delay before a retry, times the attempt number
+    PROJECT_PHOTO_LEASE_SECONDS: int = 600       # a render claimed longer ago than this is taken over
+    AUDIT_BATCH_SIZE: int = 500                  # audit events per COPY / multi-row INSERT
+    AUDIT_FLUSH_SECONDS: float = 1.0             # an event waits at most this long before it is written
+    AUDIT_QUEUE_MAX: int = 50000                 # events held in memory; beyond that record() waits briefly, then drops
+    STORAGE_BACKEND: str = "local"               # local / s3 --> where document files and previews are kept
+    STORAGE_LOCAL_ROOT: str = "uploads"          # local backend: files under this directory
+    S3_BUCKET: str = ""
+    S3_ENDPOINT_URL: str = ""                    # empty = AWS; MinIO / other S3 compatible stores: their URL
+    S3_REGION: str = "ap-south-1"
+    S3_ACCESS_KEY_ID: str = ""                   # empty = boto3 default credential chain (env, instance role)
+    S3_SECRET_ACCESS_KEY: str = ""
+    S3_PRESIGN_SECONDS: int = 900                # lifetime of a presigned download URL
+    S3_MAX_POOL_CONNECTIONS: int = 32            # keep-alive connections to the object store per worker
+    S3_MULTIPART_THRESHOLD_MB: int = 8           # larger uploads go up in parts of this size
+    S3_MULTIPART_CONCURRENCY: int = 4            # parts uploaded in parallel per file
 
     model_config = SettingsConfigDict()  # ❌ remove env_file
 
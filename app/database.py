@@ -12,9 +12,13 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 
 print("DB URL:", DATABASE_URL)  # DEBUG
 
+# sslmode is a Postgres option --> local SQLite runs connect without it
+
+connect_args = {"sslmode": "require"} if DATABASE_URL.startswith("postgres") else {"check_same_thread": False}
+
 engine = create_engine(
     DATABASE_URL,
-    connect_args={"sslmode": "require"},
+    connect_args=connect_args,
     pool_pre_ping=True
 )
 
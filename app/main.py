@@ -2,11 +2,27 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
+import threading
 
-from app.database import engine, Base
-from app.routers import auth, budget, project, announcement, grievance, document, village
+from app.database import engine, Base, SessionLocal
+from app.routers import auth, budget, project, announcement, grievance, document, village, analytics, events, notification, search, audit
 from app.middleware.auth_middleware import AuthMiddleware, LoggingMiddleware
+from app.middleware.upload_limit import UploadLimitMiddleware
+from app.config import settings
 from app.utils.logging import get_logger
+from app.utils import etag
+from app.utils.dedup import duplicate_index
+from app.utils.pubsub import hub
+from app.utils.cache_bus import bus, registry
+from app.utils.scheduler import announcement_scheduler
+from app.utils.notifications import notifier, stats as notification_stats
+from app.utils.blobs import blob_collector, stats as blob_stats
+from app.utils import downloads
+from app.utils.previews import previews
+from app.utils.photos import photos
+from app.utils.render_pool import render_pool
+from app.utils.audit import audit_log
 
 logger = get_logger(__name__)
 
@@ -31,9 +47,45 @@ async def lifespan(app: FastAPI):
     Base.metadata.create_all(bind=engine)
     logger.info(" Database tables created")
 
+    # Index open grievances for near-duplicate detection (background, does not delay startup)
+    threading.Thread(target=duplicate_index.warm, args=(SessionLocal,), daemon=True, name="dedup-warm").start()
+
+    # Live events are delivered on this loop, published from any thread
+    hub.bind(asyncio.get_running_loop())
+
+    # Cross-worker cache invalidation (LISTEN thread on Postgres)
+    bus.start()
+    logger.info(f" Cache bus started ({bus.name})")
+
+    # Audit events, written in batches off the request path
+    audit_log.start(SessionLocal)
+
+    # Scheduled / expiring announcements (loads upcoming ones only)
+    announcement_scheduler.start(SessionLocal)
+
+    # SMS / push fan-out of alert announcements (own thread and event loop)
+    notifier.start(SessionLocal)
+
+    # Document files nobody references any more
+    blob_collector.start(SessionLocal)
+
+    # Document previews (process pool, resumes unfinished ones)
+    previews.start(SessionLocal)
+
+    # Project photo renditions (same process pool, resumes unfinished ones)
+    photos.start(SessionLocal)
+
     yield  # Application runs here
 
     # Shutdown
+    notifier.stop()
+    blob_collector.stop()
+    previews.stop()
+    photos.stop()
+    render_pool.stop()
+    announcement_scheduler.stop()
+    bus.stop()
+    audit_log.stop()              # last: writes the events still queued
     logger.info(" GramSuvidha API Shutting Down...")
     logger.info("---------------------------------")
 
@@ -50,6 +102,8 @@ app = FastAPI(
 # ─────────────────────────────────────────
 # MIDDLEWARE
 # ─────────────────────────────────────────
+app.add_middleware(UploadLimitMiddleware, limits={"/api/documents/upload": settings.DOCUMENT_MAX_BYTES,
+                                                  "/api/projects/{project_id}/photos": settings.PROJECT_PHOTO_MAX_BYTES})
 app.add_middleware(AuthMiddleware)
 app.add_middleware(LoggingMiddleware)
 
@@ -71,6 +125,11 @@ app.include_router(project.router, prefix="/api/projects", tags=["Projects"])
 app.include_router(announcement.router, prefix="/api/announcements", tags=["Announcements"])
 app.include_router(grievance.router, prefix="/api/grievances", tags=["Grievances"])
 app.include_router(document.router, prefix="/api/documents", tags=["Documents"])
+app.include_router(analytics.router, prefix="/api/analytics", tags=["Analytics"])
+app.include_router(events.router, prefix="/api/events", tags=["Events"])
+app.include_router(notification.router, prefix="/api/notifications", tags=["Notifications"])
+app.include_router(search.router, prefix="/api/search", tags=["Search"])
+app.include_router(audit.router, prefix="/api/audit", tags=["Audit"])
 
 # ─────────────────────────────────────────
 # HEALTH CHECK
@@ -83,4 +142,19 @@ def root():
 def health():
     return {"status": "healthy"}
 
+@app.get("/metrics")
+def metrics():
+    return {
+        "conditional_get": etag.stats.snapshot(),
+        "events": hub.snapshot(),
+        "cache_bus": bus.snapshot(),
+        "caches": registry.snapshot(),
+        "notifications": notification_stats.snapshot(),
+        "document_blobs": blob_stats.snapshot(),
+        "document_downloads": downloads.stats.snapshot(),
+        "document_previews": previews.snapshot(),
+        "project_photos": photos.snapshot(),
+        "audit_log": audit_log.snapshot(),
+    }
+
 
@@ -23,6 +23,8 @@ PUBLIC_ROUTES = [
     "/api/projects/",
     "/api/budget/",
     "/api/documents/",
+    "/api/analytics/budget/",
+    "/api/search/",
 ]
 
 def is_public_route(path: str) -> bool:
@@ -0,0 +1,77 @@
+import json
+import re
+
+# multipart boundaries + the other form fields (title, doc_type ...)
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadLimitMiddleware:
+    """
+    Size cap for upload routes, enforced while the body arrives:
+    - Content-Length above the cap --> 413 before a single byte is read
+    - chunked / lying clients --> 413 as soon as the received bytes pass the cap,
+      the rest of the body is never read (or spooled to disk by the form parser)
+    Pure ASGI (not BaseHTTPMiddleware) so it sees the body chunk by chunk.
+    limits: {"/api/documents/upload": 10 * 1024 * 1024, "/api/projects/{project_id}/photos": ...}
+    ({name} in a path matches one path segment)
+    """
+
+    def __init__(self, app, limits: dict):
+        self.app = app
+        self.limits = {path: limit for path, limit in limits.items() if "{" not in path}
+        self.patterns = [(re.compile(re.sub(r"\{\w+\}", "[^/]+", path) + "$"), limit) for path, limit in limits.items() if "{" in path]
+
+    def _limit(self, path: str):
+
+        limit = self.limits.get(path)
+
+        if limit is None:
+            for pattern, pattern_limit in self.patterns:
+                if pattern.match(path):
+                    return pattern_limit
+
+        return limit
+
+    async def __call__(self, scope, receive, send):
+
+        limit = self._limit(scope.get("path")) if scope["type"] == "http" and scope["method"] == "POST" else None
+
+        if limit is None:
+            return await self.app(scope, receive, send)
+
+        limit += MULTIPART_OVERHEAD
+
+        for name, value in scope["headers"]:
+            if name == b"content-length" and value.isdigit() and int(value) > limit:
+                return await self._reject(send)
+
+        received = 0
+        rejected = False
+
+        async def limited_receive():
+            nonlocal received, rejected
+            message = await receive()
+            if message["type"] == "http.request" and not rejected:
+                received += len(message.get("body", b""))
+                if received > limit:
+                    rejected = True
+                    await self._reject(send)
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message):
+            if not rejected:
+                await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            # the app sees a disconnect mid-body once we rejected --> expected, already answered
+            if not rejected:
+                raise
+
+    async def _reject(self, send):
+        body = json.dumps({"detail": "File too large"}).encode()
+        await send({"type": "http.response.start", "status": 413,
+                    "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
@@ -24,6 +24,8 @@ class Announcement(Base):
     type = Column(Enum(AnnouncementTypeEnum) , default=AnnouncementTypeEnum.general)
     published_by = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    publish_at = Column(DateTime(timezone=True), nullable=True, index=True)     # NULL --> visible immediately
+    expires_at = Column(DateTime(timezone=True), nullable=True, index=True)     # NULL --> never expires
     
     # Relationship 
     
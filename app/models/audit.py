@@ -0,0 +1,37 @@
+from sqlalchemy import Column , String , DateTime , Integer , BigInteger , JSON , Index
+import enum
+from app.database import Base
+
+
+class AuditEntityEnum(str , enum.Enum):
+    budget = "budget"
+    budget_transaction = "budget_transaction"
+    grievance = "grievance"
+    user = "user"
+    project = "project"
+    project_photo = "project_photo"
+    document = "document"
+    announcement = "announcement"
+    village = "village"
+
+
+# Append-only history of sensitive changes (spending, replies, role changes, deletions).
+# Rows are written in batches by the audit writer (app/utils/audit.py), never updated or deleted.
+# No foreign keys: the history of a deleted record / user must stay readable.
+
+class AuditEvent(Base):
+    __tablename__ = "audit_events"
+
+    id = Column(BigInteger().with_variant(Integer , "sqlite") , primary_key=True)
+    entity_type = Column(String(32) , nullable=False)           # AuditEntityEnum value (string --> new types need no migration)
+    entity_id = Column(Integer , nullable=False)
+    action = Column(String(32) , nullable=False)                # e.g. create / update / delete / reply / role_change
+    actor_id = Column(Integer , nullable=True)                  # user who did it, NULL for system jobs
+    village_id = Column(Integer , nullable=True)
+    changes = Column(JSON , nullable=True)                      # compact: only the fields that matter, {"status": ["open", "resolved"]}
+    created_at = Column(DateTime(timezone=True) , nullable=False)   # when it happened (not when the batch was written)
+
+    __table_args__ = (
+        Index("ix_audit_events_entity" , "entity_type" , "entity_id" , "id"),
+        Index("ix_audit_events_village" , "village_id" , "id"),
+    )
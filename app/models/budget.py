@@ -1,4 +1,4 @@
-from sqlalchemy import Column , String , DateTime , ForeignKey , Enum , Float , Integer
+from sqlalchemy import Column , String , DateTime , ForeignKey , Enum , Float , Integer , UniqueConstraint , Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -50,7 +50,24 @@ class BudgetTransaction(Base):
     # Relationship 
     
     budget = relationship("Budget", back_populates="transactions")
-    
-           
-    
-    
\ No newline at end of file
+
+
+
+# Spend per budget per category, kept up to date on every transaction write.
+# Lets district / state dashboards aggregate a few rows per village instead of scanning transactions.
+
+class BudgetCategoryTotal(Base):
+    __tablename__ = "budget_category_totals"
+
+    id = Column(Integer , primary_key=True , index=True)
+    budget_id = Column(Integer , ForeignKey("budgets.id") , nullable=False)
+    village_id = Column(Integer , ForeignKey("villages.id") , nullable=False)
+    financial_year = Column(String , nullable=False)
+    category = Column(Enum(CategoryEnum) , nullable=False)
+    total_spent = Column(Float , nullable=False , default=0.0)
+    transaction_count = Column(Integer , nullable=False , default=0)
+
+    __table_args__ = (
+        UniqueConstraint("budget_id" , "category" , name="uq_budget_category_totals_budget_category"),
+        Index("ix_budget_category_totals_year_village" , "financial_year" , "village_id"),
+    )
@@ -0,0 +1,14 @@
+from sqlalchemy import Column , String , Integer , DateTime
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+# One row per cache key invalidated by a write, inserted in the same transaction as the write.
+# Workers read it back after a LISTEN reconnect; rows older than a day are pruned.
+
+class CacheOutbox(Base):
+    __tablename__ = "cache_outbox"
+
+    id = Column(Integer , primary_key=True)
+    key = Column(String , nullable=False)
+    created_at = Column(DateTime(timezone=True) , server_default=func.now() , nullable=False , index=True)
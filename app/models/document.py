@@ -1,10 +1,17 @@
-from sqlalchemy import Column , String , DateTime , ForeignKey , Enum , Float , Integer
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column , String , Text , DateTime , ForeignKey , Enum , Float , Integer
+from sqlalchemy.orm import relationship , deferred
 from sqlalchemy.sql import func
 import enum
 from app.database import Base
 
-class DocumentTypeEnum(String , enum.Enum):
+class PreviewStatusEnum(str , enum.Enum):
+    processing = "processing"
+    ready = "ready"
+    failed = "failed"
+    unsupported = "unsupported"
+
+
+class DocumentTypeEnum(str , enum.Enum):
     certificate = "certificate"
     notice = "notice"
     budget_report = "budget_report"
@@ -22,7 +29,35 @@ class Document(Base):
     type = Column(Enum(DocumentTypeEnum), default=DocumentTypeEnum.other)
     uploaded_by = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())    
+    content_hash = Column(String(64) , ForeignKey("document_blobs.sha256") , nullable=True , index=True)   # NULL --> uploaded before dedup
     
     # Relationship 
     
-    village = relationship("Village", back_populates="documents")
\ No newline at end of file
+    village = relationship("Village", back_populates="documents")
+    blob = relationship("DocumentBlob" , lazy="joined")      # preview state, loaded with the document
+    
+    @property
+    def preview_url(self):
+        if self.blob is not None and self.blob.preview_status == PreviewStatusEnum.ready:
+            return f"/api/documents/{self.id}/preview"
+        return None
+
+
+# One stored file per distinct content (SHA-256), shared by every Document with the same bytes.
+# ref_count = documents pointing at it; at 0 the file is removed by the GC sweep after a grace period.
+
+class DocumentBlob(Base):
+    __tablename__ = "document_blobs"
+    
+    sha256 = Column(String(64) , primary_key=True)
+    path = Column(String , nullable=False)                                         # storage key: documents/ab/<sha256>.pdf
+    size = Column(Integer , nullable=False)
+    ref_count = Column(Integer , nullable=False , default=0 , server_default="0")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    released_at = Column(DateTime(timezone=True) , nullable=True , index=True)     # last reference dropped
+    
+    # preview (page 1 of a PDF / scaled image as WebP), generated in the background once per content
+    preview_status = Column(Enum(PreviewStatusEnum) , nullable=True)               # NULL --> not tried yet
+    preview_attempts = Column(Integer , nullable=False , default=0 , server_default="0")
+    preview_updated_at = Column(DateTime(timezone=True) , nullable=True)
+    extracted_text = deferred(Column(Text , nullable=True))                        # PDF / DOCX text for search; deferred --> not loaded with document lists
@@ -1,11 +1,11 @@
-from sqlalchemy import Column , String , DateTime , ForeignKey , Enum , Float , Integer
+from sqlalchemy import Column , String , DateTime , ForeignKey , Enum , Float , Integer , PrimaryKeyConstraint , Index , DDL , event
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
 from app.database import Base
 
 
-class GrievanceStatusEnum(String , enum.Enum):
+class GrievanceStatusEnum(str , enum.Enum):
     open = "open"
     in_progress = "in_progress"
     resolved = "resolved"
@@ -22,12 +22,90 @@ class Grievance(Base):
     description  = Column(String , nullable=False)
     category = Column(String , nullable=False)       #eg. road , water etc
     status = Column(Enum(GrievanceStatusEnum) , default = GrievanceStatusEnum.open)
-    sarpanch_reply = Column(String , nullable=False)
+    sarpanch_reply = Column(String , nullable=True)              # null until sarpanch replies
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     resolved_at = Column(DateTime(timezone=True), nullable=True) 
+    duplicate_of = Column(Integer , ForeignKey("grievances.id") , nullable=True , index=True)   # root of near-duplicate cluster
+    
+    # work queue --> officials claim the next grievance for a lease and heartbeat to keep it
+    priority = Column(Integer , nullable=False , default=0 , server_default="0")    # higher first
+    claimed_by = Column(Integer , ForeignKey("users.id") , nullable=True)
+    claim_expires_at = Column(DateTime(timezone=True) , nullable=True)
+    
+    __table_args__ = (
+        Index("ix_grievances_queue" , "village_id" , "status" , "priority" , "created_at"),
+        # created_at / category as trailing columns --> SLA analytics read the index only, not the table
+        Index("ix_grievances_sla" , "village_id" , "status" , "resolved_at" , "created_at" , "category"),
+    )
     
     
     # Relationship
     village = relationship("Village" , back_populates='grievances')
     
-    citizens = relationship("User" , back_populates="grievances")
\ No newline at end of file
+    citizens = relationship("User" , back_populates="grievances" , foreign_keys=[citizen_id])
+
+
+# ── Full text search ──────────────────────────────
+# Postgres --> generated tsvector column (title > description > reply) + GIN index.
+# SQLite (local runs) --> external content FTS5 table kept in sync by triggers.
+# Not mapped on the model, only used by app.utils.search.
+
+GRIEVANCE_SEARCH_DDL = {
+    "postgresql": [
+        """
+        ALTER TABLE grievances ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(description, '')), 'B') ||
+            setweight(to_tsvector('simple', coalesce(sarpanch_reply, '')), 'C')
+        ) STORED
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_grievances_search_vector ON grievances USING GIN (search_vector)",
+    ],
+    "sqlite": [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS grievances_fts USING fts5(
+            title, description, sarpanch_reply, content='grievances', content_rowid='id'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS grievances_fts_ai AFTER INSERT ON grievances BEGIN
+            INSERT INTO grievances_fts(rowid, title, description, sarpanch_reply)
+            VALUES (new.id, new.title, new.description, new.sarpanch_reply);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS grievances_fts_ad AFTER DELETE ON grievances BEGIN
+            INSERT INTO grievances_fts(grievances_fts, rowid, title, description, sarpanch_reply)
+            VALUES ('delete', old.id, old.title, old.description, old.sarpanch_reply);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS grievances_fts_au AFTER UPDATE OF title, description, sarpanch_reply ON grievances BEGIN
+            INSERT INTO grievances_fts(grievances_fts, rowid, title, description, sarpanch_reply)
+            VALUES ('delete', old.id, old.title, old.description, old.sarpanch_reply);
+            INSERT INTO grievances_fts(rowid, title, description, sarpanch_reply)
+            VALUES (new.id, new.title, new.description, new.sarpanch_reply);
+        END
+        """,
+    ],
+}
+
+for dialect , statements in GRIEVANCE_SEARCH_DDL.items():
+    for statement in statements:
+        event.listen(Grievance.__table__ , "after_create" , DDL(statement).execute_if(dialect=dialect))
+
+
+
+# Number of grievances per village per status, updated in the same transaction as
+# submit / reply / delete so the sarpanch dashboard is a single primary key range read.
+
+class GrievanceStatusCount(Base):
+    __tablename__ = "grievance_status_counts"
+
+    village_id = Column(Integer , ForeignKey("villages.id") , nullable=False)
+    status = Column(Enum(GrievanceStatusEnum) , nullable=False)
+    count = Column(Integer , nullable=False , default=0)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("village_id" , "status"),
+    )
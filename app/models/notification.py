@@ -0,0 +1,46 @@
+from sqlalchemy import Column , String , DateTime , ForeignKey , Enum , Integer , Index
+from sqlalchemy.sql import func
+import enum
+from app.database import Base
+
+
+class NotificationJobStatusEnum(str , enum.Enum):
+    pending = "pending"
+    running = "running"
+    done = "done"
+    failed = "failed"
+
+
+# One row per fan-out (e.g. an alert announcement to a whole village).
+# Recipients are not stored: the worker walks users by id (last_user_id is the keyset cursor),
+# so a job resumes where it stopped after a crash or an expired lease.
+
+class NotificationJob(Base):
+    __tablename__ = "notification_jobs"
+
+    id = Column(Integer , primary_key=True , index=True)
+    village_id = Column(Integer , ForeignKey("villages.id") , nullable=False)
+    ward_number = Column(Integer , nullable=True)                  # NULL --> every ward
+    announcement_id = Column(Integer , ForeignKey("announcements.id" , ondelete="SET NULL") , nullable=True)
+    message = Column(String , nullable=False)
+    status = Column(Enum(NotificationJobStatusEnum) , nullable=False , default=NotificationJobStatusEnum.pending)
+    not_before = Column(DateTime(timezone=True) , nullable=True)     # scheduled announcements --> send when published
+
+    # progress
+    last_user_id = Column(Integer , nullable=False , default=0 , server_default="0")
+    sent_count = Column(Integer , nullable=False , default=0 , server_default="0")
+    failed_count = Column(Integer , nullable=False , default=0 , server_default="0")
+    attempts = Column(Integer , nullable=False , default=0 , server_default="0")
+    error = Column(String , nullable=True)
+
+    # lease of the worker running it
+    claimed_by = Column(String , nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True) , nullable=True)
+
+    created_at = Column(DateTime(timezone=True) , server_default=func.now())
+    started_at = Column(DateTime(timezone=True) , nullable=True)
+    finished_at = Column(DateTime(timezone=True) , nullable=True)
+
+    __table_args__ = (
+        Index("ix_notification_jobs_queue" , "status" , "not_before" , "id"),
+    )
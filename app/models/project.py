@@ -1,7 +1,8 @@
-from sqlalchemy import Column , String , Enum , DateTime , ForeignKey , Integer , Float , JSON
+from sqlalchemy import Column , String , Enum , DateTime , ForeignKey , Integer , Float , Index , PrimaryKeyConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
+from app.config import settings
 from app.database import Base
 
 
@@ -26,13 +27,100 @@ class Project(Base):
     status = Column(Enum(ProjectStatusEnum ,  name="project_status_enum") ,  default=ProjectStatusEnum.planned)
     start_date = Column(DateTime(timezone=True), nullable=True)
     end_date = Column(DateTime(timezone=True), nullable=True)
-    photos = Column(JSON, default=list)                 # list of cloudinary URLs
+    completed_at = Column(DateTime(timezone=True), nullable=True)     # set when the status becomes completed (completion latency)
+    cover_photo_id = Column(Integer , nullable=True)     # first ready photo (by position), kept up to date by refresh_cover
     created_by = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
+    # Listing filters (app/utils/project_listing.py): village first, then the filter,
+    # id last --> matching rows come out of the index already in "newest" order
+    
+    __table_args__ = (
+        Index("ix_projects_village_newest" , "village_id" , "id"),
+        Index("ix_projects_village_ward_status" , "village_id" , "ward_number" , "status" , "id"),
+        Index("ix_projects_village_status" , "village_id" , "status" , "id"),
+        Index("ix_projects_village_category" , "village_id" , "category" , "id"),
+        Index("ix_projects_village_cost" , "village_id" , "estimated_cost" , "id"),
+        Index("ix_projects_village_start" , "village_id" , "start_date"),
+    )
+    
     # Relationship 
     
     village = relationship("Village" , back_populates="projects")
+    photos = relationship("ProjectPhoto" , order_by="(ProjectPhoto.position, ProjectPhoto.id)" , lazy="select" ,
+                          cascade="all, delete-orphan")     # loaded only when accessed (detail view)
     
-    
\ No newline at end of file
+    @property
+    def cover_thumbnail_url(self):
+        return f"/api/projects/photos/{self.cover_photo_id}/thumb" if self.cover_photo_id else None
+
+
+class ProjectPhotoStatusEnum(str , enum.Enum):
+    pending = "pending"
+    processing = "processing"
+    ready = "ready"
+    failed = "failed"
+
+
+# One row per project photo. The original is kept in storage, the renditions
+# (PROJECT_PHOTO_RENDITIONS, WebP) are generated in the render pool after upload.
+# Storage keys are derived from the ids: projects/<project_id>/<photo_id>/<rendition>.webp
+
+class ProjectPhoto(Base):
+    __tablename__ = "project_photos"
+
+    id = Column(Integer , primary_key=True)
+    project_id = Column(Integer , ForeignKey("projects.id" , ondelete="CASCADE") , nullable=False)
+    position = Column(Integer , nullable=False , default=0)                       # display order, cover = lowest ready one
+    caption = Column(String , nullable=True)
+    original_key = Column(String , nullable=True)                                 # NULL --> external photo (external_url)
+    external_url = Column(String , nullable=True)                                 # photos added before uploads (cloudinary URLs)
+    status = Column(Enum(ProjectPhotoStatusEnum) , nullable=False , default=ProjectPhotoStatusEnum.pending)
+    attempts = Column(Integer , nullable=False , default=0 , server_default="0")
+    width = Column(Integer , nullable=True)
+    height = Column(Integer , nullable=True)
+    size = Column(Integer , nullable=True)                                        # bytes of the original
+    uploaded_by = Column(Integer , ForeignKey("users.id") , nullable=True)
+    created_at = Column(DateTime(timezone=True) , server_default=func.now())
+    updated_at = Column(DateTime(timezone=True) , nullable=True)
+
+    __table_args__ = (
+        Index("ix_project_photos_project_position" , "project_id" , "position"),
+    )
+
+    @property
+    def urls(self):
+
+        # rendition --> URL, once rendered (external photos: their own URL)
+
+        if self.external_url:
+            return {"original" : self.external_url}
+
+        if self.status != ProjectPhotoStatusEnum.ready:
+            return {}
+
+        return {name : f"/api/projects/photos/{self.id}/{name}" for name in settings.PROJECT_PHOTO_RENDITIONS}
+
+
+# Per village / ward / status totals of the projects, updated in the same transaction as
+# create / update / status change / delete so a ward dashboard is a single primary key range read.
+# A project counts in one row (its current status); completion_* only in completed rows.
+
+class ProjectWardStat(Base):
+    __tablename__ = "project_ward_stats"
+
+    village_id = Column(Integer , ForeignKey("villages.id") , nullable=False)
+    ward_number = Column(Integer , nullable=False)
+    status = Column(Enum(ProjectStatusEnum , name="project_status_enum") , nullable=False)
+    project_count = Column(Integer , nullable=False , default=0)
+    estimated_cost = Column(Float , nullable=False , default=0.0)
+    actual_cost = Column(Float , nullable=False , default=0.0)
+    over_budget_count = Column(Integer , nullable=False , default=0)      # actual_cost > estimated_cost
+    completion_days = Column(Float , nullable=False , default=0.0)        # sum of start --> completed_at, in days
+    completion_count = Column(Integer , nullable=False , default=0)       # projects in completion_days
+
+    __table_args__ = (
+        PrimaryKeyConstraint("village_id" , "ward_number" , "status"),
+    )
+
@@ -0,0 +1,12 @@
+from sqlalchemy import Column , String , Integer
+from app.database import Base
+
+
+# One counter per cacheable resource, e.g. "budget:4" or "announcements:12".
+# Bumped in the same transaction as every write, read (by primary key) before serving public GETs.
+
+class ResourceVersion(Base):
+    __tablename__ = "resource_versions"
+
+    key = Column(String , primary_key=True)
+    version = Column(Integer , nullable=False , default=0)
@@ -0,0 +1,76 @@
+from sqlalchemy import Column , String , Text , DateTime , ForeignKey , Enum , Integer , UniqueConstraint , DDL , event
+from sqlalchemy.sql import func
+import enum
+from app.database import Base
+
+
+class SearchEntityEnum(str , enum.Enum):
+    document = "document"
+    announcement = "announcement"
+    project = "project"
+
+
+# One row per searchable record (document / announcement / project), written in the same
+# transaction as the record itself --> the index is never behind the data it points at.
+# body = announcement content / project description / text extracted from a document file.
+
+class SearchEntry(Base):
+    __tablename__ = "search_entries"
+
+    id = Column(Integer , primary_key=True)
+    entity_type = Column(Enum(SearchEntityEnum) , nullable=False)
+    entity_id = Column(Integer , nullable=False)
+    village_id = Column(Integer , ForeignKey("villages.id" , ondelete="CASCADE") , nullable=False , index=True)
+    title = Column(String , nullable=False)
+    body = Column(Text , nullable=False , default="" , server_default="")
+    visible_from = Column(DateTime(timezone=True) , nullable=True)       # scheduled announcement --> hidden until then
+    visible_until = Column(DateTime(timezone=True) , nullable=True)      # expiring announcement --> hidden after
+    created_at = Column(DateTime(timezone=True) , server_default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("entity_type" , "entity_id" , name="uq_search_entries_entity"),
+    )
+
+
+# ── Full text index ──────────────────────────────
+# Same layout as grievance search: Postgres --> generated tsvector (title > body) + GIN index,
+# SQLite (local runs) --> external content FTS5 table kept in sync by triggers.
+
+SEARCH_ENTRY_DDL = {
+    "postgresql": [
+        """
+        ALTER TABLE search_entries ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(body, '')), 'B')
+        ) STORED
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_search_entries_search_vector ON search_entries USING GIN (search_vector)",
+    ],
+    "sqlite": [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS search_entries_fts USING fts5(
+            title, body, content='search_entries', content_rowid='id'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS search_entries_fts_ai AFTER INSERT ON search_entries BEGIN
+            INSERT INTO search_entries_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS search_entries_fts_ad AFTER DELETE ON search_entries BEGIN
+            INSERT INTO search_entries_fts(search_entries_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS search_entries_fts_au AFTER UPDATE OF title, body ON search_entries BEGIN
+            INSERT INTO search_entries_fts(search_entries_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+            INSERT INTO search_entries_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+        END
+        """,
+    ],
+}
+
+for dialect , statements in SEARCH_ENTRY_DDL.items():
+    for statement in statements:
+        event.listen(SearchEntry.__table__ , "after_create" , DDL(statement).execute_if(dialect=dialect))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column , Integer , String , DateTime , Boolean , ForeignKey , Enum , Boolean 
+from sqlalchemy import Column , Integer , String , DateTime , Boolean , ForeignKey , Enum , Boolean , Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum 
@@ -30,6 +30,12 @@ class User(Base):
     # Relationship 
     
     village = relationship("Village" , back_populates="users")
-    grievances = relationship("Grievance" , back_populates="citizens")
+    grievances = relationship("Grievance" , back_populates="citizens" , foreign_keys="Grievance.citizen_id")
     announcements = relationship("Announcement" , back_populates="published_by_user")
+    
+    # notification fan-out walks residents of a village / ward in id order
+    
+    __table_args__ = (
+        Index("ix_users_village_ward" , "village_id" , "ward_number" , "id"),
+    )
     
\ No newline at end of file
@@ -9,8 +9,8 @@ class Village(Base):
     
     id = Column(Integer , primary_key=True , index=True)
     name  = Column(String , nullable=False)
-    district = Column(String , nullable=False)
-    state = Column(String , nullable=False)
+    district = Column(String , nullable=False , index=True)
+    state = Column(String , nullable=False , index=True)
     pincode = Column(Integer , nullable=False)
     
     created_at = Column(DateTime(timezone=True) , server_default=func.now())
@@ -0,0 +1,487 @@
+from fastapi import APIRouter , Depends
+from sqlalchemy.orm import Session
+from sqlalchemy import func , select , case , and_
+from typing import Optional
+from datetime import datetime , timedelta , date
+from app.database import get_db
+from app.models.budget import Budget , BudgetCategoryTotal , CategoryEnum
+from app.models.grievance import Grievance , GrievanceStatusEnum
+from app.models.project import ProjectWardStat , ProjectStatusEnum
+from app.models.user import RoleEnum
+from app.models.villages import Village
+from app.utils.auth import get_current_user
+from app.utils.exception import NotFoundException , ForbiddenException , BadRequestException
+
+router = APIRouter()
+
+
+#------------------------------- Helpers -------------------------------
+
+def _budget_totals(db : Session , financial_year : str , state : str , district : str = None):
+
+    # allocated / spent over all villages in scope --> one indexed aggregate over budgets
+
+    query = (db.query(func.count(Budget.id) , func.sum(Budget.total_allocated) , func.sum(Budget.total_spent))
+               .join(Village , Village.id == Budget.village_id)
+               .filter(Budget.financial_year == financial_year , Village.state == state))
+
+    if district:
+        query = query.filter(Village.district == district)
+
+    village_count , allocated , spent = query.one()
+
+    if not village_count:
+        raise NotFoundException("No budgets found for this region")
+
+    allocated = float(allocated or 0)
+    spent = float(spent or 0)
+
+    return {
+        "financial_year": financial_year,
+        "village_count": village_count,
+        "total_allocated": allocated,
+        "total_spent": spent,
+        "remaining": allocated - spent,
+        "spent_percentage": round((spent / allocated) * 100 , 2) if allocated else 0.0,
+    }
+
+
+def _category_breakdown(db : Session , financial_year : str , state : str , district : str = None):
+
+    # reads the pre-aggregated per budget / per category rows, never the transactions table
+
+    query = (db.query(BudgetCategoryTotal.category , func.sum(BudgetCategoryTotal.total_spent))
+               .join(Village , Village.id == BudgetCategoryTotal.village_id)
+               .filter(BudgetCategoryTotal.financial_year == financial_year , Village.state == state))
+
+    if district:
+        query = query.filter(Village.district == district)
+
+    category_breakdown = {c.value : 0.0 for c in CategoryEnum}
+
+    for category , total in query.group_by(BudgetCategoryTotal.category).all():
+        category_breakdown[category.value] = float(total or 0)
+
+    return category_breakdown
+
+
+#------------------------------- Budget roll-ups (Public) -------------------------------
+
+# State level roll-up
+
+@router.get("/budget/state/{state}")
+
+def get_state_budget_rollup(state : str , financial_year : str , db : Session = Depends(get_db)):
+
+    """
+    Allocated vs spent vs remaining for every village of a state, with category breakdown.
+    Example: /api/analytics/budget/state/Bihar?financial_year=2024-25
+    """
+
+    summary = _budget_totals(db , financial_year , state)
+
+    summary["state"] = state
+    summary["category_breakdown"] = _category_breakdown(db , financial_year , state)
+
+    return summary
+
+
+# District level roll-up
+
+@router.get("/budget/state/{state}/district/{district}")
+
+def get_district_budget_rollup(state : str , district : str , financial_year : str , db : Session = Depends(get_db)):
+
+    """
+    Allocated vs spent vs remaining for every village of a district, with category breakdown.
+    Example: /api/analytics/budget/state/Bihar/district/Gaya?financial_year=2024-25
+    """
+
+    summary = _budget_totals(db , financial_year , state , district)
+
+    summary["state"] = state
+    summary["district"] = district
+    summary["category_breakdown"] = _category_breakdown(db , financial_year , state , district)
+
+    return summary
+
+
+# Drill down --> villages of a district
+
+@router.get("/budget/state/{state}/district/{district}/villages")
+
+def get_district_village_budgets(state : str , district : str , financial_year : str , db : Session = Depends(get_db)):
+
+    """
+    One row per village of the district — allocated, spent and remaining.
+    Use /api/budget/{budget_id}/summary to drill further into a single village.
+    """
+
+    rows = (db.query(Village.id , Village.name , Budget.id , Budget.total_allocated , Budget.total_spent)
+              .join(Budget , Budget.village_id == Village.id)
+              .filter(Village.state == state , Village.district == district , Budget.financial_year == financial_year)
+              .order_by(Village.name)
+              .all())
+
+    return [
+        {
+            "village_id": village_id,
+            "village_name": name,
+            "budget_id": budget_id,
+            "total_allocated": allocated,
+            "total_spent": spent,
+            "remaining": allocated - spent,
+        }
+        for village_id , name , budget_id , allocated , spent in rows
+    ]
+
+
+# Drill down --> one category across the villages of a district
+
+@router.get("/budget/state/{state}/district/{district}/category/{category}")
+
+def get_district_category_budgets(state : str , district : str , category : CategoryEnum , financial_year : str ,
+                                  db : Session = Depends(get_db)):
+
+    """
+    Spend of a single category per village of the district, highest first.
+    Example: /api/analytics/budget/state/Bihar/district/Gaya/category/road?financial_year=2024-25
+    """
+
+    rows = (db.query(Village.id , Village.name , BudgetCategoryTotal.budget_id ,
+                     BudgetCategoryTotal.total_spent , BudgetCategoryTotal.transaction_count)
+              .join(BudgetCategoryTotal , BudgetCategoryTotal.village_id == Village.id)
+              .filter(Village.state == state , Village.district == district ,
+                      BudgetCategoryTotal.financial_year == financial_year , BudgetCategoryTotal.category == category)
+              .order_by(BudgetCategoryTotal.total_spent.desc())
+              .all())
+
+    return [
+        {
+            "village_id": village_id,
+            "village_name": name,
+            "budget_id": budget_id,
+            "total_spent": spent,
+            "transaction_count": count,
+        }
+        for village_id , name , budget_id , spent , count in rows
+    ]
+
+
+#------------------------------- Grievance SLA helpers -------------------------------
+
+PERCENTILES = {"p50" : 0.5 , "p90" : 0.9 , "p95" : 0.95}
+
+AGEING_BUCKETS = [("0-2_days" , 2) , ("3-7_days" , 7) , ("8-30_days" , 30) , ("over_30_days" , None)]
+
+
+def _resolution_seconds(dialect : str):
+
+    if dialect == "postgresql":
+        return func.extract("epoch" , Grievance.resolved_at - Grievance.created_at)
+
+    return (func.julianday(Grievance.resolved_at) - func.julianday(Grievance.created_at)) * 86400
+
+
+def _hours(seconds):
+
+    return round(float(seconds) / 3600 , 2) if seconds is not None else None
+
+
+def _stats_row(row) -> dict:
+
+    return {
+        "resolved_count": row["n"] or 0,
+        "avg_hours": _hours(row["avg"]),
+        **{f"{name}_hours" : _hours(row[name]) for name in PERCENTILES},
+    }
+
+
+def _resolution_stats(db : Session , scope , group_col , since : Optional[date] = None):
+
+    """
+    Count, average and percentile resolution time, computed in the database.
+    One row per group (category / village) plus the overall row under "all".
+    Postgres --> percentile_cont ordered-set aggregates, GROUP BY ROLLUP --> groups and overall in one scan.
+    Others   --> nearest-rank percentile from ROW_NUMBER() over the sorted durations, overall in a second query.
+    """
+
+    dialect = db.get_bind().dialect.name
+    duration = _resolution_seconds(dialect)
+
+    filters = [scope , Grievance.status == GrievanceStatusEnum.resolved , Grievance.resolved_at.isnot(None)]
+
+    if since:
+        filters.append(Grievance.resolved_at >= since)
+
+    result = {}
+
+    if dialect == "postgresql":
+        stats = [func.count().label("n") , func.avg(duration).label("avg")]
+        stats += [func.percentile_cont(p).within_group(duration).label(name) for name , p in PERCENTILES.items()]
+
+        # grouping() = 1 on the ROLLUP total row, even if a group value itself is NULL
+        # (ROLLUP over no rows still returns the total row --> overall stats are zero, never missing)
+        query = (select(group_col.label("grp") , func.grouping(group_col).label("total") , *stats)
+                   .where(*filters).group_by(func.rollup(group_col)))
+
+        for row in db.execute(query).mappings():
+            result["all" if row["total"] else str(row["grp"])] = _stats_row(row)
+
+        return result
+
+    for group in (group_col , None):
+        partition = [group] if group is not None else None
+        source = (select(*([group.label("grp")] if group is not None else []) , duration.label("d") ,
+                         func.row_number().over(partition_by=partition , order_by=duration).label("rn") ,
+                         func.count().over(partition_by=partition).label("n"))
+                    .where(*filters).subquery())
+        stats = [func.max(source.c.n).label("n") , func.avg(source.c.d).label("avg")]
+        stats += [func.min(case((source.c.rn >= p * source.c.n , source.c.d))).label(name) for name , p in PERCENTILES.items()]
+
+        query = select(*([source.c.grp] if group is not None else []) , *stats).select_from(source)
+
+        if group is not None:
+            query = query.group_by(source.c.grp)
+
+        # an aggregate without GROUP BY always returns one row --> overall stats are zero, never missing
+
+        for row in db.execute(query).mappings():
+            result[str(row["grp"]) if group is not None else "all"] = _stats_row(row)
+
+    return result
+
+
+def _open_ageing(db : Session , scope , group_col):
+
+    # how long open / in progress grievances have been waiting, bucketed by age
+    # one row per group, the overall row ("all") is their sum --> no second scan
+
+    now = datetime.now()
+
+    columns = []
+    newer_than = None
+
+    for name , days in AGEING_BUCKETS:
+        conditions = []
+        if days is not None:
+            conditions.append(Grievance.created_at >= now - timedelta(days=days))
+        if newer_than is not None:
+            conditions.append(Grievance.created_at < now - timedelta(days=newer_than))
+        columns.append(func.sum(case((and_(*conditions) , 1) , else_=0)).label(name))
+        newer_than = days
+
+    query = (select(group_col.label("grp") , func.count().label("open_count") , *columns)
+               .where(scope , Grievance.status.in_([GrievanceStatusEnum.open , GrievanceStatusEnum.in_progress]))
+               .group_by(group_col))
+
+    result = {}
+    total = dict.fromkeys(["open_count"] + [name for name , _ in AGEING_BUCKETS] , 0)
+
+    for row in db.execute(query).mappings():
+        counts = {key : int(value or 0) for key , value in row.items() if key != "grp"}
+        result[str(row["grp"])] = counts
+        for key , value in counts.items():
+            total[key] += value
+
+    result["all"] = total
+
+    return result
+
+
+def _sla_report(db : Session , scope , group_col , since : Optional[date]):
+
+    resolution = _resolution_stats(db , scope , group_col , since)
+    ageing = _open_ageing(db , scope , group_col)
+
+    return {
+        "resolution": resolution.pop("all"),
+        "open_ageing": ageing.pop("all"),
+        "by_group": {
+            "resolution": resolution,
+            "open_ageing": ageing,
+        },
+    }
+
+
+#------------------------------- Grievance SLA (Sarpanch / Admin) -------------------------------
+
+# SLA of one village
+
+@router.get("/grievances/sla")
+
+def get_village_grievance_sla(village_id : Optional[int] = None , since : Optional[date] = None ,
+                              db : Session = Depends(get_db) , current_user = Depends(get_current_user)):
+
+    """
+    SARPANCH / ADMIN ONLY — Resolution time percentiles (p50 / p90 / p95), open ageing buckets,
+    overall and per category. Sarpanch always sees their own village, admin can pass village_id.
+    since --> only grievances resolved on / after this date, e.g. ?since=2025-04-01
+    """
+
+    if current_user.role not in [RoleEnum.sarpanch , RoleEnum.admin]:
+        raise ForbiddenException("Access Denied")
+
+    if current_user.role != RoleEnum.admin or village_id is None:
+        village_id = current_user.village_id
+
+    report = _sla_report(db , Grievance.village_id == village_id , Grievance.category , since)
+    report["village_id"] = village_id
+    report["group_by"] = "category"
+
+    return report
+
+
+# SLA of a district
+
+@router.get("/grievances/sla/state/{state}/district/{district}")
+
+def get_district_grievance_sla(state : str , district : str , group_by : str = "category" , since : Optional[date] = None ,
+                               db : Session = Depends(get_db) , current_user = Depends(get_current_user)):
+
+    """
+    ADMIN ONLY — Same report across every village of a district.
+    group_by --> category (default) or village
+    """
+
+    if current_user.role != RoleEnum.admin:
+        raise ForbiddenException("Only Admin can view district analytics")
+
+    if group_by not in ["category" , "village"]:
+        raise BadRequestException("group_by must be category or village")
+
+    village_ids = select(Village.id).where(Village.state == state , Village.district == district)
+
+    group_col = Grievance.category if group_by == "category" else Grievance.village_id
+
+    report = _sla_report(db , Grievance.village_id.in_(village_ids) , group_col , since)
+    report["state"] = state
+    report["district"] = district
+    report["group_by"] = group_by
+
+    return report
+
+
+#------------------------------- Project ward stats helpers -------------------------------
+
+def _empty_project_stats() -> dict:
+
+    return {"total_projects" : 0 , "by_status" : {s.value : 0 for s in ProjectStatusEnum} , "estimated_cost" : 0.0 , "actual_cost" : 0.0 ,
+            "completed_estimated" : 0.0 , "completed_actual" : 0.0 , "over_budget_projects" : 0 , "completion_days" : 0.0 , "completion_count" : 0}
+
+
+def _add_project_row(stats : dict , row):
+
+    stats["total_projects"] += row.project_count
+    stats["by_status"][row.status.value] += row.project_count
+    stats["estimated_cost"] += row.estimated_cost
+    stats["actual_cost"] += row.actual_cost
+    stats["over_budget_projects"] += row.over_budget_count
+    stats["completion_days"] += row.completion_days
+    stats["completion_count"] += row.completion_count
+
+    if row.status == ProjectStatusEnum.completed:
+        stats["completed_estimated"] += row.estimated_cost
+        stats["completed_actual"] += row.actual_cost
+
+
+def _project_report(stats : dict) -> dict:
+
+    # overrun ratio over completed projects only: the actual cost of running ones is not final yet
+
+    completed_estimated = stats.pop("completed_estimated")
+    completed_actual = stats.pop("completed_actual")
+    days = stats.pop("completion_days")
+    count = stats.pop("completion_count")
+
+    stats["estimated_cost"] = round(stats["estimated_cost"] , 2)
+    stats["actual_cost"] = round(stats["actual_cost"] , 2)
+    stats["overrun_ratio"] = round(completed_actual / completed_estimated , 3) if completed_estimated > 0 else None
+    stats["avg_completion_days"] = round(days / count , 1) if count > 0 else None
+
+    return stats
+
+
+#------------------------------- Project ward stats (Sarpanch / Ward member / Admin) -------------------------------
+
+# Ward dashboard of one village
+
+@router.get("/projects/wards")
+
+def get_ward_project_stats(village_id : Optional[int] = None , ward_number : Optional[int] = None ,
+                           db : Session = Depends(get_db) , current_user = Depends(get_current_user)):
+
+    """
+    Per ward: project count by status, estimated vs actual cost, overrun ratio
+    (actual / estimated of completed projects) and average days from start to completion.
+    Sarpanch sees their village, ward member only their own ward, admin can pass village_id.
+    Reads the precomputed project_ward_stats rows --> one primary key range query.
+    """
+
+    if current_user.role not in [RoleEnum.sarpanch , RoleEnum.admin , RoleEnum.ward_citizen]:
+        raise ForbiddenException("Access Denied")
+
+    if current_user.role != RoleEnum.admin or village_id is None:
+        village_id = current_user.village_id
+
+    if current_user.role == RoleEnum.ward_citizen:
+        ward_number = current_user.ward_number
+
+    query = db.query(ProjectWardStat).filter(ProjectWardStat.village_id == village_id)
+
+    if ward_number is not None:
+        query = query.filter(ProjectWardStat.ward_number == ward_number)
+
+    wards = {}
+
+    for row in query.order_by(ProjectWardStat.ward_number).all():
+        _add_project_row(wards.setdefault(row.ward_number , _empty_project_stats()) , row)
+
+    return {
+        "village_id": village_id,
+        "wards": [{"ward_number" : ward , **_project_report(stats)} for ward , stats in wards.items() if stats["total_projects"]],
+    }
+
+
+# District roll-up
+
+@router.get("/projects/state/{state}/district/{district}")
+
+def get_district_project_stats(state : str , district : str , db : Session = Depends(get_db) , current_user = Depends(get_current_user)):
+
+    """
+    ADMIN ONLY — Same figures per village of a district, plus the district total.
+    One GROUP BY over project_ward_stats (a few rows per village), never over projects.
+    """
+
+    if current_user.role != RoleEnum.admin:
+        raise ForbiddenException("Only Admin can view district analytics")
+
+    rows = (db.query(Village.id.label("village_id") , Village.name.label("village_name") , ProjectWardStat.status,
+                     func.sum(ProjectWardStat.project_count).label("project_count"),
+                     func.sum(ProjectWardStat.estimated_cost).label("estimated_cost"),
+                     func.sum(ProjectWardStat.actual_cost).label("actual_cost"),
+                     func.sum(ProjectWardStat.over_budget_count).label("over_budget_count"),
+                     func.sum(ProjectWardStat.completion_days).label("completion_days"),
+                     func.sum(ProjectWardStat.completion_count).label("completion_count"))
+              .join(ProjectWardStat , ProjectWardStat.village_id == Village.id)
+              .filter(Village.state == state , Village.district == district)
+              .group_by(Village.id , Village.name , ProjectWardStat.status)
+              .order_by(Village.name)
+              .all())
+
+    villages = {}
+    total = _empty_project_stats()
+
+    for row in rows:
+        _add_project_row(villages.setdefault((row.village_id , row.village_name) , _empty_project_stats()) , row)
+        _add_project_row(total , row)
+
+    return {
+        "state": state,
+        "district": district,
+        "total": _project_report(total),
+        "villages": [{"village_id" : village_id , "village_name" : name , **_project_report(stats)}
+                     for (village_id , name) , stats in villages.items() if stats["total_projects"]],
+    }
+
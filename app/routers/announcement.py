@@ -1,13 +1,25 @@
-from fastapi import HTTPException , APIRouter , Depends , UploadFile , File
+from fastapi import HTTPException , APIRouter , Depends , UploadFile , File , Request , Response
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func , or_ , insert
 from typing import List
+from datetime import datetime , timezone
 from app.database import get_db
 from app.models.announcement import Announcement , AnnouncementTypeEnum
 from app.models.user import RoleEnum
-from app.schema.announcement import AnnouncementCreate , AnnouncementResponse , AnnouncementTypeEnum , AnnouncementUpdate
+from app.models.villages import Village
+from app.schema.announcement import AnnouncementCreate , AnnouncementResponse , AnnouncementTypeEnum , AnnouncementUpdate , to_utc
+from app.schema.announcement import AnnouncementBroadcast , AnnouncementBroadcastResult
 from app.utils.auth import get_current_user
 from app.utils.exception import ConflictException  , NotFoundException , UnauthorizeException , ForbiddenException ,  BadRequestException
+from app.utils.etag import bump_version , bump_versions , current_etag , etag_matches , not_modified , etag_response
+from app.utils.pubsub import publish , publish_many , village_channel
+from app.utils.feeds import village_feed , refresh_village_feed , visible , newest_first
+from app.models.notification import NotificationJob , NotificationJobStatusEnum
+from app.utils.notifications import enqueue_notification , alert_message , notifier
+from app.models.search import SearchEntityEnum
+from app.utils.search import index_announcement , index_new_entries , remove_entry
+from app.models.audit import AuditEntityEnum
+from app.utils.audit import audit
 
 router = APIRouter()
 
@@ -26,7 +38,12 @@ def get_all_announcement(viilage_id : int , db : Session = Depends(get_db)):
     Ordered by latest first.
     Example: /api/announcements/?village_id=1"""
     
-    announcments = db.query(Announcement).filter(Announcement.village_id == viilage_id).order_by(Announcement.created_at.desc()).all()
+    feed = village_feed(db , viilage_id)
+    
+    if feed.complete:
+        return Response(content=feed.rendered , media_type="application/json")
+    
+    announcments = db.query(Announcement).filter(Announcement.village_id == viilage_id , *visible()).order_by(*newest_first()).all()
     
     return announcments
 
@@ -43,8 +60,13 @@ def get_announcement_by_type(village_id : int , ann_type : AnnouncementTypeEnum
     Types: notice / scheme / meeting / alert / general
     """
     
-    announcement = db.query(Announcement).filter(Announcement.village_id == village_id , Announcement.type == ann_type).order_by(
-        Announcement.created_at.desc()).all()
+    feed = village_feed(db , village_id)
+    
+    if feed.complete:
+        return Response(content=feed.of_type(ann_type.value) , media_type="application/json")
+    
+    announcement = db.query(Announcement).filter(Announcement.village_id == village_id , Announcement.type == ann_type , *visible()).order_by(
+        *newest_first()).all()
     
     return announcement
 
@@ -52,18 +74,50 @@ def get_announcement_by_type(village_id : int , ann_type : AnnouncementTypeEnum
 
 @router.get("/latest" , response_model=List[AnnouncementResponse])
 
-def get_latest_announcement(village_id : int , limit : int = 5 , db:Session = Depends(get_db)):
+def get_latest_announcement(village_id : int , request : Request , limit : int = 5 , db:Session = Depends(get_db)):
     
     """
     Get latest N announcements.
     Default limit is 5.
     Used for home page/dashboard.
+    Supports If-None-Match --> 304 when nothing was published since the last poll.
     Example: /api/announcements/latest?village_id=1&limit=5
     """
     
-    announcement = db.query(Announcement).filter(Announcement.village_id == village_id).order_by(Announcement.created_at.desc()).limit(limit).all()
+    etag = current_etag(request , db , f"announcements:{village_id}" , limit)
     
-    return announcement
+    if etag_matches(request , etag):
+        return not_modified(request , etag)
+    
+    latest = village_feed(db , village_id).latest(limit)
+    
+    if latest is None:
+        announcement = db.query(Announcement).filter(Announcement.village_id == village_id , *visible()).order_by(*newest_first()).limit(limit).all()
+        latest = [AnnouncementResponse.model_validate(a) for a in announcement]
+    
+    return etag_response(request , latest , etag)
+
+# Scheduled / expired announcements of own village 
+
+@router.get("/scheduled" , response_model=List[AnnouncementResponse])
+
+def get_scheduled_announcement(db : Session = Depends(get_db) , current_user = Depends(get_current_user)):
+    
+    """
+    SARPANCH / ADMIN ONLY — Announcements citizens cannot see right now:
+    waiting for publish_at, or past expires_at. Soonest publish first.
+    """
+    
+    if current_user.role not in [RoleEnum.sarpanch , RoleEnum.admin]:
+        raise ForbiddenException("Access Denied")
+    
+    now = datetime.now(timezone.utc)
+    
+    announcements = db.query(Announcement).filter(Announcement.village_id == current_user.village_id,
+                                                  or_(Announcement.publish_at > now , Announcement.expires_at <= now)).order_by(
+                                                  Announcement.publish_at.asc() , Announcement.id.desc()).all()
+    
+    return announcements
 
 # Get announcement by id 
 
@@ -76,7 +130,7 @@ def get_announcement(announcement_id : int , db : Session = Depends(get_db)):
     Public — anyone can view.
     """
     
-    announcement = db.query(Announcement).filter(Announcement.id == announcement_id).first()
+    announcement = db.query(Announcement).filter(Announcement.id == announcement_id , *visible()).first()
     
     if not announcement:
         raise NotFoundException("Announcement not found")
@@ -94,23 +148,156 @@ def create_announcement(data : AnnouncementCreate , db : Session = Depends(get_d
     """
     SARPANCH / ADMIN ONLY — Publish a new announcement.
     village_id and published_by added automatically from logged in user.
+    publish_at (optional) --> stays hidden until then, expires_at (optional) --> hidden after.
+    Alerts are also sent by SMS to every active resident of the village (when published).
     """
     
-    if get_current_user.role not in [RoleEnum.sarpanch , RoleEnum.admin]:
+    if current_user.role not in [RoleEnum.sarpanch , RoleEnum.admin]:
         raise ForbiddenException("Access Denied")
      
     announcement = Announcement(title = data.title,
                                  content = data.content,
                                  type = data.type,
-                                 village_id = current_user.viilage_id,
-                                 published_by = current_user.id)
+                                 village_id = current_user.village_id,
+                                 published_by = current_user.id,
+                                 publish_at = data.publish_at,
+                                 expires_at = data.expires_at)
     
     db.add(announcement)
+    db.flush()
+    bump_version(db , f"announcements:{current_user.village_id}")
+    index_announcement(db , announcement)
+    
+    # alert --> fan-out job committed together with the announcement
+    
+    if data.type == AnnouncementTypeEnum.alert:
+        enqueue_notification(db , current_user.village_id , alert_message(data.title , data.content) ,
+                             announcement_id=announcement.id , not_before=data.publish_at)
+    
+    # live push to every worker on commit; scheduled ones are pushed by the scheduler when they go live
+    
+    if data.publish_at is None or data.publish_at <= datetime.now(timezone.utc):
+        publish(db , village_channel(announcement.village_id) , "announcement.created",
+                AnnouncementResponse.model_validate(announcement).model_dump(mode="json"))
+    
     db.commit()
     db.refresh(announcement)
     
+    refresh_village_feed(db , announcement.village_id)
+    
+    if data.type == AnnouncementTypeEnum.alert:
+        notifier.wake()
+    
     return announcement
+
+
+# Broadcast one announcement to every village of a state / district
+
+@router.post("/broadcast" , response_model=AnnouncementBroadcastResult , status_code=201)
+
+def broadcast_announcement(data : AnnouncementBroadcast , db : Session = Depends(get_db) , current_user = Depends(get_current_user)):
+    
+    """
+    ADMIN ONLY — Post the same announcement to every village of a state, or of one district.
+    Villages are resolved with one query and all rows are written with one batched INSERT.
+    Example body: {"title": "PM Awas Yojana", "content": "...", "type": "scheme", "state": "Bihar", "district": "Patna"}
+    """
+    
+    if current_user.role != RoleEnum.admin:
+        raise ForbiddenException("Only admin can broadcast announcements")
+    
+    query = db.query(Village.id).filter(Village.state == data.state)
+    
+    if data.district:
+        query = query.filter(Village.district == data.district)
+    
+    village_ids = [village_id for (village_id ,) in query.order_by(Village.id)]
+    
+    if not village_ids:
+        raise NotFoundException("No villages found for this state / district")
+    
+    # RETURNING carries the village of each row, so the batch needs no parameter ordering
+    
+    rows = db.execute(insert(Announcement).returning(Announcement.id , Announcement.village_id , Announcement.created_at),
+                      [{"village_id" : village_id,
+                        "title" : data.title,
+                        "content" : data.content,
+                        "type" : data.type,
+                        "published_by" : current_user.id,
+                        "publish_at" : data.publish_at,
+                        "expires_at" : data.expires_at} for village_id in village_ids]).all()
+    
+    # one version bump / feed eviction per village, batched
+    
+    bump_versions(db , [f"announcements:{village_id}" for village_id in village_ids])
+    
+    index_new_entries(db , SearchEntityEnum.announcement , [{"entity_id" : announcement_id,
+                                                             "village_id" : village_id,
+                                                             "title" : data.title,
+                                                             "body" : data.content,
+                                                             "visible_from" : data.publish_at,
+                                                             "visible_until" : data.expires_at} for announcement_id , village_id , _ in rows])
+    
+    if data.type == AnnouncementTypeEnum.alert:
+        message = alert_message(data.title , data.content)
+        db.execute(insert(NotificationJob) , [{"village_id" : village_id,
+                                               "announcement_id" : announcement_id,
+                                               "message" : message,
+                                               "not_before" : data.publish_at,
+                                               "status" : NotificationJobStatusEnum.pending} for announcement_id , village_id , _ in rows])
+    
+    if data.publish_at is None or data.publish_at <= datetime.now(timezone.utc):
+        publish_many(db , [(village_channel(village_id) , "announcement.created",
+                            AnnouncementResponse(id=announcement_id , village_id=village_id , title=data.title , content=data.content ,
+                                                 type=data.type , published_by=current_user.id , created_at=created_at ,
+                                                 publish_at=data.publish_at , expires_at=data.expires_at).model_dump(mode="json"))
+                           for announcement_id , village_id , created_at in rows])
+    
+    db.commit()
+    
+    if data.type == AnnouncementTypeEnum.alert:
+        notifier.wake()
+    
+    return {"villages" : len(rows) , "announcement_ids" : [announcement_id for announcement_id , _ , _ in rows]}
      
+# Keep the alert's SMS job in step with an edited announcement
+
+def _sync_alert_job(db : Session , announcement : Announcement , was_alert : bool) -> bool:
+    
+    """
+    Same transaction as the edit. Only pending jobs are touched, a running / finished one is left alone.
+    - still an alert --> new message and send time on the pending job
+    - no longer an alert --> pending job deleted (as on delete)
+    - became an alert --> new job queued
+    Returns True when the worker should be woken after the commit.
+    """
+    
+    # row lock --> the worker cannot claim the job while it is being changed (it skips locked rows)
+    
+    jobs = db.query(NotificationJob).filter(NotificationJob.announcement_id == announcement.id ,
+                                            NotificationJob.status == NotificationJobStatusEnum.pending).with_for_update().all()
+    
+    if announcement.type != AnnouncementTypeEnum.alert:
+        for job in jobs:
+            db.delete(job)
+        return False
+    
+    message = alert_message(announcement.title , announcement.content)
+    
+    for job in jobs:
+        job.message = message
+        # a job waiting on its retry backoff keeps the later of the two times
+        retry_at = to_utc(job.not_before) if job.attempts else None
+        publish_at = to_utc(announcement.publish_at)
+        job.not_before = max(publish_at , retry_at) if publish_at and retry_at else publish_at or retry_at
+    
+    if not was_alert and not jobs:
+        enqueue_notification(db , announcement.village_id , message , announcement_id=announcement.id ,
+                             not_before=announcement.publish_at)
+    
+    return True
+
+
 # Update an announcement 
 
 @router.patch("/{announcement_id}" , response_model=AnnouncementResponse)
@@ -134,21 +321,36 @@ def admin_update_announcement(announcement_id : int , data : AnnouncementUpdate
     if not update_data:
         raise BadRequestException("No Fields provided")
     
+    was_alert = announcement.type == AnnouncementTypeEnum.alert
+    
     # Apply updated 
     
     for key , value in update_data.items():
         setattr(announcement , key , value)
     
+    publish_at = to_utc(announcement.publish_at) or datetime.now(timezone.utc)
+    
+    if announcement.expires_at and to_utc(announcement.expires_at) <= publish_at:
+        raise BadRequestException("expires_at must be after publish_at")
+    
+    bump_version(db , f"announcements:{announcement.village_id}")
+    index_announcement(db , announcement)
+    wake = _sync_alert_job(db , announcement , was_alert)
     
     db.commit()
     db.refresh(announcement)
     
+    refresh_village_feed(db , announcement.village_id)
+    
+    if wake:
+        notifier.wake()
+    
     return announcement
 
 
 # Delete an announcement 
 
-@router.delete("/{announcement_id}" , response_model=AnnouncementResponse)
+@router.delete("/{announcement_id}")
 
 def delete_announcement(announcement_id : int , db : Session = Depends(get_db) , current_user = Depends(get_current_user)):
     
@@ -165,9 +367,20 @@ def delete_announcement(announcement_id : int , db : Session = Depends(get_db) ,
     if not announcement:
         raise NotFoundException("Announcement not found")
     
+    # SMS not started yet (e.g. scheduled alert) --> cancelled with it
+    
+    db.query(NotificationJob).filter(NotificationJob.announcement_id == announcement_id ,
+                                     NotificationJob.status == NotificationJobStatusEnum.pending).delete(synchronize_session=False)
+    
     db.delete(announcement)
+    bump_version(db , f"announcements:{announcement.village_id}")
+    remove_entry(db , SearchEntityEnum.announcement , announcement_id)
+    audit(db , AuditEntityEnum.announcement , announcement_id , "delete" , actor_id=current_user.id , village_id=announcement.village_id ,
+          changes={"title" : announcement.title , "type" : announcement.type})
     db.commit()
     
+    refresh_village_feed(db , announcement.village_id)
+    
     return {"message" : f"Announcement {announcement.title} deleted successfully"}     
 
 
@@ -0,0 +1,39 @@
+from fastapi import APIRouter , Depends , Query
+from sqlalchemy.orm import Session
+from typing import Optional
+from app.database import get_db
+from app.models.audit import AuditEntityEnum
+from app.models.user import RoleEnum
+from app.schema.audit import AuditPage
+from app.utils.auth import get_current_user
+from app.utils.audit import entity_history
+from app.utils.exception import ForbiddenException
+
+router = APIRouter()
+
+
+#------------------------------------- Sarpanch / Admin Endpoints ---------------------------
+
+# History of one record
+
+@router.get("/{entity_type}/{entity_id}" , response_model=AuditPage)
+
+def get_entity_history(entity_type : AuditEntityEnum , entity_id : int , cursor : Optional[str] = None ,
+                       limit : int = Query(50 , ge=1 , le=200) ,
+                       db : Session = Depends(get_db) , current_user = Depends(get_current_user)):
+    
+    """
+    SARPANCH / ADMIN ONLY — Who changed a record and what changed, newest first.
+    Works for deleted records too. Sarpanch sees the events of their own village, admin all.
+    Example: /api/audit/budget_transaction/42  ,  /api/audit/grievance/7
+    Events are written in batches --> a change shows up here within AUDIT_FLUSH_SECONDS.
+    """
+    
+    if current_user.role not in [RoleEnum.sarpanch , RoleEnum.admin]:
+        raise ForbiddenException("Access Denied")
+    
+    village_id = None if current_user.role == RoleEnum.admin else current_user.village_id
+    
+    items , next_cursor = entity_history(db , entity_type.value , entity_id , village_id , cursor , limit)
+    
+    return {"items" : items , "next_cursor" : next_cursor}
@@ -7,7 +7,10 @@ from app.models.user import User , RoleEnum
 from app.models.villages import Village
 from app.schema.user import UserCreate , UserLogin , UserResponse , AdminUserCreate , Token , UserRoleUpdate , PasswordUpdate , UpdateMe
 from app.utils.auth import hash_password , get_current_user , verify_password , create_access_token
+from app.utils.cache_bus import invalidate
 from app.utils.exception import ConflictException  , NotFoundException , UnauthorizeException , ForbiddenException ,  BadRequestException
+from app.models.audit import AuditEntityEnum
+from app.utils.audit import audit , changed
 
 
 router = APIRouter()
@@ -92,6 +95,7 @@ def update_me(
         if key in allowed_fields:
             setattr(current_user, key, value)
 
+    invalidate(db, f"principal:{current_user.id}")
     db.commit()
     db.refresh(current_user)
 
@@ -120,6 +124,7 @@ def update_password(data : PasswordUpdate , db:Session = Depends(get_db) , curre
     
     current_user.hashed_password = hash_password(new_password)
     
+    invalidate(db , f"principal:{current_user.id}")
     db.commit()
     
     return {"message" : "Password change successfully"}
@@ -196,7 +201,7 @@ def get_user(user_id : int , db:Session = Depends(get_db)  , current_user  = Dep
     
 # Update user role 
 
-@router.patch("admin/users/{user_id}/role")
+@router.patch("/admin/users/{user_id}/role")
 
 def update_user_role(
     user_id: int,
@@ -216,6 +221,8 @@ def update_user_role(
     if data.role == RoleEnum.ward_citizen and data.ward_number is None:
         raise BadRequestException("Ward number required for ward citizen")
 
+    before = {"role" : user.role , "ward_number" : user.ward_number}
+
     user.role = data.role
 
     # Only update ward_number if explicitly provided
@@ -226,6 +233,9 @@ def update_user_role(
     if data.role == RoleEnum.sarpanch:
         pass   # leave existing ward_number OR use special value
 
+    audit(db , AuditEntityEnum.user , user.id , "role_change" , actor_id=current_user.id , village_id=user.village_id ,
+          changes=changed(before , {"role" : user.role , "ward_number" : user.ward_number}))
+    invalidate(db, f"principal:{user.id}")
     db.commit()
 
     return {"message": f"Role updated to {data.role} for {user.name}"}
@@ -248,6 +258,9 @@ def delete_user(user_id : int , db:Session = Depends(get_db) , current_user = De
         raise NotFoundException('User not found')
     
     
+    audit(db , AuditEntityEnum.user , user.id , "delete" , actor_id=current_user.id , village_id=user.village_id ,
+          changes={"name" : user.name , "phone" : user.phone , "role" : user.role})
+    invalidate(db , f"principal:{user.id}")
     db.delete(user)
     db.commit()
     
@@ -1,13 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import List
 from app.database import get_db
-from app.models.budget import Budget, BudgetTransaction, CategoryEnum
+from app.models.budget import Budget, BudgetTransaction, BudgetCategoryTotal, CategoryEnum
 from app.models.user import RoleEnum
 from app.schema.budget import BudgetCreate, BudgetResponse, TransactionCreate, TransactionResponse , BudgetUpdate
 from app.utils.auth import get_current_user
 from app.utils.exception import ConflictException  , NotFoundException , UnauthorizeException , ForbiddenException ,  BadRequestException
+from app.utils.aggregates import apply_budget_transaction
+from app.utils.etag import bump_version , current_etag , etag_matches , not_modified , etag_response
+from app.models.audit import AuditEntityEnum
+from app.utils.audit import audit , changed
 
 router = APIRouter()
 
@@ -106,14 +110,22 @@ def get_transaction_category(budget_id :int , category : CategoryEnum, db : Sess
 
 @router.get("/{budget_id}/summary")
 
-def get_budget_summary(budget_id : int , db : Session = Depends(get_db)):
+def get_budget_summary(budget_id : int , request : Request , db : Session = Depends(get_db)):
     
     """
     Get full budget summary with category wise breakdown.
     Public — citizens can see full spending breakdown.
     Perfect for transparency dashboard! 
+    Supports If-None-Match --> 304 when nothing changed since the last poll.
     """
     
+    # answer 304 before running the breakdown query
+    
+    etag = current_etag(request , db , f"budget:{budget_id}")
+    
+    if etag_matches(request , etag):
+        return not_modified(request , etag)
+    
     #check budget exist 
     budget = db.query(Budget).filter(Budget.id == budget_id).first()
     
@@ -122,7 +134,7 @@ def get_budget_summary(budget_id : int , db : Session = Depends(get_db)):
     
     # categroy wise breakdown 
     
-    rows = (db.query(BudgetTransaction.category , func.sum(BudgetTransaction.category)).filter(
+    rows = (db.query(BudgetTransaction.category , func.sum(BudgetTransaction.amount)).filter(
                            BudgetTransaction.budget_id == budget_id).group_by(BudgetTransaction.category).all())   #will return category enum
     
     # intialize all category with 0 
@@ -132,20 +144,20 @@ def get_budget_summary(budget_id : int , db : Session = Depends(get_db)):
     # Fill actual totals 
     
     for category , total in rows:
-        category_breakdown[category.value] = float(total , 0)
+        category_breakdown[category.value] = float(total or 0)
         
     remaining = budget.total_allocated - budget.total_spent
     
-    spent_percentage =  ( (budget.total_spent / budget.total_allocated) * 100)
+    spent_percentage =  ( (budget.total_spent / budget.total_allocated) * 100) if budget.total_allocated else 0.0
     
-    return {
+    return etag_response(request , {
         "financial_year": budget.financial_year,
         "total_allocated": budget.total_allocated,
         "total_spent": budget.total_spent,
         "remaining": remaining,
         "spent_percentage": round(spent_percentage, 2),
         "category_breakdown": category_breakdown
-    }
+    } , etag)
     
     
 #----------------------- Sarpanch / Admin enpoints-----------------------------------
@@ -206,8 +218,14 @@ def update_budget(budget_id : int , data : BudgetUpdate ,  db : Session = Depend
     
     update_data = data.model_dump(exclude_unset=True)
     
+    before = {key : getattr(budget , key) for key in update_data}
+    
     for key , value in update_data.items():
-        setattr(Budget , key , value)
+        setattr(budget , key , value)
+    
+    audit(db , AuditEntityEnum.budget , budget.id , "update" , actor_id=current_user.id , village_id=budget.village_id ,
+          changes=changed(before , update_data))
+    bump_version(db , f"budget:{budget.id}")
         
     db.commit()
     db.refresh(budget)
@@ -219,7 +237,7 @@ def update_budget(budget_id : int , data : BudgetUpdate ,  db : Session = Depend
 
 @router.delete("/{budget_id}")
 
-def delete_budget(budget_id , db : Session = Depends(get_db) , current_user = Depends(get_current_user)):
+def delete_budget(budget_id : int , db : Session = Depends(get_db) , current_user = Depends(get_current_user)):
     
     """
     ADMIN ONLY — Delete a budget and all its transactions.
@@ -232,7 +250,7 @@ def delete_budget(budget_id , db : Session = Depends(get_db) , current_user = De
     
     # check budget 
     
-    budget = db.query(Budget).filter(Budget.id , budget_id , Budget.vilage_id == current_user.village_id).first()
+    budget = db.query(Budget).filter(Budget.id == budget_id , Budget.village_id == current_user.village_id).first()
     
     if not budget:
         raise NotFoundException("Budget not found")
@@ -240,10 +258,15 @@ def delete_budget(budget_id , db : Session = Depends(get_db) , current_user = De
     # delete transcation of budget 
     
     db.query(BudgetTransaction).filter(BudgetTransaction.budget_id == budget_id).delete()
+    db.query(BudgetCategoryTotal).filter(BudgetCategoryTotal.budget_id == budget_id).delete()
     
     
     db.delete(budget)
     
+    audit(db , AuditEntityEnum.budget , budget_id , "delete" , actor_id=current_user.id , village_id=budget.village_id ,
+          changes={"financial_year" : budget.financial_year , "total_allocated" : budget.total_allocated , "total_spent" : budget.total_spent})
+    bump_version(db , f"budget:{budget_id}")
+    
     db.commit()
     
     return {"message": f"Budget for {budget.financial_year} deleted successfully"}    
@@ -298,6 +321,16 @@ def create_budget_transaction(data : TransactionCreate , db : Session = Depends(
     
     budget.total_spent += data.amount
     
+    # keep district / state roll-ups in the same transaction
+    
+    apply_budget_transaction(db , budget , data.category , data.amount)
+    
+    db.flush()                          # transaction id for the audit event
+    audit(db , AuditEntityEnum.budget_transaction , transaction.id , "create" , actor_id=current_user.id , village_id=budget.village_id ,
+          changes={"budget_id" : budget.id , "category" : data.category , "amount" : data.amount , "description" : data.description})
+    
+    bump_version(db , f"budget:{budget.id}")
+    
     db.commit()
     db.refresh(transaction)
     
@@ -332,8 +365,14 @@ def delete_transaction(transaction_id : int ,  db : Session = Depends(get_db) ,
     budget = db.query(Budget).filter(Budget.id == transaction.budget_id).first()
     
     if budget:
-        budget.total_allocated -= transaction.amount
-    
+        budget.total_spent -= transaction.amount
+        apply_budget_transaction(db , budget , transaction.category , -transaction.amount , count=-1)
+        bump_version(db , f"budget:{budget.id}")
+    
+    audit(db , AuditEntityEnum.budget_transaction , transaction.id , "delete" , actor_id=current_user.id ,
+          village_id=budget.village_id if budget else None ,
+          changes={"budget_id" : transaction.budget_id , "category" : transaction.category , "amount" : transaction.amount ,
+                   "description" : transaction.description})
     db.delete(transaction)
     db.commit()
     
@@ -1,12 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Request
 from sqlalchemy.orm import Session
 from typing import List
+from pathlib import Path
 from app.database import get_db
 from app.models.document import Document, DocumentTypeEnum
 from app.models.user import RoleEnum
 from app.schema.document import DocumentResponse , DocumentUpdate
 from app.utils.auth import get_current_user
-from app.utils.file_uploads import save_locally_documents
+from app.utils.file_uploads import spool_upload , discard_file , FileTooLarge , DOCUMENT_TYPES
+from app.utils.blobs import acquire_blob , release_blob
+from app.config import settings
+from app.utils.etag import bump_version , current_etag , etag_matches , not_modified , etag_response
+from app.utils.cache_bus import invalidate
+from app.utils.downloads import download_info , download_response , DownloadInfo
+from app.utils.file_uploads import preview_key
+from app.utils.previews import previews
+from app.models.search import SearchEntityEnum
+from app.utils.search import index_document , remove_entry
+from app.models.audit import AuditEntityEnum
+from app.utils.audit import audit
 
 
 router = APIRouter()
@@ -17,17 +29,23 @@ router = APIRouter()
 
 @router.get("/" , response_model=List[DocumentResponse])
 
-def get_all_documents(village_id : int  ,  db : Session = Depends(get_db)):
+def get_all_documents(village_id : int  , request : Request ,  db : Session = Depends(get_db)):
     
     """
     Get all documents of a village.
     Public — any citizen can view and download.
+    Supports If-None-Match --> 304 when no document changed since the last poll.
     Example: /api/documents/?village_id=1
     """
     
+    etag = current_etag(request , db , f"documents:{village_id}")
+    
+    if etag_matches(request , etag):
+        return not_modified(request , etag)
+    
     documents = db.query(Document).filter(Document.village_id == village_id).order_by(Document.created_at.desc()).all()
     
-    return documents
+    return etag_response(request , [DocumentResponse.model_validate(d) for d in documents] , etag)
 
 # Get document by types 
 
@@ -60,6 +78,49 @@ def get_document(document_id : int , db:Session = Depends(get_db)):
 
 
 
+# Download the file of a document
+
+@router.api_route("/{document_id}/download" , methods=["GET" , "HEAD"])
+
+def download_document(document_id : int , request : Request , db : Session = Depends(get_db)):
+    
+    """
+    Download the file of a document.
+    Public — any citizen can download.
+    Strong ETag (content hash) + long Cache-Control --> repeat downloads answered with 304 from memory,
+    Range requests --> resume a large PDF after a dropped connection.
+    Example: /api/documents/4/download
+    """
+    
+    info = download_info(db , document_id)
+    
+    if info is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    
+    return download_response(request , info)
+
+
+
+# Preview image of a document (page 1 of a PDF / scaled down photo)
+
+@router.get("/{document_id}/preview")
+
+def get_document_preview(document_id : int , request : Request , db : Session = Depends(get_db)):
+    
+    """
+    Small WebP preview of a document, generated in the background after upload.
+    Public — use preview_url from the document list; 404 until the preview is ready.
+    """
+    
+    info = download_info(db , document_id)
+    
+    if info is None or not info.preview_ready:
+        raise HTTPException(status_code=404, detail="Preview not available")
+    
+    return download_response(request , DownloadInfo(key=preview_key(info.content_hash) , etag=f'"{info.content_hash}-preview"' ,
+                                                    filename=f"{Path(info.filename).stem}.webp" , media_type="image/webp"))
+
+
 #------------------------------------------- Admin endpoints------------------------------
 
 
@@ -70,50 +131,61 @@ def get_document(document_id : int , db:Session = Depends(get_db)):
 
 
 @router.post("/upload", response_model=DocumentResponse, status_code=201)
-async def upload_document_file(
+def upload_document_file(
     title: str = Form(...),
     doc_type: DocumentTypeEnum = Form(...),
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user)
 ):
+    """
+    SARPANCH / ADMIN ONLY — Upload a document (max DOCUMENT_MAX_BYTES).
+    Sync route --> runs in the threadpool, the file is copied in chunks without blocking the event loop.
+    Stored by content hash: re-uploading the same file adds a Document row, not a second copy.
+    """
     if current_user.role not in [RoleEnum.sarpanch, RoleEnum.admin]:
         raise HTTPException(status_code=403, detail="Only Sarpanch can upload documents")
 
-    allowed_types = [
-        "application/pdf",
-        "application/msword",
-        "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-        "application/vnd.ms-excel",
-        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        "image/jpeg",
-        "image/png"
-    ]
-
-    if file.content_type not in allowed_types:
+    if file.content_type not in DOCUMENT_TYPES:
         raise HTTPException(status_code=400, detail="Invalid file type")
 
-    content = await file.read()
-    if len(content) > 10 * 1024 * 1024:
-        raise HTTPException(status_code=400, detail="File too large")
-
-    await file.seek(0)
-
-   
-    file_path = save_locally_documents(file)
-
-    document = Document(
-        village_id=current_user.village_id,
-        title=title,
-        file_url=file_path,   # store local path
-        type=doc_type,
-        uploaded_by=current_user.id
-    )
+    # size known from the multipart parser --> reject before copying anything
+    if file.size is not None and file.size > settings.DOCUMENT_MAX_BYTES:
+        raise HTTPException(status_code=413, detail="File too large")
+
+    try:
+        stored = spool_upload(file , max_bytes=settings.DOCUMENT_MAX_BYTES)
+    except FileTooLarge:
+        raise HTTPException(status_code=413, detail="File too large")
+
+    try:
+        file_path = acquire_blob(db , stored , file.content_type)
+
+        document = Document(
+            village_id=current_user.village_id,
+            title=title,
+            file_url=file_path,   # local path / s3:// location (shared by documents with the same content)
+            type=doc_type,
+            uploaded_by=current_user.id,
+            content_hash=stored.sha256
+        )
+
+        db.add(document)
+        db.flush()
+        index_document(db , document)          # file text added once extracted (preview pipeline)
+        bump_version(db , f"documents:{current_user.village_id}")
+        invalidate(db , f"document:{document.id}")      # a download tried before the id existed
+        db.commit()
+
+    except Exception:
+        discard_file(stored.path)
+        raise
 
-    db.add(document)
-    db.commit()
     db.refresh(document)
 
+    # thumbnail / page 1 preview + text for search, extracted in the background (once per content)
+    previews.submit(stored.sha256)
+
     return document
 
 # Update details of document 
@@ -138,7 +210,11 @@ def update_document(document_id : int , data : DocumentUpdate, db : Session = De
     update_data = data.model_dump(exclude_unset=True)
     
     for key , value in update_data.items():
-        setattr(Document , key , value)
+        setattr(document , key , value)
+    
+    index_document(db , document)
+    bump_version(db , f"documents:{document.village_id}")
+    invalidate(db , f"document:{document.id}")           # download file name follows the title
         
     db.commit()
     db.refresh(document)
@@ -156,7 +232,8 @@ def delete_document(
 ):
     """
     SARPANCH / ADMIN ONLY — Delete a document.
-    Deletes from Cloudinary AND from DB.
+    Drops its reference on the stored file; the file is removed by the blob GC sweep
+    once no document points at it.
     """
     if current_user.role not in [RoleEnum.sarpanch, RoleEnum.admin]:
         raise HTTPException(status_code=403, detail="Only Sarpanch can delete documents")
@@ -172,6 +249,12 @@ def delete_document(
    
     # Delete from DB
     db.delete(document)
+    release_blob(db , document.content_hash)
+    remove_entry(db , SearchEntityEnum.document , document.id)
+    bump_version(db , f"documents:{document.village_id}")
+    invalidate(db , f"document:{document.id}")
+    audit(db , AuditEntityEnum.document , document.id , "delete" , actor_id=current_user.id , village_id=document.village_id ,
+          changes={"title" : document.title , "type" : document.type , "content_hash" : document.content_hash})
     db.commit()
     return {"message": f"Document '{document.title}' deleted successfully ✅"} 
 
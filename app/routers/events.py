@@ -0,0 +1,136 @@
+import asyncio
+from fastapi import APIRouter , Request , Query , WebSocket , WebSocketDisconnect , HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
+from app.config import settings
+from app.database import SessionLocal
+from app.utils.auth import get_user_from_token
+from app.utils.exception import UnauthorizeException
+from app.utils.pubsub import hub , village_channel , user_channel
+
+router = APIRouter()
+
+
+#------------------------------- Helpers -------------------------------
+
+def _load_channels(token : str) -> list:
+
+    # short lived session --> a long stream must not hold a pooled connection (no Depends(get_db) here)
+
+    db = SessionLocal()
+
+    try:
+        user = get_user_from_token(token , db)
+        return [village_channel(user.village_id) , user_channel(user.id)]
+
+    finally:
+        db.close()
+
+
+def _bearer(request : Request , token : Optional[str]) -> str:
+
+    # EventSource cannot set headers --> ?token= is accepted as well as Authorization: Bearer
+
+    header = request.headers.get("Authorization" , "")
+
+    if header.startswith("Bearer "):
+        return header.split(" ")[1]
+
+    if token:
+        return token
+
+    raise UnauthorizeException("Not authenticated")
+
+
+async def _sse_stream(subscription):
+
+    try:
+        yield "retry: 3000\n\n"
+
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.get() , timeout=settings.EVENTS_KEEPALIVE_SECONDS)
+
+            except asyncio.TimeoutError:
+                # comment line keeps proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+                continue
+
+            if message is None:
+                yield "event: dropped\ndata: {}\n\n"
+                return
+
+            yield message
+
+    finally:
+        hub.unsubscribe(subscription)
+
+
+#------------------------------- Event streams -------------------------------
+
+# Server-Sent Events
+
+@router.get("/stream")
+
+async def stream_events(request : Request , token : Optional[str] = Query(None)):
+
+    """
+    Live announcements of your village and replies to your grievances, as Server-Sent Events.
+    Events: announcement.created / grievance.updated — data is JSON.
+    Example (browser): new EventSource("/api/events/stream?token=<jwt>")
+    A client that falls too far behind receives a 'dropped' event and should reconnect.
+    """
+
+    channels = await run_in_threadpool(_load_channels , _bearer(request , token))
+
+    subscription = hub.subscribe(channels)
+
+    return StreamingResponse(_sse_stream(subscription) , media_type="text/event-stream",
+                             headers={"Cache-Control" : "no-cache" , "X-Accel-Buffering" : "no"})
+
+
+# WebSocket
+
+@router.websocket("/ws")
+
+async def websocket_events(websocket : WebSocket , token : str = Query(...)):
+
+    """
+    Same events over a WebSocket, one text frame per event (SSE formatted).
+    Example: ws://host/api/events/ws?token=<jwt>
+    Closed with code 1013 when the client falls too far behind.
+    """
+
+    try:
+        channels = await run_in_threadpool(_load_channels , token)
+
+    except HTTPException:
+        await websocket.close(code=1008)
+        return
+
+    await websocket.accept()
+
+    subscription = hub.subscribe(channels)
+
+    async def forward():
+        while True:
+            message = await subscription.get()
+            if message is None:
+                await websocket.close(code=1013)
+                return
+            await websocket.send_text(message)
+
+    sender = asyncio.create_task(forward())
+
+    try:
+        # client messages are ignored, the loop only waits for the disconnect
+        while True:
+            await websocket.receive_text()
+
+    except WebSocketDisconnect:
+        pass
+
+    finally:
+        sender.cancel()
+        hub.unsubscribe(subscription)
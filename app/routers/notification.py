@@ -0,0 +1,51 @@
+from fastapi import APIRouter , Depends
+from sqlalchemy.orm import Session
+from typing import List
+from app.database import get_db
+from app.models.notification import NotificationJob
+from app.models.user import RoleEnum
+from app.schema.notification import NotificationJobResponse
+from app.utils.auth import get_current_user
+from app.utils.exception import NotFoundException , ForbiddenException
+
+router = APIRouter()
+
+
+#---------------------------------- Sarpanch Endpoints ------------------------------------
+
+# Notification jobs of my village
+
+@router.get("/jobs" , response_model=List[NotificationJobResponse])
+
+def get_notification_jobs(limit : int = 50 , db : Session = Depends(get_db) , current_user = Depends(get_current_user)):
+    
+    """
+    SARPANCH / ADMIN ONLY — Latest SMS fan-out jobs of the village, newest first.
+    """
+    
+    if current_user.role not in [RoleEnum.sarpanch , RoleEnum.admin]:
+        raise ForbiddenException("Access Denied")
+    
+    return (db.query(NotificationJob).filter(NotificationJob.village_id == current_user.village_id)
+              .order_by(NotificationJob.id.desc()).limit(min(limit , 200)).all())
+
+
+# One job --> sent / failed counts so far
+
+@router.get("/jobs/{job_id}" , response_model=NotificationJobResponse)
+
+def get_notification_job(job_id : int , db : Session = Depends(get_db) , current_user = Depends(get_current_user)):
+    
+    """
+    SARPANCH / ADMIN ONLY — Progress of one SMS fan-out job.
+    """
+    
+    if current_user.role not in [RoleEnum.sarpanch , RoleEnum.admin]:
+        raise ForbiddenException("Access Denied")
+    
+    job = db.query(NotificationJob).filter(NotificationJob.id == job_id , NotificationJob.village_id == current_user.village_id).first()
+    
+    if not job:
+        raise NotFoundException("Notification job not found")
+    
+    return job
@@ -1,73 +1,139 @@
-from fastapi import HTTPException , APIRouter , Depends , UploadFile , File 
+from fastapi import HTTPException , APIRouter , Depends , UploadFile , File , Form , Request , Query
+from fastapi.responses import RedirectResponse
+from sqlalchemy import func , case
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List , Optional
+from datetime import datetime , timezone
+from app.config import settings
 from app.database import get_db
-from app.models.project import Project , ProjectStatusEnum
+from app.models.project import Project , ProjectStatusEnum , ProjectPhoto , ProjectPhotoStatusEnum
 from app.models.user import RoleEnum
-from app.schema.project import ProjectCreate  , ProjectUpdate , ProjectResponse
+from app.schema.project import ProjectCreate  , ProjectUpdate , ProjectResponse , ProjectDetailResponse , ProjectPhotoResponse , ProjectPhotoOrder , ProjectPage , ProjectSortEnum
 from app.utils.auth import get_current_user
+from app.utils.cache_bus import invalidate
 from app.utils.exception import ConflictException  , NotFoundException , UnauthorizeException , ForbiddenException ,  BadRequestException
+from app.models.search import SearchEntityEnum
+from app.utils.search import index_project , remove_entry
+from app.utils.file_uploads import spool_upload , discard_file , FileTooLarge
+from app.utils.storage import get_storage , run , delete_on_rollback
+from app.utils.downloads import download_response , DownloadInfo
+from app.utils.photos import photos , photo_key , photo_keys , delete_photo_files , refresh_cover
+from app.utils.project_listing import project_filters , list_projects
+from app.utils.aggregates import apply_project_stats
+from app.models.audit import AuditEntityEnum
+from app.utils.audit import audit
+
+PHOTO_TYPES = {"image/jpeg" : ".jpg" , "image/png" : ".png" , "image/webp" : ".webp"}
 
 router = APIRouter()
 
 
+def _track_completion(project : Project):
+    
+    # completed_at follows the status --> completion latency in the ward stats
+    
+    if project.status == ProjectStatusEnum.completed:
+        project.completed_at = project.completed_at or datetime.now(timezone.utc)
+    else:
+        project.completed_at = None
+
+
 #----------------------------- Public Endpoints-----------------------
 
 
-# Get all projects 
+# List projects 
 
-@router.get("/projects" , response_model = List[ProjectResponse])
+@router.get("/" , response_model=ProjectPage)
 
-def get_all_projects(village_id : int ,db: Session = Depends(get_db)):
+def list_village_projects(village_id : int ,
+                          ward_number : Optional[List[int]] = Query(None) ,
+                          status : Optional[List[ProjectStatusEnum]] = Query(None) ,
+                          category : Optional[str] = None ,
+                          min_cost : Optional[float] = Query(None , ge=0) ,
+                          max_cost : Optional[float] = Query(None , ge=0) ,
+                          start_from : Optional[datetime] = None ,
+                          start_to : Optional[datetime] = None ,
+                          sort : ProjectSortEnum = ProjectSortEnum.newest ,
+                          cursor : Optional[str] = None ,
+                          limit : int = Query(20 , ge=1 , le=100) ,
+                          db: Session = Depends(get_db)):
     
     """
-    
-    Get all projects of a village.
+    Projects of a village, any combination of filters, one page at a time.
     Public --> citizens can see all projects.
-    Filter by village_id as query param.
-    Example: /api/projects/?village_id=1
+    Example: /api/projects/?village_id=1&ward_number=3&status=planned&status=ongoing&category=road&min_cost=50000&sort=cost_high
+    ward_number / status can be repeated (any of them). start_from / start_to filter on start_date.
+    Pass next_cursor back as ?cursor= (same filters and sort) to get the next page.
+    An empty page is not an error.
     """
     
-    projects = db.query(Project).filter(Project.village_id == village_id).order_by(Project.created_at.desc()).all()
+    conditions = project_filters(village_id , ward_number , status , category , min_cost , max_cost , start_from , start_to)
     
-    if not projects:
-        raise NotFoundException("NO Projects Found")
+    items , next_cursor = list_projects(db , conditions , sort.value , cursor , limit)
     
-    return projects 
+    return {"items" : items , "next_cursor" : next_cursor}
 
-# Get Project status 
 
+# Get project by project_id 
 
-@router.get("/status{status}" , response_model=ProjectResponse)
+@router.get("/{project_id}" , response_model=ProjectDetailResponse)
 
-def get_project_status(status : ProjectStatusEnum , village_id : int , db: Session = Depends(get_db)):
+def get_project(project_id : int , db:Session = Depends(get_db)):
     
     """
-    Get projects filtered by status.
-    Example: /api/projects/status/ongoing?village_id=1
-    Returns: planned / ongoing / completed / cancelled projects
+    Get single project detail by ID, with its photos (in display order)
+    Public --> Any one view
     """
     
-    projects = db.query(Project).filter(Project.village_id == village_id , Project.status == status).all()
+    project = db.query(Project).filter(Project.id == project_id).first()
+    
+    if not project:
+        raise NotFoundException("Project not found")
     
-    return projects
+    return project
 
 
-# Get project by project_id 
+# Photos of a project
 
-@router.get("/{project_id}" , response_model=ProjectResponse)
+@router.get("/{project_id}/photos" , response_model=List[ProjectPhotoResponse])
 
-def get_project(project_id : int , db:Session = Depends(get_db)):
+def get_project_photos(project_id : int , db:Session = Depends(get_db)):
     
     """
-    Get single project detail by ID
+    Photos of a project in display order, with the URL of each rendition once rendered.
     Public --> Any one view
     """
     
-    project = db.query(Project).filter(Project.id == project_id).first()
+    return (db.query(ProjectPhoto).filter(ProjectPhoto.project_id == project_id)
+              .order_by(ProjectPhoto.position , ProjectPhoto.id).all())
+
+
+# Photo file (thumb / medium / large)
+
+@router.get("/photos/{photo_id}/{rendition}")
+
+def get_project_photo_file(photo_id : int , rendition : str , request : Request , db:Session = Depends(get_db)):
     
-    if not project:
-        raise NotFoundException("Project not found")
+    """
+    One rendition of a project photo (WebP), see PROJECT_PHOTO_RENDITIONS.
+    Public — use the urls of a photo / cover_thumbnail_url; 404 until the photo is rendered.
+    """
+    
+    photo = db.query(ProjectPhoto.project_id , ProjectPhoto.status , ProjectPhoto.external_url).filter(ProjectPhoto.id == photo_id).first()
+    
+    if not photo:
+        raise NotFoundException("Photo not found")
+    
+    # added before uploads existed --> only the original, hosted elsewhere
+    if photo.external_url:
+        return RedirectResponse(photo.external_url , status_code=307)
+    
+    if rendition not in settings.PROJECT_PHOTO_RENDITIONS or photo.status != ProjectPhotoStatusEnum.ready:
+        raise NotFoundException("Photo not available")
+    
+    # renditions never change once rendered (a new photo gets a new id) --> immutable
+    return download_response(request , DownloadInfo(key=photo_key(photo.project_id , photo_id , rendition) , etag=f'"photo-{photo_id}-{rendition}"' ,
+                                                    filename=f"project-{photo.project_id}-{photo_id}-{rendition}.webp" , media_type="image/webp"))
     
     
 #---------------------------------- Sarpanch / Head / Ward Member  Endpoints-------------------------
@@ -97,14 +163,17 @@ def create_project(data : ProjectCreate , db:Session = Depends(get_db) , current
                       category = data.category,
                       ward_number = data.ward_number,
                       estimated_cost = data.estimated_cost,
-                      start_data = data.start_date,
+                      start_date = data.start_date,
                       end_date = data.end_date,
                       created_by = current_user.id,
-                      village_id = current_user.village_id,
-                      photos = []                               # Empty list of photos intially
+                      village_id = current_user.village_id
                       )    
     
     db.add(project)
+    db.flush()
+    index_project(db , project)
+    apply_project_stats(db , project)
+    invalidate(db , f"projects:{project.village_id}")
     db.commit()
     db.refresh(project)
     
@@ -124,7 +193,8 @@ def update_project(project_id : int , data : ProjectUpdate , db:Session = Depend
     if current_user.role not in [RoleEnum.sarpanch , RoleEnum.admin , RoleEnum.ward_citizen]:
         raise ForbiddenException("Acess Denied")
     
-    project = db.query(Project).filter(Project.id == project_id).first()
+    # Row lock: a concurrent edit must not move this project's ward stats out twice
+    project = db.query(Project).filter(Project.id == project_id).with_for_update().first()
     
     if not project:
         raise NotFoundException("Project Not found")
@@ -136,9 +206,15 @@ def update_project(project_id : int , data : ProjectUpdate , db:Session = Depend
         if project.ward_number != current_user.ward_number:
             raise ForbiddenException("Ward member can only update project of their own wards")
     
+    apply_project_stats(db , project , -1)          # old ward / status / costs out, new ones in below
+    
     for key , value in data.model_dump(exclude_unset=True).items():
         setattr(project , key , value)
-        
+    
+    _track_completion(project)
+    apply_project_stats(db , project)
+    index_project(db , project)
+    invalidate(db , f"projects:{project.village_id}")
     db.commit()
     db.refresh(project)
     
@@ -160,7 +236,7 @@ def update_project_status(project_id : int , payload : ProjectUpdate , db:Sessio
     if current_user.role not in [RoleEnum.sarpanch , RoleEnum.admin , RoleEnum.ward_citizen]:
         raise ForbiddenException("Access Denied")
     
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = db.query(Project).filter(Project.id == project_id).with_for_update().first()
     
     if not project:
         raise NotFoundException("Project not found")
@@ -172,8 +248,13 @@ def update_project_status(project_id : int , payload : ProjectUpdate , db:Sessio
     
     # update status 
     
+    apply_project_stats(db , project , -1)
+    
     project.status = payload.status
     
+    _track_completion(project)
+    apply_project_stats(db , project)
+    invalidate(db , f"projects:{project.village_id}")
     db.commit()
     db.refresh(project)
     
@@ -182,7 +263,7 @@ def update_project_status(project_id : int , payload : ProjectUpdate , db:Sessio
 
 # Delete Project
 
-@router.delete("/{project_id}" , response_model=ProjectResponse)
+@router.delete("/{project_id}")
     
 def delete_project(project_id : int , db:Session = Depends(get_db) , current_user = Depends(get_current_user)):
     
@@ -194,22 +275,172 @@ def delete_project(project_id : int , db:Session = Depends(get_db) , current_use
         raise ForbiddenException("Access Denied")
     
     
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = db.query(Project).filter(Project.id == project_id).with_for_update().first()
     
     if not project:
         raise NotFoundException("Project not found")
     
-    db.delete(project)
+    keys = [key for photo in project.photos for key in photo_keys(photo)]
+    
+    invalidate(db , f"projects:{project.village_id}")
+    remove_entry(db , SearchEntityEnum.project , project.id)
+    apply_project_stats(db , project , -1)
+    audit(db , AuditEntityEnum.project , project.id , "delete" , actor_id=current_user.id , village_id=project.village_id ,
+          changes={"title" : project.title , "ward_number" : project.ward_number , "status" : project.status ,
+                   "estimated_cost" : project.estimated_cost , "actual_cost" : project.actual_cost})
+    db.delete(project)                  # photo rows go with it
     db.commit()
     
+    delete_photo_files(keys)
+    
     return {
         "success": True,
         "message": f"Project '{project.title}' deleted successfully"
     }
+
+
+#---------------------------------- Project Photos -------------------------
+
+def _editable_project(db : Session , project_id : int , current_user) -> Project:
+    
+    # sarpanch / admin --> projects of their village , ward member --> projects of their own ward
+    
+    if current_user.role not in [RoleEnum.sarpanch , RoleEnum.admin , RoleEnum.ward_citizen]:
+        raise ForbiddenException("Access Denied")
+    
+    project = db.query(Project).filter(Project.id == project_id).first()
+    
+    if not project or (current_user.role != RoleEnum.admin and project.village_id != current_user.village_id):
+        raise NotFoundException("Project not found")
+    
+    if current_user.role == RoleEnum.ward_citizen and project.ward_number != current_user.ward_number:
+        raise ForbiddenException("Ward member can only update project of their own wards")
     
+    return project
+
+
+# Upload photo
+
+@router.post("/{project_id}/photos" , response_model=ProjectPhotoResponse , status_code=202)
+
+def upload_project_photo(project_id : int , file : UploadFile = File(...) , caption : Optional[str] = Form(None) ,
+                         db:Session = Depends(get_db) , current_user = Depends(get_current_user)):
+    
+    """
+    Add a photo to a project (JPEG / PNG / WebP, max PROJECT_PHOTO_MAX_BYTES).
+    Allowed -> sarpanch , admin , ward(own wards)
+    Sync route --> the file is copied in chunks in the threadpool. The original is stored as is,
+    thumb / medium / large renditions are rendered in the background: 202, status pending,
+    urls appear once the photo is ready. Added at the end of the gallery.
+    """
+    
+    project = _editable_project(db , project_id , current_user)
+    
+    ext = PHOTO_TYPES.get(file.content_type)
+    
+    if ext is None:
+        raise BadRequestException("Only JPEG , PNG or WebP photos allowed")
+    
+    if file.size is not None and file.size > settings.PROJECT_PHOTO_MAX_BYTES:
+        raise HTTPException(status_code=413 , detail="File too large")
     
+    try:
+        stored = spool_upload(file , max_bytes=settings.PROJECT_PHOTO_MAX_BYTES)
+    except FileTooLarge:
+        raise HTTPException(status_code=413 , detail="File too large")
     
+    try:
+        position = db.query(func.coalesce(func.max(ProjectPhoto.position) , -1) + 1).filter(ProjectPhoto.project_id == project.id).scalar()
+        
+        photo = ProjectPhoto(project_id = project.id,
+                             position = position,
+                             caption = caption,
+                             size = stored.size,
+                             status = ProjectPhotoStatusEnum.pending,
+                             uploaded_by = current_user.id)
+        
+        db.add(photo)
+        db.flush()                                  # id --> storage key
+        
+        photo.original_key = photo_key(project.id , photo.id , "original" , ext)
+        run(get_storage().put_file(photo.original_key , stored.path , file.content_type))
+        delete_on_rollback(db , photo.original_key)
+        
+        db.commit()
+        
+    except Exception:
+        discard_file(stored.path)
+        raise
     
+    db.refresh(photo)
     
+    photos.submit(photo.id)
     
-    
\ No newline at end of file
+    return photo
+
+
+# Reorder photos
+
+@router.patch("/{project_id}/photos/order" , response_model=List[ProjectPhotoResponse])
+
+def reorder_project_photos(project_id : int , data : ProjectPhotoOrder , db:Session = Depends(get_db) , current_user = Depends(get_current_user)):
+    
+    """
+    Set the display order of a project's photos, the first ready one becomes the cover.
+    Photos left out of photo_ids keep their place after the listed ones.
+    Allowed -> sarpanch , admin , ward(own wards)
+    """
+    
+    project = _editable_project(db , project_id , current_user)
+    
+    ids = list(dict.fromkeys(data.photo_ids))
+    
+    if ids:
+        # one UPDATE for the whole gallery
+        listed = {photo_id : position for position , photo_id in enumerate(ids)}
+        db.query(ProjectPhoto).filter(ProjectPhoto.project_id == project.id).update({
+            ProjectPhoto.position : case(listed , value=ProjectPhoto.id , else_=ProjectPhoto.position + len(ids)),
+        } , synchronize_session=False)
+    
+    refresh_cover(db , project.id)
+    invalidate(db , f"projects:{project.village_id}")
+    db.commit()
+    
+    return (db.query(ProjectPhoto).filter(ProjectPhoto.project_id == project.id)
+              .order_by(ProjectPhoto.position , ProjectPhoto.id).all())
+
+
+# Delete photo
+
+@router.delete("/photos/{photo_id}")
+
+def delete_project_photo(photo_id : int , db:Session = Depends(get_db) , current_user = Depends(get_current_user)):
+    
+    """
+    Remove a photo and its stored files, the cover moves to the next ready photo.
+    Allowed -> sarpanch , admin , ward(own wards)
+    """
+    
+    photo = db.query(ProjectPhoto).filter(ProjectPhoto.id == photo_id).first()
+    
+    if not photo:
+        raise NotFoundException("Photo not found")
+    
+    project = _editable_project(db , photo.project_id , current_user)
+    
+    keys = photo_keys(photo)
+    
+    db.delete(photo)
+    db.flush()
+    refresh_cover(db , project.id)
+    audit(db , AuditEntityEnum.project_photo , photo.id , "delete" , actor_id=current_user.id , village_id=project.village_id ,
+          changes={"project_id" : project.id , "caption" : photo.caption})
+    invalidate(db , f"projects:{project.village_id}")
+    db.commit()
+    
+    delete_photo_files(keys)
+    
+    return {
+        "success": True,
+        "message": "Photo deleted successfully"
+    }
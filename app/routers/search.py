@@ -0,0 +1,30 @@
+from fastapi import APIRouter , Depends , Query
+from sqlalchemy.orm import Session
+from typing import List , Optional
+from app.database import get_db
+from app.models.search import SearchEntityEnum
+from app.schema.search import SearchPage
+from app.utils.search import search_entries
+
+router = APIRouter()
+
+
+#------------------------------------- Public Endpoints---------------------------
+
+# Search documents, announcements and projects of a village
+
+@router.get("/" , response_model=SearchPage)
+
+def search(village_id : int , q : str = Query(... , min_length=2) , type : Optional[List[SearchEntityEnum]] = Query(None) ,
+           cursor : Optional[str] = None , limit : int = Query(20 , ge=1 , le=100) , db : Session = Depends(get_db)):
+    
+    """
+    Ranked full text search across notices, meeting minutes (text inside PDF / Word files) and projects.
+    Public — same data as the village's public lists.
+    Example: /api/search/?village_id=1&q=MGNREGA  ,  /api/search/?village_id=1&q=road&type=project&type=document
+    Pass next_cursor back as ?cursor= to get the next page.
+    """
+    
+    items , next_cursor = search_entries(db , village_id , q , type , cursor , limit)
+    
+    return {"items" : items , "next_cursor" : next_cursor}
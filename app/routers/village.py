@@ -6,6 +6,9 @@ from typing import List
 from app.models.user import RoleEnum
 from app.models.villages import Village
 from app.database import get_db
+from app.utils.cache_bus import invalidate
+from app.models.audit import AuditEntityEnum
+from app.utils.audit import audit
 from app.utils.exception import ConflictException  , NotFoundException , UnauthorizeException , ForbiddenException ,  BadRequestException
 
 router = APIRouter()
@@ -74,7 +77,7 @@ def create_village(data : VillageCreate , db : Session = Depends(get_db) , curre
 
 # update village detail 
 
-@router.patch("{village_id}" , response_model=VillageResponse)
+@router.patch("/{village_id}" , response_model=VillageResponse)
 
 def update_village(village_id : int  , data : VillageUpdate , current_user = Depends(get_current_user) , db:Session = Depends(get_db)):
     
@@ -92,7 +95,8 @@ def update_village(village_id : int  , data : VillageUpdate , current_user = Dep
     
     for key , value in data.model_dump(exclude_unset=True).items():
         setattr(village , key , value)
-        
+    
+    invalidate(db , f"villages:{village.id}")
     db.commit()
     db.refresh(village)
     
@@ -102,7 +106,7 @@ def update_village(village_id : int  , data : VillageUpdate , current_user = Dep
 
 # Delete village by id 
 
-@router.delete("{village_id}")
+@router.delete("/{village_id}")
 
 def delete_village(village_id : int , db:Session = Depends(get_db), current_user = Depends(get_current_user)):
     
@@ -116,6 +120,9 @@ def delete_village(village_id : int , db:Session = Depends(get_db), current_user
     if not village:
         raise NotFoundException("Village not found")
     
+    invalidate(db , f"villages:{village.id}")
+    audit(db , AuditEntityEnum.village , village.id , "delete" , actor_id=current_user.id , village_id=village.id ,
+          changes={"name" : village.name , "district" : village.district , "state" : village.state})
     db.delete(village)
     db.commit()
     
@@ -1,21 +1,65 @@
-from pydantic import BaseModel
-from typing import Optional
-from datetime import datetime
+from pydantic import BaseModel , field_validator , model_validator
+from typing import Optional , List
+from datetime import datetime , timezone
 from app.models.announcement import AnnouncementTypeEnum
 
 
+def to_utc(value : Optional[datetime]) -> Optional[datetime]:
+    
+    # schedule times are stored in UTC; a time without offset is taken as UTC
+    
+    if value is None:
+        return None
+    
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    
+    return value.astimezone(timezone.utc)
+
+
 # When Head/Sarpanch of village wants to publish  announcement of event
 
 class AnnouncementCreate(BaseModel):
     title: str
     content: str
     type: AnnouncementTypeEnum = AnnouncementTypeEnum.general
+    publish_at: Optional[datetime] = None     # Not required -- publish later, e.g. 2025-03-01T09:00:00+05:30
+    expires_at: Optional[datetime] = None     # Not required -- hide after this time
+    
+    @field_validator("publish_at" , "expires_at")
+    def normalize_time(cls , v):
+        return to_utc(v)
+    
+    # Expiry must come after publishing
+    @model_validator(mode="after")
+    def expires_after_publish(self):
+        if self.expires_at and self.expires_at <= (self.publish_at or datetime.now(timezone.utc)):
+            raise ValueError("expires_at must be after publish_at")
+        return self
+
+
+# When admin posts the same announcement to every village of a state / district
+
+class AnnouncementBroadcast(AnnouncementCreate):
+    state: str                                # Required -- Bihar
+    district: Optional[str] = None            # Not required -- Patna, whole state if missing
+
+
+class AnnouncementBroadcastResult(BaseModel):
+    villages: int                             # number of villages reached
+    announcement_ids: List[int]
 
  
 class AnnouncementUpdate(BaseModel):
     title: Optional[str] = None
     content: Optional[str] = None
     type: Optional[AnnouncementTypeEnum] = None
+    publish_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+    
+    @field_validator("publish_at" , "expires_at")
+    def normalize_time(cls , v):
+        return to_utc(v)
 
 
 # What we send back 
@@ -28,6 +72,8 @@ class AnnouncementResponse(BaseModel):
     type: AnnouncementTypeEnum
     published_by: int
     created_at: datetime
+    publish_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
\ No newline at end of file
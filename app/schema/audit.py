@@ -0,0 +1,26 @@
+from pydantic import BaseModel
+from typing import List , Optional , Any
+from datetime import datetime
+
+
+# One recorded change
+
+class AuditEventResponse(BaseModel):
+    id: int
+    entity_type: str                     # budget / budget_transaction / grievance / user / project ...
+    entity_id: int
+    action: str                          # create / update / delete / reply / role_change ...
+    actor_id: Optional[int]              # user who made the change
+    village_id: Optional[int]
+    changes: Optional[Any]               # {"status": ["open", "resolved"]} , {"amount": 25000.0}
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+# History of one record, newest first
+
+class AuditPage(BaseModel):
+    items: List[AuditEventResponse]
+    next_cursor: Optional[str] = None    # pass back as ?cursor= for the next page, null on last page
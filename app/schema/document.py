@@ -15,6 +15,8 @@ class DocumentResponse(BaseModel):
     type : DocumentTypeEnum
     uploaded_by : int      
     created_at   : datetime
+    content_hash : Optional[str] = None    # SHA-256 of the file, same for identical uploads
+    preview_url : Optional[str] = None     # WebP preview, null until generated (or for Word / Excel files)
     
     class Config:
         from_attributes = True
@@ -21,6 +21,26 @@ class GrievanceReply(BaseModel):
     status         : GrievanceStatusEnum # Required -- Resolved  / In_progress / Rejected
     
     
+# When Sarpanch replies to many grievances at once (e.g. after repairing a transformer)
+
+class GrievanceBulkReply(BaseModel):
+    grievance_ids  : List[int] = Field(... , min_length=1 , max_length=500)
+    sarpanch_reply : str                 # Required -- Transformer replaced
+    status         : GrievanceStatusEnum # Required -- in_progress / resolved / rejected
+    
+    
+class GrievanceBulkResult(BaseModel):
+    updated : int                        # number of grievances changed
+    status : GrievanceStatusEnum
+    grievance_ids : List[int]
+    
+    
+# When Sarpanch changes queue priority 
+
+class GrievancePriorityUpdate(BaseModel):
+    priority : int                   # Required -- higher is handed out first
+    
+    
 # What we send back 
 
 class GrievanceResponse(BaseModel):
@@ -34,6 +54,25 @@ class GrievanceResponse(BaseModel):
     sarpanch_reply: Optional[str]  # null until sarpanch replies
     created_at: datetime           # when submitted
     resolved_at: Optional[datetime] # null until resolved
+    duplicate_of: Optional[int] = None  # first grievance of the near-duplicate cluster
+    priority: int = 0                   # higher is handed out first by the work queue
+    claimed_by: Optional[int] = None    # official currently working on it
+    claim_expires_at: Optional[datetime] = None
 
     class Config:
-        from_attributes = True    
\ No newline at end of file
+        from_attributes = True
+        
+        
+# One page of search results 
+
+class GrievanceSearchPage(BaseModel):
+    items : List[GrievanceResponse]            # best match first
+    next_cursor : Optional[str] = None         # pass back as ?cursor= for the next page, null on last page
+        
+        
+# Near-duplicate grievances grouped together 
+
+class GrievanceCluster(BaseModel):
+    cluster_id : int                           # id of the first grievance of the cluster
+    size : int                                 # open / in progress grievances in the cluster
+    grievances : List[GrievanceResponse]
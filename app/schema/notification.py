@@ -0,0 +1,26 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+from app.models.notification import NotificationJobStatusEnum
+
+
+# Progress of one SMS fan-out (alert announcement)
+
+class NotificationJobResponse(BaseModel):
+    id: int
+    village_id: int
+    ward_number: Optional[int]          # null --> whole village
+    announcement_id: Optional[int]
+    message: str
+    status: NotificationJobStatusEnum   # pending / running / done / failed
+    not_before: Optional[datetime]      # scheduled alerts are sent when published
+    sent_count: int
+    failed_count: int
+    attempts: int
+    error: Optional[str]
+    created_at: datetime
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
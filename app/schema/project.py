@@ -1,8 +1,9 @@
 from pydantic import BaseModel
 from pydantic import Field
-from typing import Optional , List
+from typing import Optional , List , Dict
 from datetime import datetime 
-from app.models.project import ProjectStatusEnum
+import enum
+from app.models.project import ProjectStatusEnum , ProjectPhotoStatusEnum
 
 # When Head/Sarpanch of village want to create a new work/project
 
@@ -20,7 +21,7 @@ class ProjectCreate(BaseModel):
 
 class ProjectUpdate(BaseModel):
     status : Optional[ProjectStatusEnum] = None
-    acutal_cost : Optional[float] = None
+    actual_cost : Optional[float] = None
     description : str = None
     
 # What we send back 
@@ -38,8 +39,50 @@ class ProjectResponse(BaseModel):
     status: ProjectStatusEnum       # "completed"
     start_date: Optional[datetime]
     end_date: Optional[datetime]
-    photos: List[str]               # ["https://cloudinary.com/photo1.jpg", ...]
+    cover_thumbnail_url: Optional[str] = None      # "/api/projects/photos/7/thumb", the full gallery is in the detail view
     created_at: datetime
 
     class Config:
-        from_attributes = True    
\ No newline at end of file
+        from_attributes = True
+
+
+class ProjectPhotoResponse(BaseModel):
+    id: int
+    position: int
+    caption: Optional[str]
+    status: ProjectPhotoStatusEnum  # pending --> processing --> ready (renditions available)
+    width: Optional[int]
+    height: Optional[int]
+    urls: Dict[str, str]            # {"thumb": "/api/projects/photos/7/thumb", "medium": ..., "large": ...}
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+# Single project --> with its photos
+
+class ProjectDetailResponse(ProjectResponse):
+    photos: List[ProjectPhotoResponse]
+
+
+# New display order, e.g. {"photo_ids": [7, 3, 5]} --> 7 first (cover)
+
+class ProjectPhotoOrder(BaseModel):
+    photo_ids: List[int]
+
+
+# Listing sort orders (whitelist --> every one has a matching index)
+
+class ProjectSortEnum(str , enum.Enum):
+    newest = "newest"               # latest created first (default)
+    oldest = "oldest"
+    cost_high = "cost_high"         # estimated_cost, highest first
+    cost_low = "cost_low"
+
+
+# One page of the project listing
+
+class ProjectPage(BaseModel):
+    items: List[ProjectResponse]
+    next_cursor: Optional[str] = None    # pass back as ?cursor= for the next page, null on last page
@@ -0,0 +1,22 @@
+from pydantic import BaseModel
+from typing import List , Optional
+from datetime import datetime
+from app.models.search import SearchEntityEnum
+
+
+# One match: a document, an announcement or a project
+
+class SearchResult(BaseModel):
+    entity_type: SearchEntityEnum        # document / announcement / project
+    entity_id: int
+    title: str
+    snippet: str                         # best matching part of the text / file content
+    url: str                             # e.g. /api/documents/4
+    created_at: Optional[datetime]
+
+
+# One page of results, best match first
+
+class SearchPage(BaseModel):
+    items: List[SearchResult]
+    next_cursor: Optional[str] = None    # pass back as ?cursor= for the next page, null on last page
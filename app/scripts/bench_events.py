@@ -0,0 +1,147 @@
+"""
+How many live event subscribers can one worker hold?
+
+    python -m app.scripts.bench_events --subscribers 20000 --events 50
+        in-process: memory per subscriber and fan-out time of the hub itself
+
+    python -m app.scripts.bench_events --url http://127.0.0.1:8000 --token <jwt> --subscribers 5000 --hold 60
+        against a running worker: opens real SSE connections and counts the events received
+        (publish announcements meanwhile to see delivery). Raise `ulimit -n` first.
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+from urllib.parse import urlparse
+from app.utils.pubsub import Hub , village_channel
+
+
+#------------------------------- In-process -------------------------------
+
+async def bench_hub(subscribers : int , events : int , queue_size : int):
+
+    hub = Hub(queue_size)
+    hub.bind(asyncio.get_running_loop())
+
+    channel = village_channel(1)
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    received = 0
+    all_received = asyncio.Event()
+
+    async def consume(subscription):
+        nonlocal received
+        while True:
+            await subscription.get()
+            received += 1
+            if received == subscribers * events:
+                all_received.set()
+
+    subscriptions = [hub.subscribe([channel]) for _ in range(subscribers)]
+    tasks = [asyncio.create_task(consume(s)) for s in subscriptions]
+    await asyncio.sleep(0)
+
+    per_subscriber = (tracemalloc.get_traced_memory()[0] - before) / subscribers
+    tracemalloc.stop()
+
+    fanout = []
+    started = time.perf_counter()
+
+    for i in range(events):
+        t = time.perf_counter()
+        hub.publish(channel , "announcement.created" , {"id" : i , "title" : "Gram Sabha on Sunday" , "content" : "x" * 200})
+        fanout.append(time.perf_counter() - t)
+        await asyncio.sleep(0)        # let consumers drain, as a real worker would between requests
+
+    await asyncio.wait_for(all_received.wait() , timeout=120)
+    total = time.perf_counter() - started
+
+    for task in tasks:
+        task.cancel()
+
+    fanout.sort()
+
+    print(f"subscribers            : {subscribers}")
+    print(f"memory per subscriber  : {per_subscriber / 1024:.2f} KiB (idle, excluding socket buffers)")
+    print(f"fan-out per event p50  : {fanout[len(fanout) // 2] * 1000:.2f} ms")
+    print(f"fan-out per event max  : {fanout[-1] * 1000:.2f} ms")
+    print(f"deliveries per second  : {subscribers * events / total:,.0f}")
+    print(f"dropped subscribers    : {hub.dropped}")
+
+
+#------------------------------- Over HTTP -------------------------------
+
+async def bench_http(url : str , token : str , subscribers : int , hold : int):
+
+    target = urlparse(url)
+    host , port = target.hostname , target.port or 80
+
+    connected = 0
+    events = 0
+    failed = 0
+
+    async def subscriber():
+        nonlocal connected , events , failed
+        try:
+            reader , writer = await asyncio.open_connection(host , port)
+            writer.write((f"GET /api/events/stream HTTP/1.1\r\nHost: {host}\r\n"
+                          f"Authorization: Bearer {token}\r\nAccept: text/event-stream\r\n\r\n").encode())
+            await writer.drain()
+
+            status = await reader.readline()
+            if b" 200 " not in status:
+                failed += 1
+                return
+
+            connected += 1
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                if line.startswith(b"event: "):
+                    events += 1
+
+        except OSError:
+            failed += 1
+
+    tasks = []
+    for _ in range(subscribers):
+        tasks.append(asyncio.create_task(subscriber()))
+        if len(tasks) % 500 == 0:
+            await asyncio.sleep(0.1)            # do not SYN-flood the worker
+
+    for second in range(hold):
+        await asyncio.sleep(1)
+        if second % 5 == 0:
+            print(f"t={second:>4}s connected={connected} failed={failed} events={events}")
+
+    for task in tasks:
+        task.cancel()
+
+    print(f"connected {connected} / {subscribers} , failed {failed} , events received {events}")
+
+
+def main(argv = None):
+
+    parser = argparse.ArgumentParser(description="Benchmark live event subscribers")
+    parser.add_argument("--subscribers" , type=int , default=10000)
+    parser.add_argument("--events" , type=int , default=50 , help="in-process: events to publish")
+    parser.add_argument("--queue-size" , type=int , default=100 , help="in-process: per subscriber queue")
+    parser.add_argument("--url" , help="benchmark a running worker instead of the hub alone")
+    parser.add_argument("--token" , help="JWT used by every SSE connection (with --url)")
+    parser.add_argument("--hold" , type=int , default=30 , help="seconds to keep connections open (with --url)")
+    args = parser.parse_args(argv)
+
+    if args.url:
+        if not args.token:
+            parser.error("--token is required with --url")
+        asyncio.run(bench_http(args.url , args.token , args.subscribers , args.hold))
+    else:
+        asyncio.run(bench_hub(args.subscribers , args.events , args.queue_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Does a worker stay flat in memory under many concurrent document uploads?
+
+    python -m app.scripts.bench_uploads --url http://127.0.0.1:8000 --token <sarpanch jwt> --concurrency 50 --size-mb 10 --pid <worker pid>
+        sends `concurrency` uploads of `size-mb` MB at the same time, streamed from the client
+        (the client never holds a whole file), then prints the latency and the worker's peak RSS (VmHWM, Linux)
+"""
+
+import argparse
+import http.client
+import os
+import threading
+import time
+import uuid
+from urllib.parse import urlparse
+
+CHUNK = 256 * 1024
+
+
+def _peak_rss_mb(pid : int) -> float:
+
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+
+    return 0.0
+
+
+def _upload(url , token : str , size : int , results : list):
+
+    boundary = uuid.uuid4().hex
+    head = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"title\"\r\n\r\nbench\r\n"
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"doc_type\"\r\n\r\nother\r\n"
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"bench.pdf\"\r\n"
+            f"Content-Type: application/pdf\r\n\r\n").encode()
+    tail = f"\r\n--{boundary}--\r\n".encode()
+
+    def body():
+        yield head
+        block = os.urandom(CHUNK)
+        for sent in range(0 , size , CHUNK):
+            yield block[:min(CHUNK , size - sent)]
+        yield tail
+
+    started = time.perf_counter()
+
+    conn = http.client.HTTPConnection(url.hostname , url.port or 80 , timeout=300)
+    conn.request("POST" , "/api/documents/upload" , body=body() , headers={
+        "Authorization" : f"Bearer {token}",
+        "Content-Type" : f"multipart/form-data; boundary={boundary}",
+        "Content-Length" : str(len(head) + size + len(tail)),
+    })
+    status = conn.getresponse().status
+    conn.close()
+
+    results.append((status , time.perf_counter() - started))
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url" , required=True)
+    parser.add_argument("--token" , required=True)
+    parser.add_argument("--concurrency" , type=int , default=50)
+    parser.add_argument("--size-mb" , type=float , default=10)
+    parser.add_argument("--pid" , type=int , default=None , help="worker process to read the peak RSS of")
+    args = parser.parse_args()
+
+    url = urlparse(args.url)
+    size = int(args.size_mb * 1024 * 1024)
+    results = []
+
+    before = _peak_rss_mb(args.pid) if args.pid else None
+
+    threads = [threading.Thread(target=_upload , args=(url , args.token , size , results)) for _ in range(args.concurrency)]
+
+    started = time.perf_counter()
+
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    elapsed = time.perf_counter() - started
+    statuses = {}
+    for status , _ in results:
+        statuses[status] = statuses.get(status , 0) + 1
+
+    latencies = sorted(seconds for _ , seconds in results)
+
+    print(f"uploads          : {len(results)} x {args.size_mb} MB in {elapsed:.2f}s  statuses={statuses}")
+    print(f"latency p50 / max: {latencies[len(latencies) // 2]:.2f}s / {latencies[-1]:.2f}s")
+    print(f"throughput       : {len(results) * args.size_mb / elapsed:.1f} MB/s")
+
+    if args.pid:
+        print(f"worker peak RSS  : {before:.1f} MB before --> {_peak_rss_mb(args.pid):.1f} MB after")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Show the query plans of the common project listing filter combinations.
+
+    python -m app.scripts.explain_projects                  # print every plan
+    python -m app.scripts.explain_projects --check          # exit 1 if a combination scans the whole projects table
+
+The queries are built by the same code as GET /api/projects/ (app/utils/project_listing.py),
+so a new filter or sort that no index supports shows up here before it reaches production.
+Postgres: sequential scans are disabled for the check --> the plan shows which index the planner
+can use, even on a small development table it would otherwise just read whole.
+"""
+
+import argparse
+import sys
+from datetime import datetime , timezone
+from sqlalchemy import text
+from app.database import SessionLocal
+from app.models.project import ProjectStatusEnum
+from app.utils.pagination import encode_cursor
+from app.utils.project_listing import project_filters , project_listing_query
+
+VILLAGE_ID = 1
+
+# name --> (filters , sort , cursor)
+COMBINATIONS = {
+    "village (default list)" : ({} , "newest" , None),
+    "village, next page" : ({} , "newest" , encode_cursor(sort="newest" , value=500 , id=500)),
+    "ward" : ({"ward_number" : [3]} , "newest" , None),
+    "ward + status" : ({"ward_number" : [3] , "status" : [ProjectStatusEnum.ongoing]} , "newest" , None),
+    "ward + several statuses" : ({"ward_number" : [3] , "status" : [ProjectStatusEnum.planned , ProjectStatusEnum.ongoing]} , "newest" , None),
+    "status" : ({"status" : [ProjectStatusEnum.completed]} , "newest" , None),
+    "category" : ({"category" : "road"} , "newest" , None),
+    "cost range, by cost" : ({"min_cost" : 50000 , "max_cost" : 500000} , "cost_high" , None),
+    "by cost, next page" : ({} , "cost_low" , encode_cursor(sort="cost_low" , value=100000.0 , id=42)),
+    "start date range" : ({"start_from" : datetime(2025 , 4 , 1 , tzinfo=timezone.utc) , "start_to" : datetime(2026 , 3 , 31 , tzinfo=timezone.utc)} , "newest" , None),
+    "ward + status + category + cost" : ({"ward_number" : [3] , "status" : [ProjectStatusEnum.ongoing] , "category" : "road" , "min_cost" : 10000} , "newest" , None),
+}
+
+
+def explain(db , query) -> list:
+
+    dialect = db.get_bind().dialect
+
+    sql = str(query.compile(dialect=dialect , compile_kwargs={"literal_binds" : True}))
+
+    if dialect.name == "postgresql":
+        return [row[0] for row in db.execute(text(f"EXPLAIN {sql}"))]
+
+    return [row[-1] for row in db.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+
+
+def full_scan(plan : list) -> bool:
+
+    for line in plan:
+        if "Seq Scan on projects" in line:                                  # Postgres
+            return True
+        if line.startswith("SCAN projects") and "INDEX" not in line:        # SQLite
+            return True
+
+    return False
+
+
+def main(argv = None):
+
+    parser = argparse.ArgumentParser(description="Query plans of the project listing filters")
+    parser.add_argument("--check" , action="store_true" , help="fail when a combination needs a full table scan")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    scans = []
+
+    try:
+        if db.get_bind().dialect.name == "postgresql":
+            db.execute(text("SET LOCAL enable_seqscan = off"))
+
+        for name , (filters , sort , cursor) in COMBINATIONS.items():
+            plan = explain(db , project_listing_query(project_filters(VILLAGE_ID , **filters) , sort , cursor))
+
+            if full_scan(plan):
+                scans.append(name)
+
+            print(f"── {name}{'   <-- full scan' if full_scan(plan) else ''}")
+            for line in plan:
+                print(f"   {line}")
+
+    finally:
+        db.rollback()
+        db.close()
+
+    if scans:
+        print(f"\n{len(scans)} combination(s) without a usable index: {', '.join(scans)}")
+        if args.check:
+            sys.exit(1)
+    else:
+        print(f"\nall {len(COMBINATIONS)} combinations use an index")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Remove document files that no Document references any more.
+
+    python -m app.scripts.gc_blobs                      # sweep blobs unreferenced for BLOB_GC_GRACE_SECONDS
+    python -m app.scripts.gc_blobs --grace 0            # sweep every unreferenced blob now
+    python -m app.scripts.gc_blobs --recount            # first recompute ref_count from the documents table
+
+The API workers run the same sweep in the background every BLOB_GC_INTERVAL_SECONDS.
+"""
+
+import argparse
+from app.database import SessionLocal
+from app.utils.blobs import sweep_blobs , recount_blobs
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+def main(argv = None):
+
+    parser = argparse.ArgumentParser(description="Garbage collect unreferenced document blobs")
+    parser.add_argument("--grace" , type=int , default=None , help="seconds a blob must have been unreferenced (default: BLOB_GC_GRACE_SECONDS)")
+    parser.add_argument("--recount" , action="store_true" , help="recompute reference counts before sweeping")
+    parser.add_argument("--batch-size" , type=int , default=500 , help="blobs per DELETE / commit")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+
+    try:
+        if args.recount:
+            changed = recount_blobs(db)
+            logger.info(f"Blob GC | {changed} reference counts corrected")
+
+        removed , freed = sweep_blobs(db , args.grace , args.batch_size)
+
+        print(f"removed {removed} blobs, {freed / 1024 / 1024:.1f} MB freed")
+
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Reconcile the denormalized Budget.total_spent against the transactions table.
+
+    python -m app.scripts.reconcile_budgets                  # report drifted budgets only
+    python -m app.scripts.reconcile_budgets --fix            # also repair them in batches
+    python -m app.scripts.reconcile_budgets --fix --rebuild-rollups
+
+The real spend is computed by a single GROUP BY inside the database and streamed
+back, so it works on a 10M row transactions table without loading rows into Python.
+"""
+
+import argparse
+from sqlalchemy import func , select , update
+from app.database import SessionLocal
+from app.models.budget import Budget , BudgetTransaction
+from app.utils.aggregates import rebuild_budget_category_totals
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+TOLERANCE = 0.01          # one paisa — ignore float noise
+
+
+def _actual_spend():
+
+    # SUM(amount) per budget, computed by the database
+
+    return (select(BudgetTransaction.budget_id , func.sum(BudgetTransaction.amount).label("actual"))
+              .group_by(BudgetTransaction.budget_id)
+              .subquery())
+
+
+def find_drifted_budgets(db , chunk_size : int = 1000):
+
+    """
+    Yield (budget_id, village_id, financial_year, stored, actual) for every budget whose
+    total_spent does not match its transactions. Rows are streamed in chunks.
+    """
+
+    spend = _actual_spend()
+
+    stored = func.coalesce(Budget.total_spent , 0.0)
+    actual = func.coalesce(spend.c.actual , 0.0)
+
+    query = (select(Budget.id , Budget.village_id , Budget.financial_year , stored , actual)
+               .outerjoin(spend , spend.c.budget_id == Budget.id)
+               .where(func.abs(stored - actual) > TOLERANCE)
+               .order_by(Budget.id)
+               .execution_options(yield_per=chunk_size))
+
+    yield from db.execute(query)
+
+
+def fix_budgets(db , budget_ids : list , batch_size : int = 1000):
+
+    """
+    Set total_spent from the transactions table, one UPDATE and one commit per batch.
+    The new value is a correlated sub-select so it is computed inside the database.
+    """
+
+    actual = (select(func.coalesce(func.sum(BudgetTransaction.amount) , 0.0))
+                .where(BudgetTransaction.budget_id == Budget.id)
+                .scalar_subquery())
+
+    fixed = 0
+
+    for start in range(0 , len(budget_ids) , batch_size):
+        batch = budget_ids[start : start + batch_size]
+
+        db.execute(update(Budget).where(Budget.id.in_(batch)).values(total_spent=actual)
+                     .execution_options(synchronize_session=False))
+        db.commit()
+
+        fixed += len(batch)
+        logger.info(f"Reconcile | fixed {fixed}/{len(budget_ids)} budgets")
+
+    return fixed
+
+
+def main(argv = None):
+
+    parser = argparse.ArgumentParser(description="Recompute Budget.total_spent from budget transactions")
+    parser.add_argument("--fix" , action="store_true" , help="repair drifted budgets (default: report only)")
+    parser.add_argument("--batch-size" , type=int , default=1000 , help="budgets per UPDATE / commit")
+    parser.add_argument("--rebuild-rollups" , action="store_true" , help="also rebuild budget_category_totals")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+
+    try:
+        drifted = []
+
+        print(f"{'budget_id':>10} {'village_id':>10} {'year':>8} {'stored':>16} {'actual':>16} {'drift':>16}")
+
+        for budget_id , village_id , financial_year , stored , actual in find_drifted_budgets(db , args.batch_size):
+            drifted.append(budget_id)
+            print(f"{budget_id:>10} {village_id:>10} {financial_year:>8} {stored:>16.2f} {actual:>16.2f} {stored - actual:>16.2f}")
+
+        logger.info(f"Reconcile | {len(drifted)} drifted budgets found")
+
+        if args.fix and drifted:
+            fix_budgets(db , drifted , args.batch_size)
+
+        if args.rebuild_rollups:
+            rebuild_budget_category_totals(db)
+            db.commit()
+            logger.info("Reconcile | budget_category_totals rebuilt")
+
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Rebuild the search index of documents, announcements and projects.
+
+    python -m app.scripts.reindex_search                # recompute every search entry
+    python -m app.scripts.reindex_search --extract      # also queue text extraction of PDF / DOCX files stored before it existed
+
+Writes keep the index up to date; this is for the first deployment and for repairs.
+Queued extractions run in the preview pipeline of the API workers (picked up at startup).
+"""
+
+import argparse
+from sqlalchemy import or_
+from app.database import SessionLocal
+from app.models.document import DocumentBlob
+from app.utils.search import rebuild_search_entries
+from app.utils.preview_render import TEXT_EXTENSIONS
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+def main(argv = None):
+
+    parser = argparse.ArgumentParser(description="Rebuild the unified search index")
+    parser.add_argument("--extract" , action="store_true" , help="re-run the preview pipeline for files without extracted text")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+
+    try:
+        rebuild_search_entries(db)
+        db.commit()
+
+        if args.extract:
+            queued = (db.query(DocumentBlob)
+                        .filter(DocumentBlob.extracted_text.is_(None) , DocumentBlob.ref_count > 0,
+                                or_(*[DocumentBlob.path.endswith(ext) for ext in TEXT_EXTENSIONS]))
+                        .update({DocumentBlob.preview_status : None , DocumentBlob.preview_attempts : 0} , synchronize_session=False))
+            db.commit()
+            logger.info(f"Search | {queued} files queued for text extraction")
+
+        print("search index rebuilt")
+
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+from datetime import timezone
+from sqlalchemy import func , select , insert , delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models.budget import Budget , BudgetTransaction , BudgetCategoryTotal
+from app.models.grievance import Grievance , GrievanceStatusCount , GrievanceStatusEnum
+from app.models.project import Project , ProjectWardStat , ProjectStatusEnum
+
+
+#--------------------------- Incremental counters ---------------------------
+
+def upsert_increment(db : Session , model , keys : dict , defaults : dict = None , assign : dict = None , **deltas):
+
+    """
+    Add deltas to the counter row identified by keys, creating it if missing.
+    defaults are only used when the row is created (descriptive columns).
+    assign are set on every write, created or updated (e.g. clearing a timestamp).
+    Runs inside the caller's transaction so the counter commits together with the write.
+    Example: upsert_increment(db, BudgetCategoryTotal, {"budget_id": 1, "category": "road"}, total_spent=500)
+    """
+
+    values = {getattr(model , column) : getattr(model , column) + delta for column , delta in deltas.items()}
+    values.update({getattr(model , column) : value for column , value in (assign or {}).items()})
+
+    updated = db.query(model).filter_by(**keys).update(values , synchronize_session=False)
+
+    if updated:
+        return
+
+    # first write for this key --> insert, fall back to update if another request won the race
+
+    try:
+        with db.begin_nested():
+            db.add(model(**keys , **{**(defaults or {}) , **(assign or {})} , **deltas))
+    except IntegrityError:
+        db.query(model).filter_by(**keys).update(values , synchronize_session=False)
+
+
+#--------------------------- Budget roll-ups ---------------------------
+
+def apply_budget_transaction(db : Session , budget : Budget , category , amount : float , count : int = 1):
+
+    """
+    Keep the per budget / per category spend in sync with a transaction write.
+    Pass a negative amount and count=-1 when a transaction is deleted.
+    """
+
+    upsert_increment(db , BudgetCategoryTotal,
+                     {"budget_id" : budget.id , "category" : category},
+                     defaults = {"village_id" : budget.village_id , "financial_year" : budget.financial_year},
+                     total_spent = amount,
+                     transaction_count = count)
+
+
+def rebuild_budget_category_totals(db : Session):
+
+    """
+    Recompute every budget_category_totals row from the transactions table.
+    One DELETE and one INSERT ... SELECT, nothing is loaded into Python.
+    """
+
+    db.execute(delete(BudgetCategoryTotal))
+
+    rows = (select(BudgetTransaction.budget_id,
+                   BudgetTransaction.category,
+                   Budget.village_id,
+                   Budget.financial_year,
+                   func.sum(BudgetTransaction.amount),
+                   func.count(BudgetTransaction.id))
+            .join(Budget , Budget.id == BudgetTransaction.budget_id)
+            .group_by(BudgetTransaction.budget_id , BudgetTransaction.category , Budget.village_id , Budget.financial_year))
+
+    db.execute(insert(BudgetCategoryTotal).from_select(["budget_id" , "category" , "village_id" , "financial_year" ,
+                                                        "total_spent" , "transaction_count"] , rows))
+
+
+#--------------------------- Grievance status counters ---------------------------
+
+def adjust_grievance_count(db : Session , village_id : int , status , delta : int):
+
+    """
+    Move the per village / per status grievance counter by delta.
+    A status change is adjust(old, -1) + adjust(new, +1) in the same transaction.
+    """
+
+    upsert_increment(db , GrievanceStatusCount , {"village_id" : village_id , "status" : status} , count=delta)
+
+
+def grievance_counts(db : Session , village_id : int) -> dict:
+
+    """
+    Grievance count per status for a village.
+    Reads the counter rows (one indexed read); villages without counters yet
+    fall back to a single GROUP BY over grievances.
+    """
+
+    rows = db.query(GrievanceStatusCount.status , GrievanceStatusCount.count).filter(
+                                                        GrievanceStatusCount.village_id == village_id).all()
+
+    if not rows:
+        rows = db.query(Grievance.status , func.count(Grievance.id)).filter(
+                                                        Grievance.village_id == village_id).group_by(Grievance.status).all()
+
+    counts = {s.value : 0 for s in GrievanceStatusEnum}
+
+    for status , count in rows:
+        counts[status.value] = count
+
+    return counts
+
+
+#--------------------------- Project ward stats ---------------------------
+
+def _utc(value):
+
+    # SQLite hands back naive datetimes --> treat them as UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def completion_days(project : Project):
+
+    # start (or creation) --> completion, None unless the project is completed
+
+    if project.status != ProjectStatusEnum.completed or project.completed_at is None:
+        return None
+
+    began = project.start_date or project.created_at
+
+    if began is None:
+        return None
+
+    return max((_utc(project.completed_at) - _utc(began)).total_seconds() / 86400 , 0.0)
+
+
+def apply_project_stats(db : Session , project : Project , sign : int = 1):
+
+    """
+    Add (sign=1) or remove (sign=-1) a project's share of its ward / status row.
+    An update is apply(project, -1) before the change + apply(project, 1) after it,
+    in the same transaction as the write.
+    """
+
+    estimated = project.estimated_cost or 0.0
+    actual = project.actual_cost or 0.0
+    days = completion_days(project)
+
+    upsert_increment(db , ProjectWardStat,
+                     {"village_id" : project.village_id , "ward_number" : project.ward_number ,
+                      "status" : project.status or ProjectStatusEnum.planned},
+                     project_count = sign,
+                     estimated_cost = sign * estimated,
+                     actual_cost = sign * actual,
+                     over_budget_count = sign if actual > estimated else 0,
+                     completion_days = sign * days if days is not None else 0.0,
+                     completion_count = sign if days is not None else 0)
+
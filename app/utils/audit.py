@@ -0,0 +1,318 @@
+import enum
+import io
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime , date , timezone
+from sqlalchemy import insert , event
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.audit import AuditEvent
+from app.utils.pagination import encode_cursor , cursor_values
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+SPILL_PATH = "logs/audit_failed.jsonl"         # batches the database refused after every retry
+RETRY_DELAYS = [0.5 , 2 , 5]                    # seconds before each retry of a failed batch
+
+COLUMNS = ["entity_type" , "entity_id" , "action" , "actor_id" , "village_id" , "changes" , "created_at"]
+
+
+def _plain(value):
+
+    # JSON safe value for changes (enums, dates)
+
+    if isinstance(value , enum.Enum):
+        return value.value
+    if isinstance(value , (datetime , date)):
+        return value.isoformat()
+    return value
+
+
+def changed(before : dict , after : dict) -> dict:
+
+    """
+    Compact diff for the changes column: {"field": [old, new]} for the fields that differ.
+    Example: changed({"status": "open"}, {"status": "resolved"}) --> {"status": ["open", "resolved"]}
+    """
+
+    return {key : [_plain(before.get(key)) , _plain(value)] for key , value in after.items() if before.get(key) != value}
+
+
+def _csv_field(value) -> str:
+
+    # COPY CSV: unquoted empty = NULL, every string quoted --> "" stays an empty string, as with INSERT
+
+    if value is None:
+        return ""
+    if isinstance(value , (int , float)):
+        return str(value)
+    return '"' + str(value).replace('"' , '""') + '"'
+
+
+class AuditLog:
+
+    """
+    Append-only audit log written off the request path.
+    - record() only puts a small dict on an in-memory queue (routes use audit(), which calls it on commit)
+    - one writer thread per API worker flushes a batch when AUDIT_BATCH_SIZE events are waiting
+      or the oldest one has waited AUDIT_FLUSH_SECONDS, whichever comes first
+    - a batch is one COPY (Postgres, psycopg2) or one multi-row INSERT (other databases)
+    - a failed batch is retried; if the database keeps refusing it the events go to SPILL_PATH
+      instead of being lost
+    - queue full (database down for a long time) --> record() waits briefly, then drops and counts it
+    - stop() writes whatever is still queued
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue(maxsize=settings.AUDIT_QUEUE_MAX)
+        self._stop = threading.Event()
+        self._session_factory = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.last_batch_ms = 0.0
+
+    #------------------------------- lifecycle -------------------------------
+
+    def start(self , session_factory):
+
+        self._session_factory = session_factory
+        self._thread = threading.Thread(target=self._run , daemon=True , name="audit-writer")
+        self._thread.start()
+
+    def stop(self , timeout : float = 10):
+
+        self._stop.set()
+
+        try:
+            self._queue.put(None , timeout=timeout)
+        except queue.Full:
+            pass
+
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def record(self , entity_type , entity_id : int , action : str , actor_id : int = None , village_id : int = None , changes : dict = None):
+
+        event = {
+            "entity_type" : _plain(entity_type),
+            "entity_id" : entity_id,
+            "action" : action,
+            "actor_id" : actor_id,
+            "village_id" : village_id,
+            "changes" : {key : _plain(value) for key , value in changes.items()} if changes else None,
+            "created_at" : datetime.now(timezone.utc),
+        }
+
+        try:
+            self._queue.put(event , timeout=0.05)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+                dropped = self.dropped
+            if dropped % 1000 == 1:
+                logger.error(f"Audit log | queue full, {dropped} events dropped so far")
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"queued" : self._queue.qsize() , "written" : self.written , "batches" : self.batches ,
+                    "dropped" : self.dropped , "spilled" : self.spilled , "last_batch_ms" : self.last_batch_ms}
+
+    #------------------------------- writer -------------------------------
+
+    def _run(self):
+
+        batch = []
+        deadline = None
+        stopping = False
+
+        while not stopping:
+            timeout = None if not batch else max(deadline - time.monotonic() , 0)
+
+            try:
+                event = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                event = False                               # oldest event waited long enough
+
+            if event is None:
+                stopping = True
+            elif event:
+                if not batch:
+                    deadline = time.monotonic() + settings.AUDIT_FLUSH_SECONDS
+                batch.append(event)
+
+            # take what is already waiting without blocking (one wake-up per burst)
+            while len(batch) < settings.AUDIT_BATCH_SIZE:
+                try:
+                    more = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if more is None:
+                    stopping = True
+                    continue
+                batch.append(more)
+
+            if batch and (stopping or len(batch) >= settings.AUDIT_BATCH_SIZE or time.monotonic() >= deadline):
+                self._flush(batch)
+                batch = []
+
+        # stop() --> everything still queued
+        rest = []
+        while True:
+            try:
+                event = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if event:
+                rest.append(event)
+
+        for i in range(0 , len(rest) , settings.AUDIT_BATCH_SIZE):
+            self._flush(rest[i:i + settings.AUDIT_BATCH_SIZE])
+
+    def _flush(self , batch : list):
+
+        for attempt in range(len(RETRY_DELAYS) + 1):
+            started = time.perf_counter()
+
+            try:
+                self._write(batch)
+            except Exception:
+                logger.exception(f"Audit log | batch of {len(batch)} failed (attempt {attempt + 1})")
+                if attempt < len(RETRY_DELAYS) and not self._stop.is_set():
+                    time.sleep(RETRY_DELAYS[attempt])
+                continue
+
+            with self._lock:
+                self.written += len(batch)
+                self.batches += 1
+                self.last_batch_ms = round((time.perf_counter() - started) * 1000 , 2)
+            return
+
+        self._spill(batch)
+
+    def _write(self , batch : list):
+
+        db = self._session_factory()
+
+        try:
+            connection = db.connection()
+
+            if connection.dialect.name == "postgresql" and connection.dialect.driver == "psycopg2":
+                self._copy(connection , batch)
+            else:
+                db.execute(insert(AuditEvent) , batch)      # one multi-row INSERT (insertmanyvalues)
+
+            db.commit()
+
+        except Exception:
+            db.rollback()
+            raise
+
+        finally:
+            db.close()
+
+    def _copy(self , connection , batch : list):
+
+        # COPY ... FROM STDIN (CSV): one round trip, no per-row statement parsing
+
+        buffer = io.StringIO()
+
+        for event in batch:
+            row = dict(event , changes=json.dumps(event["changes"] , ensure_ascii=False) if event["changes"] is not None else None ,
+                       created_at=event["created_at"].isoformat())
+            buffer.write(",".join(_csv_field(row[column]) for column in COLUMNS) + "\n")
+
+        buffer.seek(0)
+
+        cursor = connection.connection.cursor()
+
+        try:
+            cursor.copy_expert(f"COPY audit_events ({', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT csv)" , buffer)
+        finally:
+            cursor.close()
+
+    def _spill(self , batch : list):
+
+        os.makedirs(os.path.dirname(SPILL_PATH) , exist_ok=True)
+
+        with open(SPILL_PATH , "a" , encoding="utf-8") as file:
+            for event in batch:
+                file.write(json.dumps(event , default=_plain , ensure_ascii=False) + "\n")
+
+        with self._lock:
+            self.spilled += len(batch)
+
+        logger.error(f"Audit log | {len(batch)} events written to {SPILL_PATH}")
+
+
+audit_log = AuditLog()
+
+
+#------------------------------- Write side -------------------------------
+
+_PENDING = "audit_pending"
+
+
+def audit(db : Session , entity_type , entity_id : int , action : str , actor_id : int = None , village_id : int = None , changes : dict = None):
+
+    """
+    Record an audit event once this transaction commits (same contract as cache_bus.invalidate).
+    Call next to the write, before db.commit(); nothing is recorded if the transaction rolls back.
+    Example: audit(db, AuditEntityEnum.grievance, 7, "reply", actor_id=user.id, village_id=1, changes={"status": ["open", "resolved"]})
+    """
+
+    db.info.setdefault(_PENDING , []).append((entity_type , entity_id , action , actor_id , village_id , changes))
+
+
+@event.listens_for(Session , "after_commit")
+def _record_after_commit(session):
+
+    if session.in_nested_transaction():
+        return
+
+    for pending in session.info.pop(_PENDING , None) or []:
+        audit_log.record(*pending)
+
+
+@event.listens_for(Session , "after_transaction_end")
+def _forget_after_rollback(session , transaction):
+
+    if transaction.parent is None:
+        session.info.pop(_PENDING , None)
+
+
+#------------------------------- Reading -------------------------------
+
+def entity_history(db : Session , entity_type : str , entity_id : int , village_id : int = None , cursor : str = None , limit : int = 50):
+
+    """
+    Events of one record, newest first. Returns (events, next_cursor).
+    Keyset on id over ix_audit_events_entity (entity_type, entity_id, id).
+    village_id --> only events recorded for that village (sarpanch view).
+    """
+
+    query = db.query(AuditEvent).filter(AuditEvent.entity_type == entity_type , AuditEvent.entity_id == entity_id)
+
+    if village_id is not None:
+        query = query.filter(AuditEvent.village_id == village_id)
+
+    if cursor:
+        last_id , = cursor_values(cursor , id=int)
+        query = query.filter(AuditEvent.id < last_id)
+
+    events = query.order_by(AuditEvent.id.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+
+    if len(events) > limit:
+        events = events[:limit]
+        next_cursor = encode_cursor(id=events[-1].id)
+
+    return events , next_cursor
@@ -35,6 +35,13 @@ def create_access_token(data : dict) -> str:
 
 def get_current_user(token : str = Depends(oauth2_scheme) , db: Session = Depends(get_db)):
     
+    return get_user_from_token(token , db)
+
+
+def get_user_from_token(token : str , db : Session):
+    
+    # shared by get_current_user and the event streams (token may come from a query param there)
+    
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED, 
         detail="Could not validate credentials",
@@ -59,4 +66,4 @@ def get_current_user(token : str = Depends(oauth2_scheme) , db: Session = Depend
     
     return user    
     
-    
\ No newline at end of file
+    
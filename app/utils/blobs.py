@@ -0,0 +1,209 @@
+import threading
+from datetime import datetime , timezone , timedelta
+from sqlalchemy import case , exists , func , select , update
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.document import Document , DocumentBlob
+from app.utils.aggregates import upsert_increment
+from app.utils.file_uploads import StoredFile , blob_key , preview_key , discard_file
+from app.utils.storage import get_storage , run , delete_on_rollback
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+#------------------------------- References -------------------------------
+
+def acquire_blob(db : Session , stored : StoredFile , content_type : str = None) -> str:
+
+    """
+    Take one reference on the blob holding this content and move the spooled upload to storage
+    (dropped if the content is already stored). Returns the file location for Document.file_url.
+    Call before db.commit(): the reference commits together with the Document row.
+    The counter is bumped before the file is placed --> a concurrent GC sweep of the same blob
+    either finishes first (file placed again here) or waits on the row lock (Postgres).
+    A file placed here is removed again if the transaction does not commit (the blob row is gone too).
+    """
+
+    # released_at cleared --> a blob referenced again is no longer a GC candidate
+    upsert_increment(db , DocumentBlob , {"sha256" : stored.sha256} ,
+                     defaults = {"path" : blob_key(stored.sha256 , content_type) , "size" : stored.size},
+                     assign = {"released_at" : None},
+                     ref_count = 1)
+
+    key = db.query(DocumentBlob.path).filter(DocumentBlob.sha256 == stored.sha256).scalar()
+
+    storage = get_storage()
+
+    deduplicated = run(storage.exists(key))
+
+    if deduplicated:
+        discard_file(stored.path)
+    else:
+        run(storage.put_file(key , stored.path , content_type))
+        delete_on_rollback(db , key)
+
+    stats.record_upload(stored.size , deduplicated)
+
+    return storage.locator(key)
+
+
+def release_blob(db : Session , sha256 : str):
+
+    """
+    Drop one reference. The file itself is deleted later by the GC sweep,
+    once the blob has had no reference for BLOB_GC_GRACE_SECONDS.
+    """
+
+    if not sha256:
+        return
+
+    db.query(DocumentBlob).filter(DocumentBlob.sha256 == sha256 , DocumentBlob.ref_count > 0).update({
+        DocumentBlob.ref_count : DocumentBlob.ref_count - 1,
+        DocumentBlob.released_at : case((DocumentBlob.ref_count <= 1 , datetime.now(timezone.utc)) , else_=DocumentBlob.released_at),
+    } , synchronize_session=False)
+
+
+#------------------------------- Garbage collection -------------------------------
+
+def sweep_blobs(db : Session , grace_seconds : int = None , batch_size : int = 500) -> tuple:
+
+    """
+    Delete unreferenced blobs (row + file) released more than grace_seconds ago.
+    Rows are locked (SKIP LOCKED on Postgres) and the files removed before the commit,
+    so an upload re-acquiring the same content waits for the sweep and then stores the file again.
+    Returns (blobs removed, bytes freed).
+    """
+
+    grace = settings.BLOB_GC_GRACE_SECONDS if grace_seconds is None else grace_seconds
+
+    removed = freed = 0
+
+    while True:
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=grace)
+
+        blobs = (db.query(DocumentBlob)
+                   .filter(DocumentBlob.ref_count <= 0 , DocumentBlob.released_at <= cutoff,
+                           ~exists().where(Document.content_hash == DocumentBlob.sha256))
+                   .order_by(DocumentBlob.released_at).limit(batch_size)
+                   .with_for_update(skip_locked=True).all())
+
+        if not blobs:
+            db.rollback()
+            break
+
+        for blob in blobs:
+            db.delete(blob)
+
+        db.flush()
+
+        run(get_storage().delete_many([blob.path for blob in blobs] + [preview_key(blob.sha256) for blob in blobs]))
+
+        removed += len(blobs)
+        freed += sum(blob.size for blob in blobs)
+
+        db.commit()
+
+        if len(blobs) < batch_size:
+            break
+
+    if removed:
+        logger.info(f"Blob GC | removed {removed} files, {freed / 1024 / 1024:.1f} MB freed")
+
+    return removed , freed
+
+
+def recount_blobs(db : Session) -> int:
+
+    """
+    Recompute ref_count from the documents table (repairs drift, e.g. documents removed
+    by a village delete cascade). Blobs found unreferenced become GC candidates.
+    Returns the number of blobs whose count changed.
+    """
+
+    actual = (select(func.count(Document.id)).where(Document.content_hash == DocumentBlob.sha256).scalar_subquery())
+
+    changed = db.execute(update(DocumentBlob).where(DocumentBlob.ref_count != actual).values(ref_count=actual)
+                           .execution_options(synchronize_session=False)).rowcount
+
+    db.execute(update(DocumentBlob).where(DocumentBlob.ref_count == 0 , DocumentBlob.released_at.is_(None))
+                 .values(released_at=datetime.now(timezone.utc)).execution_options(synchronize_session=False))
+
+    db.commit()
+
+    return changed
+
+
+#------------------------------- Background sweep / metrics -------------------------------
+
+class BlobStats:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.uploads = 0
+        self.deduplicated = 0
+        self.bytes_saved = 0
+        self.swept = 0
+        self.bytes_freed = 0
+
+    def record_upload(self , size : int , deduplicated : bool):
+        with self._lock:
+            self.uploads += 1
+            if deduplicated:
+                self.deduplicated += 1
+                self.bytes_saved += size
+
+    def record_sweep(self , removed : int , freed : int):
+        with self._lock:
+            self.swept += removed
+            self.bytes_freed += freed
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "uploads": self.uploads,
+                "deduplicated": self.deduplicated,
+                "bytes_saved": self.bytes_saved,
+                "blobs_swept": self.swept,
+                "bytes_freed": self.bytes_freed,
+            }
+
+
+stats = BlobStats()
+
+
+class BlobCollector:
+
+    # runs sweep_blobs every BLOB_GC_INTERVAL_SECONDS; every worker may run it, SKIP LOCKED splits the work
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._session_factory = None
+
+    def start(self , session_factory):
+
+        self._session_factory = session_factory
+
+        threading.Thread(target=self._run , daemon=True , name="blob-gc").start()
+
+    def stop(self):
+
+        self._stop.set()
+
+    def _run(self):
+
+        while not self._stop.wait(settings.BLOB_GC_INTERVAL_SECONDS):
+            db = self._session_factory()
+
+            try:
+                stats.record_sweep(*sweep_blobs(db))
+
+            except Exception:
+                logger.exception("Blob GC | sweep failed")
+                db.rollback()
+
+            finally:
+                db.close()
+
+
+blob_collector = BlobCollector()
@@ -0,0 +1,413 @@
+import json
+import os
+import select
+import socket
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import event , insert , text
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import engine , connect_args
+from app.models.cache_outbox import CacheOutbox
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+CHANNEL = "cache_invalidation"
+EVENTS_CHANNEL = "live_events"      # pubsub events relayed to the other workers
+EVICT_ALL = "*"
+MAX_PAYLOAD = 7900            # NOTIFY payloads must stay under 8000 bytes
+
+
+#------------------------------- Local caches -------------------------------
+
+class LocalCache:
+
+    """
+    Bounded, thread safe LRU cache of one worker, evicted by the cache bus.
+    Keys are namespaced like the bus keys, e.g. "announcements:4" or "announcements:4:5".
+    A load that started before an eviction is never stored, so a slow reader cannot
+    put back a value that a concurrent write has just invalidated.
+    """
+
+    def __init__(self , name : str , max_entries : int = 10_000):
+        self.name = name
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_load(self , key : str , loader):
+
+        with self._lock:
+            if key in self._data:
+                self.hits += 1
+                self._data.move_to_end(key)
+                return self._data[key]
+
+            self.misses += 1
+
+        return self.load(key , loader)
+
+    def load(self , key : str , loader):
+
+        # unconditional (re)load, e.g. write-through after a commit; still skipped if evicted meanwhile
+
+        with self._lock:
+            generation = self._generation
+
+        value = loader()
+
+        with self._lock:
+            if generation == self._generation:
+                self._data[key] = value
+                self._data.move_to_end(key)
+                if len(self._data) > self.max_entries:
+                    self._data.popitem(last=False)
+
+        return value
+
+    def evict(self , key : str):
+
+        # the key itself and every variant below it ("announcements:4" also drops "announcements:4:5")
+
+        with self._lock:
+            self._generation += 1
+            for cached in [k for k in self._data if k == key or k.startswith(key + ":")]:
+                del self._data[cached]
+                self.evictions += 1
+
+    def clear(self):
+
+        with self._lock:
+            self._generation += 1
+            self.evictions += len(self._data)
+            self._data.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups , 4) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+class CacheRegistry:
+
+    """
+    Every in-process cache registers the key prefix it holds;
+    evict(keys) routes each invalidated key to the caches owning that prefix.
+    """
+
+    def __init__(self):
+        self._caches = []
+
+    def register(self , prefix : str , cache : LocalCache) -> LocalCache:
+        self._caches.append((prefix , cache))
+        return cache
+
+    def evict(self , keys):
+
+        for key in keys:
+            if key == EVICT_ALL:
+                self.clear()
+                return
+            for prefix , cache in self._caches:
+                if key.startswith(prefix):
+                    cache.evict(key)
+
+    def clear(self):
+        for _ , cache in self._caches:
+            cache.clear()
+
+    def snapshot(self) -> dict:
+        return {cache.name : cache.snapshot() for _ , cache in self._caches}
+
+
+registry = CacheRegistry()
+
+
+#------------------------------- Write side -------------------------------
+
+_PENDING = "cache_bus_pending"
+
+
+def invalidate(db : Session , *keys : str):
+
+    """
+    Evict keys from the caches of every worker once this transaction commits.
+    Call next to the write, before db.commit(). Nothing is sent if the transaction rolls back.
+    Example: invalidate(db, f"announcements:{village_id}")
+    """
+
+    keys = [key for key in keys if key]
+
+    if not keys:
+        return
+
+    db.info.setdefault(_PENDING , set()).update(keys)
+
+    bus.enqueue(db , keys)
+
+
+@event.listens_for(Session , "after_commit")
+def _evict_after_commit(session):
+
+    # this worker evicts immediately; other workers hear it from the backend
+
+    if session.in_nested_transaction():
+        return
+
+    keys = session.info.pop(_PENDING , None)
+
+    if keys:
+        registry.evict(keys)
+
+
+@event.listens_for(Session , "after_transaction_end")
+def _forget_after_rollback(session , transaction):
+
+    if transaction.parent is None:
+        session.info.pop(_PENDING , None)
+
+
+#------------------------------- Backends -------------------------------
+
+class MemoryBackend:
+
+    """
+    Single process stand-in (SQLite, tests): eviction happens in after_commit only,
+    no outbox rows and no listener.
+    """
+
+    name = "memory"
+
+    def enqueue(self , db : Session , keys : list):
+        pass
+
+    def relay(self , db : Session , events : list):
+        pass
+
+    def on_event(self , handler):
+        pass
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def snapshot(self) -> dict:
+        return {"backend" : self.name}
+
+
+class PostgresBackend:
+
+    """
+    Transactional outbox + LISTEN/NOTIFY.
+    Writers insert outbox rows and pg_notify() inside their transaction --> Postgres delivers
+    the notification only if, and when, the transaction commits.
+    Every worker runs a listener thread on a dedicated connection and evicts the keys in the payload.
+    After a lost connection the listener replays the outbox rows written while it was away.
+    Live events (pubsub) ride the same connection on EVENTS_CHANNEL: sent with the transaction,
+    handed to every other worker's hub; they are not replayed after a reconnect (clients refetch).
+    """
+
+    name = "postgres"
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._thread = None
+        self._event_handler = None
+        self.origin = f"{socket.gethostname()}:{os.getpid()}"
+        self.connected = False
+        self.received = 0
+        self.events_received = 0
+        self.reconnects = 0
+        self.last_lag_ms = 0.0
+
+    def enqueue(self , db : Session , keys : list):
+
+        db.execute(insert(CacheOutbox) , [{"key" : key} for key in keys])
+
+        # many keys (broadcast to a district) --> several notifications instead of one evict-all
+
+        chunk , size = [] , 0
+
+        for key in keys:
+            if len(key) > MAX_PAYLOAD // 2:
+                key = EVICT_ALL
+            if chunk and size + len(key) + 4 > MAX_PAYLOAD - 64:
+                self._notify(db , chunk)
+                chunk , size = [] , 0
+            chunk.append(key)
+            size += len(key) + 4
+
+        if chunk:
+            self._notify(db , chunk)
+
+    def _notify(self , db : Session , keys : list):
+
+        payload = json.dumps({"keys" : keys , "sent" : time.time()})
+
+        db.execute(text("SELECT pg_notify(:channel , :payload)") , {"channel" : CHANNEL , "payload" : payload})
+
+    def relay(self , db : Session , events : list):
+
+        # events --> [(channel , event_type , data)], one NOTIFY each, batched into one round trip
+
+        params = []
+
+        for channel , event_type , data in events:
+            message = {"origin" : self.origin , "channel" : channel , "event" : event_type , "data" : data}
+            payload = json.dumps(message , default=str)
+            if len(payload) > MAX_PAYLOAD:
+                # too big for NOTIFY --> other workers push the id only, their clients fetch the rest
+                message["data"] = {"id" : data.get("id") , "partial" : True}
+                payload = json.dumps(message , default=str)
+            params.append({"channel" : EVENTS_CHANNEL , "payload" : payload})
+
+        if params:
+            db.execute(text("SELECT pg_notify(:channel , :payload)") , params)
+
+    def on_event(self , handler):
+
+        # handler(channel , event_type , data) for events published by other workers
+
+        self._event_handler = handler
+
+    def start(self):
+
+        self._thread = threading.Thread(target=self._listen , daemon=True , name="cache-bus-listener")
+        self._thread.start()
+
+    def stop(self):
+
+        self._stop.set()
+
+    def _connect(self):
+
+        import psycopg2
+
+        dsn = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        conn = psycopg2.connect(dsn , application_name="cache-bus-listener" ,
+                                **{k : v for k , v in connect_args.items() if k == "sslmode"})
+        conn.autocommit = True
+
+        return conn
+
+    def _catch_up(self , cursor , away_seconds : float):
+
+        seconds = away_seconds + settings.CACHE_BUS_CATCHUP_SLACK_SECONDS
+
+        cursor.execute("SELECT DISTINCT key FROM cache_outbox WHERE created_at >= now() - make_interval(secs => %s)" , (seconds ,))
+        keys = [row[0] for row in cursor.fetchall()]
+
+        registry.evict(keys)
+        logger.info(f"Cache bus | replayed {len(keys)} keys after {away_seconds:.1f}s without LISTEN")
+
+    def _prune(self , cursor):
+
+        cursor.execute("DELETE FROM cache_outbox WHERE created_at < now() - make_interval(hours => %s)" ,
+                       (settings.CACHE_BUS_RETENTION_HOURS ,))
+
+    def _handle(self , payload : str):
+
+        message = json.loads(payload)
+
+        registry.evict(message.get("keys" , []))
+
+        self.received += 1
+        self.last_lag_ms = round((time.time() - message.get("sent" , time.time())) * 1000 , 2)
+
+    def _handle_event(self , payload : str):
+
+        message = json.loads(payload)
+
+        # this worker's own events were delivered by its after_commit hook
+        if message.get("origin") == self.origin or self._event_handler is None:
+            return
+
+        self._event_handler(message["channel"] , message["event"] , message["data"])
+
+        self.events_received += 1
+
+    def _listen(self):
+
+        # started before any request is served, but replay anyway in case a write raced the first connect
+
+        away_since = time.monotonic()
+        last_prune = 0.0
+
+        while not self._stop.is_set():
+            conn = None
+
+            try:
+                conn = self._connect()
+                cursor = conn.cursor()
+                cursor.execute(f"LISTEN {CHANNEL}")
+                cursor.execute(f"LISTEN {EVENTS_CHANNEL}")
+
+                self._catch_up(cursor , time.monotonic() - away_since)
+                self.connected = True
+
+                while not self._stop.is_set():
+                    if time.monotonic() - last_prune > 600:
+                        self._prune(cursor)
+                        last_prune = time.monotonic()
+
+                    if select.select([conn] , [] , [] , 5) == ([] , [] , []):
+                        continue
+
+                    conn.poll()
+
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        if notify.channel == EVENTS_CHANNEL:
+                            self._handle_event(notify.payload)
+                        else:
+                            self._handle(notify.payload)
+
+            except Exception:
+                logger.exception("Cache bus | listener connection lost, reconnecting")
+
+            finally:
+                if self.connected:
+                    away_since = time.monotonic()
+                    self.reconnects += 1
+                self.connected = False
+                if conn is not None:
+                    conn.close()
+
+            self._stop.wait(1)
+
+    def snapshot(self) -> dict:
+        return {
+            "backend": self.name,
+            "connected": self.connected,
+            "notifications_received": self.received,
+            "events_relayed": self.events_received,
+            "reconnects": self.reconnects,
+            "last_lag_ms": self.last_lag_ms,
+        }
+
+
+def _select_backend():
+
+    backend = settings.CACHE_BUS_BACKEND
+
+    if backend == "auto":
+        backend = "postgres" if engine.dialect.name == "postgresql" else "memory"
+
+    return PostgresBackend() if backend == "postgres" else MemoryBackend()
+
+
+bus = _select_backend()
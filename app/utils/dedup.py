@@ -0,0 +1,178 @@
+import random
+import re
+import threading
+import zlib
+from collections import defaultdict
+from app.models.grievance import Grievance , GrievanceStatusEnum
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+#------------------------------- MinHash -------------------------------
+
+NUM_PERM = 60                 # signature length
+BANDS = 20                    # LSH bands --> 20 x 3 rows, ~93% of pairs at 0.5 jaccard become candidates
+ROWS = NUM_PERM // BANDS
+THRESHOLD = 0.5               # estimated jaccard above which two grievances are duplicates
+SHINGLE = 5                   # character n-gram size, robust to typos and Hindi spelling variants
+
+_PRIME = (1 << 61) - 1
+_MASK = (1 << 32) - 1
+
+# fixed seed --> identical signatures in every worker
+_rng = random.Random(20240220)
+_PERMS = [(_rng.randrange(1 , _PRIME) , _rng.randrange(0 , _PRIME)) for _ in range(NUM_PERM)]
+
+_NON_WORD = re.compile(r"[\W_]+" , re.UNICODE)
+
+
+def shingles(text : str) -> set:
+
+    normalized = " ".join(_NON_WORD.sub(" " , text.lower()).split())
+
+    if len(normalized) <= SHINGLE:
+        return {zlib.crc32(normalized.encode())}
+
+    return {zlib.crc32(normalized[i : i + SHINGLE].encode()) for i in range(len(normalized) - SHINGLE + 1)}
+
+
+def signature(text : str) -> tuple:
+
+    hashes = shingles(text)
+
+    return tuple(min(((a * h + b) % _PRIME) & _MASK for h in hashes) for a , b in _PERMS)
+
+
+def similarity(sig_a : tuple , sig_b : tuple) -> float:
+
+    # fraction of equal minhashes = estimated jaccard similarity of the shingle sets
+
+    return sum(1 for x , y in zip(sig_a , sig_b) if x == y) / NUM_PERM
+
+
+def _bands(sig : tuple):
+
+    return [hash(sig[i * ROWS : (i + 1) * ROWS]) for i in range(BANDS)]
+
+
+def grievance_text(title : str , description : str) -> str:
+
+    return f"{title} {description}"
+
+
+#------------------------------- LSH index -------------------------------
+
+class _VillageIndex:
+
+    def __init__(self):
+        self.buckets = [defaultdict(set) for _ in range(BANDS)]
+        self.signatures = {}              # grievance id -> signature
+        self.clusters = {}                # grievance id -> cluster root id
+
+
+class DuplicateIndex:
+
+    """
+    In-process MinHash/LSH index of open grievances, one per village.
+    Only open / in progress grievances are indexed; resolved, rejected and deleted ones are removed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._villages = defaultdict(_VillageIndex)
+
+    def find(self , village_id : int , text : str):
+
+        """
+        Returns (signature, cluster_id) — cluster_id is the root of the most similar
+        open grievance above THRESHOLD, or None.
+        """
+
+        sig = signature(text)
+
+        with self._lock:
+            index = self._villages.get(village_id)
+
+            if not index:
+                return sig , None
+
+            candidates = set()
+            for band , key in enumerate(_bands(sig)):
+                candidates |= index.buckets[band].get(key , set())
+
+            best , best_score = None , THRESHOLD
+            for grievance_id in candidates:
+                score = similarity(sig , index.signatures[grievance_id])
+                if score >= best_score:
+                    best , best_score = grievance_id , score
+
+            return sig , index.clusters[best] if best is not None else None
+
+    def add(self , village_id : int , grievance_id : int , sig : tuple , cluster_id : int = None):
+
+        with self._lock:
+            index = self._villages[village_id]
+            index.signatures[grievance_id] = sig
+            index.clusters[grievance_id] = cluster_id or grievance_id
+            for band , key in enumerate(_bands(sig)):
+                index.buckets[band][key].add(grievance_id)
+
+    def remove(self , village_id : int , grievance_id : int):
+
+        with self._lock:
+            index = self._villages.get(village_id)
+
+            if not index or grievance_id not in index.signatures:
+                return
+
+            sig = index.signatures.pop(grievance_id)
+            index.clusters.pop(grievance_id , None)
+            for band , key in enumerate(_bands(sig)):
+                bucket = index.buckets[band].get(key)
+                if bucket:
+                    bucket.discard(grievance_id)
+                    if not bucket:
+                        del index.buckets[band][key]
+
+    def reassign_cluster(self , village_id : int , old_root : int , new_root : int):
+
+        with self._lock:
+            index = self._villages.get(village_id)
+
+            if not index:
+                return
+
+            for grievance_id , root in index.clusters.items():
+                if root == old_root:
+                    index.clusters[grievance_id] = new_root
+
+    def warm(self , session_factory , chunk_size : int = 1000):
+
+        """
+        Index every open / in progress grievance. Runs in a background thread at startup;
+        submissions made meanwhile are indexed normally.
+        """
+
+        db = session_factory()
+
+        try:
+            rows = (db.query(Grievance.id , Grievance.village_id , Grievance.title , Grievance.description , Grievance.duplicate_of)
+                      .filter(Grievance.status.in_([GrievanceStatusEnum.open , GrievanceStatusEnum.in_progress]))
+                      .yield_per(chunk_size))
+
+            count = 0
+            for grievance_id , village_id , title , description , duplicate_of in rows:
+                self.add(village_id , grievance_id , signature(grievance_text(title , description)) , duplicate_of)
+                count += 1
+
+            logger.info(f"Duplicate index warmed | {count} open grievances")
+
+        except Exception:
+            logger.exception("Duplicate index warm-up failed")
+
+        finally:
+            db.close()
+
+
+duplicate_index = DuplicateIndex()
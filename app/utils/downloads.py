@@ -0,0 +1,155 @@
+import mimetypes
+import os
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import quote
+from fastapi import Request , Response
+from fastapi.responses import FileResponse , RedirectResponse
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.document import Document , DocumentBlob , PreviewStatusEnum
+from app.utils.cache_bus import LocalCache , registry
+from app.utils.etag import etag_matches
+from app.utils.exception import NotFoundException
+from app.utils.storage import get_storage , run
+
+# a document's bytes never change (content addressed), only its title --> cache for a year
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+@dataclass(frozen=True)
+class DownloadInfo:
+    key : str                                            # storage key
+    etag : str
+    filename : str
+    media_type : str
+    content_hash : str = None
+    preview_ready : bool = False
+
+
+# document id --> what to send, evicted by document:{id} on update / delete / preview ready
+# --> a conditional download with a known ETag costs no query at all
+
+downloads = registry.register("document:" , LocalCache("document_downloads"))
+
+
+def _filename(title : str , key : str) -> str:
+
+    # "Budget Report 2024-25" + ".pdf" --> "Budget_Report_2024-25.pdf"
+
+    stem = re.sub(r"[^\w.-]+" , "_" , title).strip("_") or "document"
+
+    return f"{stem[:80]}{Path(key).suffix}"
+
+
+def _legacy_key(file_url : str):
+
+    # uploaded before content hashing: file_url is a local path under STORAGE_LOCAL_ROOT
+
+    try:
+        return Path(file_url).relative_to(settings.STORAGE_LOCAL_ROOT).as_posix()
+    except ValueError:
+        return None
+
+
+def _load(db : Session , document_id : int):
+
+    row = (db.query(Document.file_url , Document.content_hash , Document.title , DocumentBlob.path , DocumentBlob.preview_status)
+             .outerjoin(DocumentBlob , DocumentBlob.sha256 == Document.content_hash)
+             .filter(Document.id == document_id).first())
+
+    if row is None:
+        return None
+
+    file_url , content_hash , title , blob_key , preview_status = row
+
+    if content_hash:
+        if blob_key is None:
+            return None                                  # blob row missing (drift) --> 404, not a 500 on key None
+        key = blob_key
+        etag = f'"{content_hash}"'                       # strong: same bytes <=> same hash
+    else:
+        # uploaded before content hashing --> derived from the file itself
+        key = _legacy_key(file_url)
+        path = get_storage().local_path(key) if key else None
+        if path is None:
+            return None
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        etag = f'"{document_id}-{stat.st_size}-{int(stat.st_mtime)}"'
+
+    return DownloadInfo(key=key , etag=etag , filename=_filename(title , key) ,
+                        media_type=mimetypes.guess_type(key)[0] or "application/octet-stream" , content_hash=content_hash ,
+                        preview_ready=preview_status == PreviewStatusEnum.ready)
+
+
+def download_info(db : Session , document_id : int):
+
+    return downloads.get_or_load(f"document:{document_id}" , lambda: _load(db , document_id))
+
+
+def download_response(request : Request , info : DownloadInfo) -> Response:
+
+    """
+    Serve a stored document file.
+    - If-None-Match with the current ETag --> 304 (no storage access)
+    - object storage (s3) --> 307 to a presigned URL, the client downloads from the object store
+      (Range included) and the API worker only signs
+    - Range / If-Range --> 206 partial content (resumable downloads), handled by FileResponse
+    - DOCUMENT_ACCEL_REDIRECT_PREFIX set --> X-Accel-Redirect, nginx sends the file with sendfile
+    - otherwise FileResponse, zero-copy when the ASGI server supports http.response.pathsend
+    """
+
+    headers = {"ETag" : info.etag , "Cache-Control" : IMMUTABLE}
+
+    if etag_matches(request , info.etag):
+        stats.record("not_modified")
+        return Response(status_code=304 , headers=headers)
+
+    storage = get_storage()
+
+    url = run(storage.presigned_url(info.key , filename=info.filename , media_type=info.media_type))
+
+    if url is not None:
+        stats.record("presigned")
+        # the redirect may be reused while the signature is still valid
+        return RedirectResponse(url , status_code=307 , headers={"Cache-Control" : f"private, max-age={settings.S3_PRESIGN_SECONDS // 2}"})
+
+    if settings.DOCUMENT_ACCEL_REDIRECT_PREFIX:
+        stats.record("accel_redirect")
+        headers["X-Accel-Redirect"] = settings.DOCUMENT_ACCEL_REDIRECT_PREFIX.rstrip("/") + "/" + info.key
+        headers["Content-Disposition"] = f"attachment; filename*=utf-8''{quote(info.filename)}"
+        return Response(media_type=info.media_type , headers=headers)
+
+    if_range = request.headers.get("if-range")
+    path = storage.local_path(info.key)
+
+    # row without its file (deleted by hand, restored backup) --> 404 instead of a 500 while streaming
+    if not os.path.isfile(path):
+        raise NotFoundException("File not found")
+
+    stats.record("partial" if request.headers.get("range") and if_range in (None , info.etag) else "full")
+
+    return FileResponse(path , media_type=info.media_type , filename=info.filename , headers=headers)
+
+
+class DownloadStats:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {"full" : 0 , "partial" : 0 , "not_modified" : 0 , "accel_redirect" : 0 , "presigned" : 0}
+
+    def record(self , kind : str):
+        with self._lock:
+            self.counts[kind] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self.counts)
+
+
+stats = DownloadStats()
@@ -0,0 +1,168 @@
+import threading
+import time
+from collections import OrderedDict
+from fastapi import Request , Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models.resource_version import ResourceVersion
+from app.utils.aggregates import upsert_increment
+from app.utils.cache_bus import LocalCache , registry , invalidate
+
+
+#------------------------------- Versions -------------------------------
+
+# version of every resource key this worker has served, evicted through the cache bus
+# --> a 304 costs no query at all until the resource changes
+
+versions = registry.register("" , LocalCache("resource_versions"))
+
+
+def bump_version(db : Session , key : str):
+
+    """
+    Mark a resource as changed. Call before db.commit() in the mutating route
+    so the new version becomes visible together with the write.
+    """
+
+    upsert_increment(db , ResourceVersion , {"key" : key} , version=1)
+
+    invalidate(db , key)
+
+
+def bump_versions(db : Session , keys : list):
+
+    """
+    bump_version for many keys at once (e.g. a broadcast to every village of a district):
+    one UPDATE for the existing counters and one batched INSERT for the new ones.
+    """
+
+    keys = sorted(set(keys))
+
+    if not keys:
+        return
+
+    existing = {key for (key ,) in db.query(ResourceVersion.key).filter(ResourceVersion.key.in_(keys))}
+
+    if existing:
+        db.query(ResourceVersion).filter(ResourceVersion.key.in_(existing)).update(
+                                    {ResourceVersion.version : ResourceVersion.version + 1} , synchronize_session=False)
+
+    missing = [key for key in keys if key not in existing]
+
+    if missing:
+        # another request created some of them meanwhile --> per key upsert for this batch
+        try:
+            with db.begin_nested():
+                db.execute(insert(ResourceVersion) , [{"key" : key , "version" : 1} for key in missing])
+        except IntegrityError:
+            for key in missing:
+                upsert_increment(db , ResourceVersion , {"key" : key} , version=1)
+
+    invalidate(db , *keys)
+
+
+def current_etag(request : Request , db : Session , key : str , *variant) -> str:
+
+    """
+    Build the ETag of a resource from its version counter (one primary key read, cached per worker).
+    variant --> query params that change the body, e.g. limit.
+    """
+
+    request.state.etag_started = time.perf_counter()
+
+    version = versions.get_or_load(key , lambda: db.query(ResourceVersion.version).filter(ResourceVersion.key == key).scalar() or 0)
+
+    suffix = "".join(f"-{v}" for v in variant)
+
+    return f'W/"{key.replace(":" , "-")}-v{version}{suffix}"'
+
+
+def etag_matches(request : Request , etag : str) -> bool:
+
+    # If-None-Match may hold several tags, or "*"
+
+    header = request.headers.get("if-none-match")
+
+    if not header:
+        return False
+
+    tags = [tag.strip() for tag in header.split(",")]
+
+    return "*" in tags or etag in tags or etag.removeprefix("W/") in tags
+
+
+#------------------------------- Responses -------------------------------
+
+def not_modified(request : Request , etag : str) -> Response:
+
+    stats.record_not_modified(request , etag)
+
+    return Response(status_code=304 , headers={"ETag" : etag , "Cache-Control" : "no-cache"})
+
+
+def etag_response(request : Request , content , etag : str) -> JSONResponse:
+
+    response = JSONResponse(content=jsonable_encoder(content) , headers={"ETag" : etag , "Cache-Control" : "no-cache"})
+
+    stats.record_full(request , etag , len(response.body))
+
+    return response
+
+
+#------------------------------- Metrics -------------------------------
+
+class ConditionalGetStats:
+
+    """
+    Counts full vs 304 responses, bytes saved and time spent on each path.
+    Bytes saved = size of the body we last sent for that ETag.
+    """
+
+    MAX_TRACKED = 10_000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._body_sizes = OrderedDict()
+        self.full = 0
+        self.not_modified = 0
+        self.bytes_sent = 0
+        self.bytes_saved = 0
+        self.full_ms = 0.0
+        self.not_modified_ms = 0.0
+
+    def _elapsed_ms(self , request : Request) -> float:
+        started = getattr(request.state , "etag_started" , None)
+        return (time.perf_counter() - started) * 1000 if started else 0.0
+
+    def record_full(self , request : Request , etag : str , size : int):
+        with self._lock:
+            self.full += 1
+            self.bytes_sent += size
+            self.full_ms += self._elapsed_ms(request)
+            self._body_sizes[etag] = size
+            self._body_sizes.move_to_end(etag)
+            if len(self._body_sizes) > self.MAX_TRACKED:
+                self._body_sizes.popitem(last=False)
+
+    def record_not_modified(self , request : Request , etag : str):
+        with self._lock:
+            self.not_modified += 1
+            self.bytes_saved += self._body_sizes.get(etag , 0)
+            self.not_modified_ms += self._elapsed_ms(request)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "full_responses": self.full,
+                "not_modified_responses": self.not_modified,
+                "bytes_sent": self.bytes_sent,
+                "bytes_saved": self.bytes_saved,
+                "avg_full_ms": round(self.full_ms / self.full , 3) if self.full else 0.0,
+                "avg_not_modified_ms": round(self.not_modified_ms / self.not_modified , 3) if self.not_modified else 0.0,
+            }
+
+
+stats = ConditionalGetStats()
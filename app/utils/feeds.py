@@ -0,0 +1,98 @@
+import json
+from collections import defaultdict
+from datetime import datetime , timezone
+from sqlalchemy import or_ , func
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.announcement import Announcement
+from app.schema.announcement import AnnouncementResponse
+from app.utils.cache_bus import LocalCache , registry
+
+
+# one entry per village, keyed like the bus key --> any announcement write anywhere evicts it
+
+feeds = registry.register("announcements:" , LocalCache("announcement_feeds" , settings.ANNOUNCEMENT_FEED_VILLAGES))
+
+
+def visible(now : datetime = None):
+
+    # published (no publish_at or already due) and not expired --> what citizens may see
+
+    now = now or datetime.now(timezone.utc)
+
+    return [or_(Announcement.publish_at.is_(None) , Announcement.publish_at <= now),
+            or_(Announcement.expires_at.is_(None) , Announcement.expires_at > now)]
+
+
+def newest_first():
+
+    # a scheduled announcement ranks by when it went live, not when it was written
+
+    return [func.coalesce(Announcement.publish_at , Announcement.created_at).desc() , Announcement.id.desc()]
+
+
+def _render(items : list) -> bytes:
+
+    # same encoding as JSONResponse
+
+    return json.dumps(items , ensure_ascii=False , separators=(",", ":")).encode("utf-8")
+
+
+class VillageFeed:
+
+    """
+    Latest ANNOUNCEMENT_FEED_SIZE visible announcements of a village, newest first, already serialized.
+    Scheduled / expiring items change visibility without a write --> the scheduler evicts the feed.
+    complete=False when the village has more announcements than the feed holds;
+    full listings then fall back to the database, latest N is still served from here.
+    """
+
+    __slots__ = ("items" , "complete" , "rendered" , "by_type" , "rendered_by_type")
+
+    def __init__(self , items : list , complete : bool):
+        self.items = items
+        self.complete = complete
+        self.rendered = _render(items)
+
+        self.by_type = defaultdict(list)
+        for item in items:
+            self.by_type[item["type"]].append(item)
+
+        self.rendered_by_type = {ann_type : _render(typed) for ann_type , typed in self.by_type.items()}
+
+    def latest(self , limit : int):
+        return self.items[:limit] if limit <= len(self.items) or self.complete else None
+
+    def of_type(self , ann_type : str) -> bytes:
+        return self.rendered_by_type.get(ann_type , b"[]")
+
+
+def _key(village_id : int) -> str:
+    return f"announcements:{village_id}"
+
+
+def _load(db : Session , village_id : int) -> VillageFeed:
+
+    rows = (db.query(Announcement).filter(Announcement.village_id == village_id , *visible())
+              .order_by(*newest_first())
+              .limit(settings.ANNOUNCEMENT_FEED_SIZE + 1).all())
+
+    items = [AnnouncementResponse.model_validate(a).model_dump(mode="json") for a in rows[:settings.ANNOUNCEMENT_FEED_SIZE]]
+
+    return VillageFeed(items , complete=len(rows) <= settings.ANNOUNCEMENT_FEED_SIZE)
+
+
+def village_feed(db : Session , village_id : int) -> VillageFeed:
+
+    return feeds.get_or_load(_key(village_id) , lambda: _load(db , village_id))
+
+
+def refresh_village_feed(db : Session , village_id : int):
+
+    """
+    Write-through: rebuild the feed right after an announcement write commits,
+    so readers of this worker never pay the query. Other workers are evicted by the bus
+    and rebuild on their next read.
+    """
+
+    feeds.load(_key(village_id) , lambda: _load(db , village_id))
@@ -1,20 +1,90 @@
-import uuid
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
 from pathlib import Path
 from fastapi  import UploadFile
-  
+
 UPLOAD_DIR = Path("uploads/documents")
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)  
+UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+
+CHUNK_SIZE = 256 * 1024           # 256 KB per read / write
+
+# accepted document types --> extension of the stored file (the same whatever the uploader named it)
+DOCUMENT_TYPES = {
+    "application/pdf" : ".pdf",
+    "application/msword" : ".doc",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document" : ".docx",
+    "application/vnd.ms-excel" : ".xls",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet" : ".xlsx",
+    "image/jpeg" : ".jpg",
+    "image/png" : ".png",
+}
+
+
+class FileTooLarge(Exception):
+    pass
+
+
+@dataclass
+class StoredFile:
+    path : str
+    size : int
+    sha256 : str
+
+
+def spool_upload(file : UploadFile , max_bytes : int = None) -> StoredFile:
+
+    """
+    Copy an uploaded file to a temp file in UPLOAD_DIR chunk by chunk.
+    - never holds more than CHUNK_SIZE of the file in memory (the upload itself is spooled to disk by Starlette)
+    - stops with FileTooLarge as soon as max_bytes is passed, the partial file is removed
+    - SHA-256 is computed during the same pass --> the caller decides where the content goes (storage key)
+    Blocking I/O: call from a sync route (threadpool) or through run_in_threadpool.
+    """
+
+    digest = hashlib.sha256()
+    size = 0
+
+    fd , tmp_path = tempfile.mkstemp(dir=UPLOAD_DIR , prefix=".upload-" , suffix=".part")
+
+    try:
+        with os.fdopen(fd , "wb") as buffer:
+            file.file.seek(0)
+            while chunk := file.file.read(CHUNK_SIZE):
+                size += len(chunk)
+                if max_bytes is not None and size > max_bytes:
+                    raise FileTooLarge(f"File larger than {max_bytes} bytes")
+                digest.update(chunk)
+                buffer.write(chunk)
+
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    return StoredFile(path=tmp_path , size=size , sha256=digest.hexdigest())
+
+
+def blob_key(sha256 : str , content_type : str = None) -> str:
+
+    # content addressed storage key: documents/ab/abcd...ef.pdf (two level fan-out keeps directories small)
+    # extension from the content type, not the filename --> "Report.PDF" and "report.pdf" give the same key
+
+    ext = DOCUMENT_TYPES.get(content_type , "")
+
+    return f"documents/{sha256[:2]}/{sha256}{ext}"
+
+
+def preview_key(sha256 : str) -> str:
+
+    # one preview per content, next to the blobs: documents/previews/ab/abcd...ef.webp
+
+    return f"documents/previews/{sha256[:2]}/{sha256}.webp"
 
 
-def save_locally_documents(file : UploadFile) -> str:
-    
-    ext = Path(file.filename).suffix         # extract the last part of file like parveen.xls (xls)
-    
-    filename = f"{uuid.uuid4()}{ext}"        # unique name to file so that not collide
-    
-    filepath = UPLOAD_DIR / filename
-    
-    with open(filepath, "wb") as buffer:
-        buffer.write(file.file.read())
+def discard_file(path : str):
 
-    return str(filepath)
\ No newline at end of file
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,421 @@
+import abc
+import asyncio
+import json
+import os
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime , timezone , timedelta
+from sqlalchemy import or_ , and_ , func
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.notification import NotificationJob , NotificationJobStatusEnum
+from app.models.user import User
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+SMS_MAX_CHARS = 320           # two SMS segments
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+#------------------------------- Gateways -------------------------------
+
+class GatewayError(Exception):
+
+    # retryable --> timeouts, 5xx, throttling; otherwise the message is counted as failed at once
+
+    def __init__(self , detail : str , retryable : bool = True):
+        super().__init__(detail)
+        self.retryable = retryable
+
+
+class Gateway(abc.ABC):
+
+    """
+    Where messages leave the system (SMS provider, push service ...).
+    send() raises GatewayError on failure; it must be safe to call concurrently.
+    """
+
+    name = "base"
+
+    @abc.abstractmethod
+    async def send(self , phone : str , message : str):
+        ...
+
+    async def close(self):
+        pass
+
+
+class FileGateway(Gateway):
+
+    """
+    Local stand-in: appends one JSON line per message to a file.
+    Example line: {"to": "9876543210", "message": "...", "sent_at": "..."}
+    """
+
+    name = "file"
+
+    def __init__(self , path : str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or "." , exist_ok=True)
+        self._file = open(path , "a" , encoding="utf-8" , buffering=1)      # line buffered --> tail -f friendly
+        self._lock = threading.Lock()
+
+    async def send(self , phone : str , message : str):
+        line = json.dumps({"to" : phone , "message" : message , "sent_at" : _now().isoformat()} , ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+
+    async def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class HttpGateway(Gateway):
+
+    """
+    Generic HTTP stand-in: POST {"to", "message"} as JSON to a URL (a provider mock, a webhook ...).
+    Runs urllib in threads so sends overlap; 5xx / 429 / network errors are retried, other 4xx are not.
+    """
+
+    name = "http"
+
+    def __init__(self , url : str , timeout : float = 10.0):
+        self.url = url
+        self.timeout = timeout
+
+    def _post(self , body : bytes):
+        request = urllib.request.Request(self.url , data=body , headers={"Content-Type" : "application/json"} , method="POST")
+        try:
+            with urllib.request.urlopen(request , timeout=self.timeout) as response:
+                response.read()
+        except urllib.error.HTTPError as e:
+            raise GatewayError(f"HTTP {e.code}" , retryable=e.code >= 500 or e.code == 429)
+        except (urllib.error.URLError , TimeoutError , ConnectionError) as e:
+            raise GatewayError(str(e))
+
+    async def send(self , phone : str , message : str):
+        body = json.dumps({"to" : phone , "message" : message}).encode()
+        await asyncio.to_thread(self._post , body)
+
+
+def build_gateway() -> Gateway:
+
+    if settings.NOTIFY_GATEWAY == "http":
+        return HttpGateway(settings.NOTIFY_GATEWAY_URL)
+
+    return FileGateway(settings.NOTIFY_FILE_PATH)
+
+
+#------------------------------- Rate limit -------------------------------
+
+class RateLimiter:
+
+    # evenly spaced send slots --> never more than rate messages per second towards the gateway
+
+    def __init__(self , rate : float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = time.monotonic()
+
+    async def wait(self):
+        now = time.monotonic()
+        slot = max(self._next , now)
+        self._next = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+#------------------------------- Metrics -------------------------------
+
+class NotificationStats:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.jobs_done = 0
+        self.jobs_failed = 0
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.busy_seconds = 0.0
+        self.last_job_rate = 0.0
+
+    def record_job(self , sent : int , failed : int , seconds : float , ok : bool):
+        with self._lock:
+            self.sent += sent
+            self.failed += failed
+            self.busy_seconds += seconds
+            self.last_job_rate = round(sent / seconds , 2) if seconds else 0.0
+            if ok:
+                self.jobs_done += 1
+            else:
+                self.jobs_failed += 1
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "gateway": settings.NOTIFY_GATEWAY,
+                "jobs_done": self.jobs_done,
+                "jobs_failed": self.jobs_failed,
+                "messages_sent": self.sent,
+                "messages_failed": self.failed,
+                "retries": self.retries,
+                "messages_per_second": round(self.sent / self.busy_seconds , 2) if self.busy_seconds else 0.0,
+                "last_job_messages_per_second": self.last_job_rate,
+            }
+
+
+stats = NotificationStats()
+
+
+#------------------------------- Enqueue -------------------------------
+
+def alert_message(title : str , content : str) -> str:
+
+    message = f"{title}: {content}"
+
+    return message if len(message) <= SMS_MAX_CHARS else message[:SMS_MAX_CHARS - 1] + "…"
+
+
+def enqueue_notification(db : Session , village_id : int , message : str , ward_number : int = None ,
+                         announcement_id : int = None , not_before : datetime = None) -> NotificationJob:
+
+    """
+    Queue a fan-out to every active resident of a village (or one ward).
+    Call before db.commit() so the job exists only if the triggering write commits,
+    then notifier.wake() after the commit.
+    """
+
+    job = NotificationJob(village_id=village_id , ward_number=ward_number , announcement_id=announcement_id ,
+                          message=message , not_before=not_before , status=NotificationJobStatusEnum.pending)
+
+    db.add(job)
+
+    return job
+
+
+#------------------------------- Worker -------------------------------
+
+class NotificationWorker:
+
+    """
+    Background delivery of notification jobs, one asyncio loop on its own thread per app worker.
+    - claims one job at a time with a lease (SKIP LOCKED on Postgres), so several app workers share the queue
+    - walks recipients in batches of NOTIFY_BATCH_SIZE with a keyset on users.id
+    - sends a batch concurrently (NOTIFY_CONCURRENCY) under a rate limit, retrying transient gateway errors
+    - checkpoints the cursor and counters after every batch; a crashed job is resumed when its lease expires
+    - a job that fails goes back to pending with a not_before NOTIFY_JOB_RETRY_SECONDS away, doubled per attempt
+    Wakes up on wake() and otherwise every NOTIFY_POLL_SECONDS (jobs of other workers, scheduled jobs).
+    """
+
+    def __init__(self):
+        self.worker_id = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._session_factory = None
+        self._gateway = None
+
+    def start(self , session_factory , gateway : Gateway = None):
+
+        self._session_factory = session_factory
+        self._gateway = gateway
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+        threading.Thread(target=lambda: asyncio.run(self._main()) , daemon=True , name="notification-worker").start()
+
+    def stop(self):
+
+        self._stop.set()
+        self._wake.set()
+
+    def wake(self):
+
+        self._wake.set()
+
+    #------------------------------- queue -------------------------------
+
+    def _claimable(self , now : datetime):
+
+        return and_(or_(NotificationJob.not_before.is_(None) , NotificationJob.not_before <= now),
+                    or_(NotificationJob.status == NotificationJobStatusEnum.pending,
+                        and_(NotificationJob.status == NotificationJobStatusEnum.running , NotificationJob.lease_expires_at < now)))
+
+    def _claim(self , db : Session):
+
+        now = _now()
+
+        job_id = (db.query(NotificationJob.id).filter(self._claimable(now))
+                    .order_by(NotificationJob.id).limit(1).with_for_update(skip_locked=True).scalar())
+
+        if job_id is None:
+            db.rollback()
+            return None
+
+        # guarded update --> only one worker wins even without row locks (SQLite)
+
+        claimed = db.query(NotificationJob).filter(NotificationJob.id == job_id , self._claimable(now)).update({
+            NotificationJob.status : NotificationJobStatusEnum.running,
+            NotificationJob.claimed_by : self.worker_id,
+            NotificationJob.lease_expires_at : now + timedelta(seconds=settings.NOTIFY_LEASE_SECONDS),
+            NotificationJob.attempts : NotificationJob.attempts + 1,
+            NotificationJob.started_at : func.coalesce(NotificationJob.started_at , now),
+        } , synchronize_session=False)
+
+        db.commit()
+
+        return db.get(NotificationJob , job_id) if claimed else None
+
+    def _recipients(self , db : Session , village_id : int , ward_number : int , after_id : int):
+
+        query = db.query(User.id , User.phone).filter(User.village_id == village_id , User.is_active.isnot(False) ,
+                                                      User.id > after_id)
+
+        if ward_number is not None:
+            query = query.filter(User.ward_number == ward_number)
+
+        return query.order_by(User.id).limit(settings.NOTIFY_BATCH_SIZE).all()
+
+    def _checkpoint(self , db : Session , job_id : int , last_user_id : int , sent : int , failed : int) -> bool:
+
+        # False --> the lease was lost (expired and taken by another worker), stop here
+
+        updated = db.query(NotificationJob).filter(NotificationJob.id == job_id , NotificationJob.claimed_by == self.worker_id).update({
+            NotificationJob.last_user_id : last_user_id,
+            NotificationJob.sent_count : NotificationJob.sent_count + sent,
+            NotificationJob.failed_count : NotificationJob.failed_count + failed,
+            NotificationJob.lease_expires_at : _now() + timedelta(seconds=settings.NOTIFY_LEASE_SECONDS),
+        } , synchronize_session=False)
+
+        db.commit()
+
+        return bool(updated)
+
+    def _finish(self , db : Session , job_id : int , status , error : str = None , not_before : datetime = None):
+
+        values = {
+            NotificationJob.status : status,
+            NotificationJob.error : error,
+            NotificationJob.finished_at : _now(),
+            NotificationJob.lease_expires_at : None,
+        }
+
+        # back to pending --> not claimable again before not_before
+        if not_before is not None:
+            values[NotificationJob.not_before] = not_before
+
+        db.query(NotificationJob).filter(NotificationJob.id == job_id , NotificationJob.claimed_by == self.worker_id).update(
+            values , synchronize_session=False)
+
+        db.commit()
+
+    #------------------------------- sending -------------------------------
+
+    async def _deliver(self , semaphore , limiter : RateLimiter , phone : str , message : str) -> bool:
+
+        async with semaphore:
+            for attempt in range(1 , settings.NOTIFY_MAX_ATTEMPTS + 1):
+                await limiter.wait()
+                try:
+                    await self._gateway.send(phone , message)
+                    return True
+
+                except GatewayError as e:
+                    if not e.retryable or attempt == settings.NOTIFY_MAX_ATTEMPTS:
+                        logger.warning(f"Notification | giving up on {phone} | {e}")
+                        return False
+                    stats.record_retry()
+                    await asyncio.sleep(settings.NOTIFY_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+
+                except Exception:
+                    logger.exception(f"Notification | gateway crashed for {phone}")
+                    return False
+
+    async def _run_job(self , db : Session , job : NotificationJob):
+
+        semaphore = asyncio.Semaphore(settings.NOTIFY_CONCURRENCY)
+        limiter = RateLimiter(settings.NOTIFY_RATE_PER_SECOND)
+
+        job_id , message , cursor = job.id , job.message , job.last_user_id
+        village_id , ward_number , attempts = job.village_id , job.ward_number , job.attempts
+        sent_total = failed_total = 0
+        started = time.perf_counter()
+
+        try:
+            while not self._stop.is_set():
+                batch = self._recipients(db , village_id , ward_number , cursor)
+                db.rollback()                       # do not hold a transaction open while sending
+
+                if not batch:
+                    self._finish(db , job_id , NotificationJobStatusEnum.done)
+                    break
+
+                results = await asyncio.gather(*[self._deliver(semaphore , limiter , phone , message) for _ , phone in batch])
+
+                sent = sum(results)
+                failed = len(results) - sent
+                sent_total += sent
+                failed_total += failed
+                cursor = batch[-1][0]
+
+                if not self._checkpoint(db , job_id , cursor , sent , failed):
+                    logger.warning(f"Notification | job {job_id} lease lost, another worker continues")
+                    break
+
+            ok = True
+
+        except Exception as e:
+            logger.exception(f"Notification | job {job_id} failed")
+            db.rollback()
+            if attempts >= settings.NOTIFY_MAX_ATTEMPTS:
+                self._finish(db , job_id , NotificationJobStatusEnum.failed , str(e)[:500])
+            else:
+                # retried later, the delay doubling per attempt --> a broken gateway / database is not hammered
+                retry_at = _now() + timedelta(seconds=settings.NOTIFY_JOB_RETRY_SECONDS * 2 ** (attempts - 1))
+                self._finish(db , job_id , NotificationJobStatusEnum.pending , str(e)[:500] , not_before=retry_at)
+            ok = False
+
+        seconds = time.perf_counter() - started
+        stats.record_job(sent_total , failed_total , seconds , ok)
+
+        logger.info(f"Notification | job {job_id} | sent {sent_total} failed {failed_total} in {seconds:.1f}s "
+                    f"({sent_total / seconds if seconds else 0:.1f} msg/s)")
+
+    async def _main(self):
+
+        if self._gateway is None:
+            self._gateway = build_gateway()
+
+        logger.info(f"Notification worker started | gateway={self._gateway.name} worker={self.worker_id}")
+
+        while not self._stop.is_set():
+            db = self._session_factory()
+
+            try:
+                job = self._claim(db)
+
+                if job is not None:
+                    await self._run_job(db , job)
+                    continue                        # more jobs may be waiting
+
+            except Exception:
+                logger.exception("Notification worker | queue error")
+
+            finally:
+                db.close()
+
+            await asyncio.to_thread(self._wake.wait , settings.NOTIFY_POLL_SECONDS)
+            self._wake.clear()
+
+        await self._gateway.close()
+
+
+notifier = NotificationWorker()
@@ -0,0 +1,43 @@
+import base64
+import json
+from app.utils.exception import BadRequestException
+
+
+# Opaque keyset cursors --> base64 of the sort values of the last row on the page.
+# Example: encode_cursor(rank=0.42, id=118) -> "eyJyYW5rIjogMC40MiwgImlkIjogMTE4fQ"
+
+def encode_cursor(**values) -> str:
+
+    raw = json.dumps(values , separators=(",", ":") , default=str).encode()
+
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor : str) -> dict:
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError , TypeError):
+        raise BadRequestException("Invalid cursor")
+
+    if not isinstance(values , dict):
+        raise BadRequestException("Invalid cursor")
+
+    return values
+
+
+def cursor_values(cursor : str , **types) -> tuple:
+
+    """
+    Decode a cursor and convert its values, in the order given.
+    Missing or malformed values (a client edited the cursor) --> 400, never a 500 from the query.
+    Example: cursor_values(cursor, rank=float, id=int) -> (0.42, 118)
+    """
+
+    values = decode_cursor(cursor)
+
+    try:
+        return tuple(convert(values[name]) for name , convert in types.items())
+    except (KeyError , TypeError , ValueError):
+        raise BadRequestException("Invalid cursor")
@@ -0,0 +1,177 @@
+import asyncio
+import os
+from datetime import datetime , timezone , timedelta
+from sqlalchemy import or_ , and_ , select , update
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.project import Project , ProjectPhoto , ProjectPhotoStatusEnum
+from app.utils.cache_bus import invalidate
+from app.utils.storage import get_storage , run
+from app.utils.render_pool import fetch_local , scratch_path
+from app.utils.render_jobs import RenderPipeline
+from app.utils.preview_render import render_renditions
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+def photo_key(project_id : int , photo_id : int , rendition : str , ext : str = ".webp") -> str:
+
+    # projects/<project_id>/<photo_id>/<rendition>.webp , the upload itself: .../original.jpg
+    return f"projects/{project_id}/{photo_id}/{rendition}{ext}"
+
+
+def photo_keys(photo) -> list:
+
+    # every stored file of a photo (original + renditions), external photos have none
+    if not photo.original_key:
+        return []
+
+    return [photo.original_key] + [photo_key(photo.project_id , photo.id , name) for name in settings.PROJECT_PHOTO_RENDITIONS]
+
+
+def delete_photo_files(keys : list):
+
+    # after the commit, best effort: a leftover file is never served (no row points at it)
+    if not keys:
+        return
+
+    try:
+        run(get_storage().delete_many(keys))
+    except Exception:
+        logger.exception(f"Project photos | could not delete {len(keys)} files")
+
+
+def refresh_cover(db : Session , project_id : int):
+
+    # cover = first ready photo by position, one UPDATE (no photos loaded)
+    first = (select(ProjectPhoto.id)
+             .where(ProjectPhoto.project_id == project_id , ProjectPhoto.status == ProjectPhotoStatusEnum.ready)
+             .order_by(ProjectPhoto.position , ProjectPhoto.id).limit(1).scalar_subquery())
+
+    db.execute(update(Project).where(Project.id == project_id).values(cover_photo_id=first))
+
+
+async def _put_all(files : dict):
+
+    # renditions of one photo uploaded side by side
+    storage = get_storage()
+    await asyncio.gather(*(storage.put_file(key , path , "image/webp") for key , path in files.items()))
+
+
+class PhotoPipeline(RenderPipeline):
+
+    """
+    Renders project photos into PROJECT_PHOTO_RENDITIONS (WebP) in the render pool.
+    - submit(photo_id) after the upload commits; state lives on project_photos
+    - renditions are uploaded once all of them are rendered, then the photo becomes ready
+      and the project's cover is recomputed
+    Queueing, retries and the result thread: RenderPipeline.
+    """
+
+    name = "photo"
+    title = "Photo pipeline"
+
+    @property
+    def max_attempts(self) -> int:
+        return settings.PROJECT_PHOTO_MAX_ATTEMPTS
+
+    @property
+    def retry_seconds(self) -> float:
+        return settings.PROJECT_PHOTO_RETRY_SECONDS
+
+    def _label(self , photo_id : int) -> str:
+        return f"photo {photo_id}"
+
+    #------------------------------- state -------------------------------
+
+    def _claimable(self , now : datetime):
+
+        stale = now - timedelta(seconds=settings.PROJECT_PHOTO_LEASE_SECONDS)
+
+        return and_(ProjectPhoto.original_key.isnot(None),
+                    or_(ProjectPhoto.status == ProjectPhotoStatusEnum.pending,
+                        and_(ProjectPhoto.status == ProjectPhotoStatusEnum.failed , ProjectPhoto.attempts < settings.PROJECT_PHOTO_MAX_ATTEMPTS),
+                        and_(ProjectPhoto.status == ProjectPhotoStatusEnum.processing , ProjectPhoto.updated_at < stale)))
+
+    def _pending(self , db : Session) -> list:
+
+        return [photo_id for (photo_id ,) in db.query(ProjectPhoto.id).filter(self._claimable(datetime.now(timezone.utc))).all()]
+
+    def _claim(self , db : Session , photo_id : int):
+
+        # returns (project_id , original key) if this worker won the job
+
+        now = datetime.now(timezone.utc)
+
+        claimed = db.query(ProjectPhoto).filter(ProjectPhoto.id == photo_id , self._claimable(now)).update({
+            ProjectPhoto.status : ProjectPhotoStatusEnum.processing,
+            ProjectPhoto.attempts : ProjectPhoto.attempts + 1,
+            ProjectPhoto.updated_at : now,
+        } , synchronize_session=False)
+
+        db.commit()
+
+        if not claimed:
+            return None
+
+        return db.query(ProjectPhoto.project_id , ProjectPhoto.original_key).filter(ProjectPhoto.id == photo_id).first()
+
+    #------------------------------- render -------------------------------
+
+    def _render(self , photo_id : int , job) -> tuple:
+
+        project_id , key = job
+
+        src_path , src_tmp = fetch_local(key , prefix=".photo")
+        dst_prefix = scratch_path("")
+
+        return (render_renditions , (os.path.abspath(src_path) , os.path.abspath(dst_prefix) ,
+                                     dict(settings.PROJECT_PHOTO_RENDITIONS) , settings.PROJECT_PHOTO_QUALITY) ,
+                [src_tmp] + [f"{dst_prefix}-{name}.webp" for name in settings.PROJECT_PHOTO_RENDITIONS])
+
+    def _rendition_files(self , photo_id : int , project_id : int , result) -> dict:
+        return {photo_key(project_id , photo_id , name) : path for name , path in result["renditions"].items()}
+
+    def _store(self , photo_id : int , job , scratch : list , result):
+
+        run(_put_all(self._rendition_files(photo_id , job[0] , result)))
+
+    def _finish(self , photo_id : int , job , ok : bool , result):
+
+        status = ProjectPhotoStatusEnum.ready if ok else ProjectPhotoStatusEnum.failed
+
+        values = {ProjectPhoto.status : status , ProjectPhoto.updated_at : datetime.now(timezone.utc)}
+
+        if ok:
+            values[ProjectPhoto.width] = result["width"]
+            values[ProjectPhoto.height] = result["height"]
+
+        db = self._session_factory()
+
+        try:
+            row = db.query(ProjectPhoto.attempts , Project.id , Project.village_id).join(Project , Project.id == ProjectPhoto.project_id).filter(ProjectPhoto.id == photo_id).first()
+
+            if row is None:
+                # photo deleted while it was rendering --> its renditions were uploaded after the delete cleaned up
+                db.rollback()
+                delete_photo_files(list(self._rendition_files(photo_id , job[0] , result)) if result else [])
+                return None
+
+            attempts , project_id , village_id = row
+
+            db.query(ProjectPhoto).filter(ProjectPhoto.id == photo_id).update(values , synchronize_session=False)
+
+            if ok:
+                refresh_cover(db , project_id)
+                invalidate(db , f"projects:{village_id}")       # cover_thumbnail_url in the project lists
+
+            db.commit()
+
+        finally:
+            db.close()
+
+        return attempts
+
+
+photos = PhotoPipeline()
@@ -0,0 +1,183 @@
+"""
+Preview rendering and text extraction, run inside the preview process pool.
+Kept free of app imports (settings, database ...) so spawned worker processes start fast.
+"""
+
+import os
+import zipfile
+from xml.etree import ElementTree
+
+PDF_EXTENSIONS = {".pdf"}
+IMAGE_EXTENSIONS = {".jpg" , ".jpeg" , ".png"}
+TEXT_EXTENSIONS = {".pdf" , ".docx"}
+
+WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+def _save_webp(image , dst_path : str , max_side : int , quality : int):
+
+    from PIL import Image
+
+    image.thumbnail((max_side , max_side) , Image.LANCZOS)
+
+    if image.mode not in ("RGB" , "RGBA"):
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+
+    # temp file + rename --> a retried or concurrent render never leaves a broken preview behind
+    tmp_path = f"{dst_path}.{os.getpid()}.tmp"
+
+    image.save(tmp_path , "WEBP" , quality=quality , method=4)
+    os.replace(tmp_path , dst_path)
+
+
+def render_preview(src_path : str , dst_path : str , max_side : int = 480 , quality : int = 70) -> int:
+
+    """
+    Write a WebP preview of src_path to dst_path: page 1 of a PDF, or the image itself scaled down.
+    Returns the preview size in bytes.
+    """
+
+    os.makedirs(os.path.dirname(dst_path) , exist_ok=True)
+
+    ext = os.path.splitext(src_path)[1].lower()
+
+    if ext in PDF_EXTENSIONS:
+        import pymupdf
+        from PIL import Image
+
+        with pymupdf.open(src_path) as pdf:
+            page = pdf[0]
+            zoom = max_side / max(page.rect.width , page.rect.height)
+            pixmap = page.get_pixmap(matrix=pymupdf.Matrix(zoom , zoom) , alpha=False)
+            image = Image.frombytes("RGB" , (pixmap.width , pixmap.height) , pixmap.samples)
+
+    elif ext in IMAGE_EXTENSIONS:
+        from PIL import Image , ImageOps
+
+        image = Image.open(src_path)
+        image.draft("RGB" , (max_side , max_side))          # JPEG: decode at reduced size, much less memory
+        image = ImageOps.exif_transpose(image)
+
+    else:
+        raise ValueError(f"No preview for {ext} files")
+
+    _save_webp(image , dst_path , max_side , quality)
+
+    return os.path.getsize(dst_path)
+
+
+def _pdf_text(src_path : str , max_chars : int) -> str:
+
+    import pymupdf
+
+    parts , size = [] , 0
+
+    with pymupdf.open(src_path) as pdf:
+        for page in pdf:
+            text = page.get_text()
+            parts.append(text)
+            size += len(text)
+            if size >= max_chars:
+                break
+
+    return "\n".join(parts)
+
+
+def _docx_text(src_path : str , max_chars : int) -> str:
+
+    # a .docx is a zip; the body text is in the <w:t> runs of word/document.xml, one paragraph per <w:p>
+    # streamed with iterparse --> a large document is never held as a full tree
+
+    parts , paragraph , size = [] , [] , 0
+
+    with zipfile.ZipFile(src_path) as archive , archive.open("word/document.xml") as xml:
+        for _ , element in ElementTree.iterparse(xml):
+            if element.tag == WORD_NS + "t" and element.text:
+                paragraph.append(element.text)
+            elif element.tag == WORD_NS + "p":
+                text = "".join(paragraph)
+                paragraph = []
+                element.clear()
+                if text:
+                    parts.append(text)
+                    size += len(text)
+                    if size >= max_chars:
+                        break
+
+    return "\n".join(parts)
+
+
+def extract_text(src_path : str , max_chars : int = 200_000) -> str:
+
+    """
+    Plain text of a PDF (text layer, scanned pages give nothing) or a Word .docx,
+    cut at max_chars. Returns None for other file types.
+    """
+
+    ext = os.path.splitext(src_path)[1].lower()
+
+    if ext == ".pdf":
+        text = _pdf_text(src_path , max_chars)
+    elif ext == ".docx":
+        text = _docx_text(src_path , max_chars)
+    else:
+        return None
+
+    return " ".join(text.split())[:max_chars]          # collapse layout whitespace
+
+
+def process_document(src_path : str , dst_path : str , max_side : int , quality : int , max_chars : int) -> tuple:
+
+    """
+    One pool job per stored file: (preview size in bytes or None , extracted text or None).
+    """
+
+    ext = os.path.splitext(src_path)[1].lower()
+
+    size = render_preview(src_path , dst_path , max_side , quality) if ext in PDF_EXTENSIONS | IMAGE_EXTENSIONS else None
+
+    text = extract_text(src_path , max_chars) if ext in TEXT_EXTENSIONS else None
+
+    return size , text
+
+
+def render_renditions(src_path : str , dst_prefix : str , sizes : dict , quality : int = 80) -> dict:
+
+    """
+    Scaled WebP copies of a photo, one per entry of sizes ({"large": 2048, "thumb": 320} --> longest side).
+    Decoded once (JPEG at reduced size when the largest rendition allows it), each smaller
+    rendition is scaled down from the previous one. Never upscaled.
+    Returns {"width": .., "height": .., "renditions": {name: path}} (width / height of the upright original).
+    """
+
+    from PIL import Image , ImageOps
+
+    largest = max(sizes.values())
+
+    with Image.open(src_path) as opened:
+        original = opened.size
+        opened.draft("RGB" , (largest , largest))
+        drafted = opened.size
+        image = ImageOps.exif_transpose(opened)
+        width , height = original if image.size == drafted else original[::-1]      # rotated by the EXIF orientation
+
+        if image.mode not in ("RGB" , "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+
+        renditions = {}
+
+        for name , side in sorted(sizes.items() , key=lambda item: -item[1]):
+            image = image.copy() if max(image.size) <= side else image.resize(_fit(image.size , side) , Image.LANCZOS)
+            path = f"{dst_prefix}-{name}.webp"
+            image.save(path , "WEBP" , quality=quality , method=4)
+            renditions[name] = path
+
+    return {"width" : width , "height" : height , "renditions" : renditions}
+
+
+def _fit(size : tuple , side : int) -> tuple:
+
+    width , height = size
+    scale = side / max(width , height)
+
+    return max(1 , round(width * scale)) , max(1 , round(height * scale))
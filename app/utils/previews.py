@@ -0,0 +1,148 @@
+import os
+from datetime import datetime , timezone , timedelta
+from pathlib import Path
+from sqlalchemy import or_ , and_
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.document import Document , DocumentBlob , PreviewStatusEnum
+from app.utils.cache_bus import invalidate
+from app.utils.etag import bump_versions
+from app.utils.file_uploads import preview_key
+from app.utils.storage import get_storage , run
+from app.utils.render_pool import fetch_local , scratch_path
+from app.utils.render_jobs import RenderPipeline
+from app.utils.preview_render import process_document , PDF_EXTENSIONS , IMAGE_EXTENSIONS , TEXT_EXTENSIONS
+from app.utils.search import set_document_text
+
+
+def has_preview(path : str) -> bool:
+
+    return Path(path).suffix.lower() in PDF_EXTENSIONS | IMAGE_EXTENSIONS
+
+
+def has_work(path : str) -> bool:
+
+    # a preview and / or text for search
+    return has_preview(path) or Path(path).suffix.lower() in TEXT_EXTENSIONS
+
+
+class PreviewPipeline(RenderPipeline):
+
+    """
+    Generates document previews and extracts PDF / DOCX text for search in the render pool
+    (rendering and parsing are CPU bound and would hold the GIL).
+    - submit(sha256) after the upload commits; state lives on document_blobs
+    - renders read and write local scratch files; with object storage the source is fetched first
+      and the preview uploaded once rendered (put_file --> a retry never sees a half written preview)
+    - when a preview becomes ready, the document lists of every village using it get a new ETag
+    Queueing, retries and the result thread: RenderPipeline.
+    """
+
+    name = "preview"
+    title = "Preview pipeline"
+
+    @property
+    def max_attempts(self) -> int:
+        return settings.PREVIEW_MAX_ATTEMPTS
+
+    @property
+    def retry_seconds(self) -> float:
+        return settings.PREVIEW_RETRY_SECONDS
+
+    def _label(self , sha256 : str) -> str:
+        return sha256[:12]
+
+    #------------------------------- state -------------------------------
+
+    def _claimable(self , now : datetime):
+
+        stale = now - timedelta(seconds=settings.PREVIEW_LEASE_SECONDS)
+
+        return or_(DocumentBlob.preview_status.is_(None),
+                   and_(DocumentBlob.preview_status == PreviewStatusEnum.failed , DocumentBlob.preview_attempts < settings.PREVIEW_MAX_ATTEMPTS),
+                   and_(DocumentBlob.preview_status == PreviewStatusEnum.processing , DocumentBlob.preview_updated_at < stale))
+
+    def _pending(self , db : Session) -> list:
+
+        rows = db.query(DocumentBlob.sha256).filter(DocumentBlob.ref_count > 0 , self._claimable(datetime.now(timezone.utc))).all()
+
+        return [sha256 for (sha256 ,) in rows]
+
+    def _claim(self , db : Session , sha256 : str):
+
+        # returns the source storage key if this worker won the job
+
+        now = datetime.now(timezone.utc)
+
+        blob = db.query(DocumentBlob.path).filter(DocumentBlob.sha256 == sha256).first()
+
+        if blob is None:
+            return None
+
+        status = PreviewStatusEnum.processing if has_work(blob.path) else PreviewStatusEnum.unsupported
+
+        claimed = db.query(DocumentBlob).filter(DocumentBlob.sha256 == sha256 , self._claimable(now)).update({
+            DocumentBlob.preview_status : status,
+            DocumentBlob.preview_attempts : DocumentBlob.preview_attempts + 1,
+            DocumentBlob.preview_updated_at : now,
+        } , synchronize_session=False)
+
+        db.commit()
+
+        return blob.path if claimed and status == PreviewStatusEnum.processing else None
+
+    #------------------------------- render -------------------------------
+
+    def _render(self , sha256 : str , key : str) -> tuple:
+
+        src_path , src_tmp = fetch_local(key)
+        dst_tmp = scratch_path(".webp")
+
+        return (process_document , (os.path.abspath(src_path) , os.path.abspath(dst_tmp) , settings.PREVIEW_MAX_SIDE ,
+                                    settings.PREVIEW_QUALITY , settings.SEARCH_TEXT_MAX_CHARS) , [src_tmp , dst_tmp])
+
+    def _store(self , sha256 : str , key : str , scratch : list , result):
+
+        size , _ = result
+
+        if size is not None:
+            run(get_storage().put_file(preview_key(sha256) , scratch[1] , "image/webp"))
+
+    def _finish(self , sha256 : str , key : str , ok : bool , result):
+
+        # result --> (preview size or None , text or None); ok without a preview --> Word file, only its text was extracted
+
+        size , text = result or (None , None)
+
+        status = (PreviewStatusEnum.ready if size is not None else PreviewStatusEnum.unsupported) if ok else PreviewStatusEnum.failed
+
+        values = {DocumentBlob.preview_status : status , DocumentBlob.preview_updated_at : datetime.now(timezone.utc)}
+
+        if text is not None:
+            values[DocumentBlob.extracted_text] = text
+
+        db = self._session_factory()
+
+        try:
+            db.query(DocumentBlob).filter(DocumentBlob.sha256 == sha256).update(values , synchronize_session=False)
+
+            if text:
+                set_document_text(db , sha256 , text)
+
+            if status == PreviewStatusEnum.ready:
+                # preview_url appears in the document lists --> new ETag for each village using this file
+                documents = db.query(Document.id , Document.village_id).filter(Document.content_hash == sha256).all()
+                bump_versions(db , sorted({f"documents:{village_id}" for _ , village_id in documents}))
+                invalidate(db , *[f"document:{document_id}" for document_id , _ in documents])   # preview route reads preview_ready
+
+            attempts = db.query(DocumentBlob.preview_attempts).filter(DocumentBlob.sha256 == sha256).scalar() or 0
+
+            db.commit()
+
+        finally:
+            db.close()
+
+        return attempts
+
+
+previews = PreviewPipeline()
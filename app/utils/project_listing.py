@@ -0,0 +1,114 @@
+from datetime import datetime
+from sqlalchemy import select , tuple_
+from sqlalchemy.orm import Session
+from app.models.project import Project
+from app.utils.exception import BadRequestException
+from app.utils.pagination import encode_cursor , decode_cursor
+
+
+# sort name --> (column , descending). Every sort ends with id in the same direction, so a page
+# boundary is a single row comparison: (column, id) < (last value, last id).
+# Only non-null columns: a NULL sort value would need its own keyset branch.
+
+SORTS = {
+    "newest" : (Project.id , True),                 # ids follow creation order --> no created_at index needed
+    "oldest" : (Project.id , False),
+    "cost_high" : (Project.estimated_cost , True),
+    "cost_low" : (Project.estimated_cost , False),
+}
+
+
+def project_filters(village_id : int , ward_number : list = None , status : list = None , category : str = None ,
+                    min_cost : float = None , max_cost : float = None , start_from : datetime = None , start_to : datetime = None) -> list:
+
+    """
+    WHERE conditions for the given filters, only the ones that were passed.
+    Plain comparisons on bare columns (no lower() / coalesce()) --> each one can use the
+    (village_id, ...) indexes of Project; several values of one filter become IN (...).
+    """
+
+    if min_cost is not None and max_cost is not None and min_cost > max_cost:
+        raise BadRequestException("min_cost is greater than max_cost")
+
+    if start_from is not None and start_to is not None and start_from > start_to:
+        raise BadRequestException("start_from is after start_to")
+
+    conditions = [Project.village_id == village_id]
+
+    if ward_number:
+        conditions.append(Project.ward_number == ward_number[0] if len(ward_number) == 1 else Project.ward_number.in_(ward_number))
+
+    if status:
+        conditions.append(Project.status == status[0] if len(status) == 1 else Project.status.in_(status))
+
+    if category:
+        conditions.append(Project.category == category)
+
+    if min_cost is not None:
+        conditions.append(Project.estimated_cost >= min_cost)
+
+    if max_cost is not None:
+        conditions.append(Project.estimated_cost <= max_cost)
+
+    if start_from is not None:
+        conditions.append(Project.start_date >= start_from)
+
+    if start_to is not None:
+        conditions.append(Project.start_date <= start_to)
+
+    return conditions
+
+
+def project_listing_query(conditions : list , sort : str = "newest" , cursor : str = None , limit : int = 20):
+
+    # SELECT for one page; also used by app.scripts.explain_projects to check the plans
+
+    if sort not in SORTS:
+        raise BadRequestException(f"sort must be one of: {', '.join(SORTS)}")
+
+    column , descending = SORTS[sort]
+
+    query = select(Project).where(*conditions)
+
+    if cursor:
+        last = decode_cursor(cursor)
+
+        if last.get("sort") != sort:
+            raise BadRequestException("Cursor belongs to a different sort")
+
+        try:
+            if column is Project.id:
+                key , mark = Project.id , int(last["id"])
+            else:
+                key , mark = tuple_(column , Project.id) , tuple_(float(last["value"]) , int(last["id"]))
+        except (KeyError , TypeError , ValueError):
+            raise BadRequestException("Invalid cursor")
+
+        query = query.where(key < mark if descending else key > mark)
+
+    if column is Project.id:
+        order = [Project.id.desc() if descending else Project.id.asc()]
+    else:
+        order = [column.desc() , Project.id.desc()] if descending else [column.asc() , Project.id.asc()]
+
+    return query.order_by(*order).limit(limit + 1)
+
+
+def list_projects(db : Session , conditions : list , sort : str = "newest" , cursor : str = None , limit : int = 20):
+
+    """
+    One page of projects matching conditions (see project_filters).
+    Returns (projects , next_cursor). Keyset pages --> page 50 costs the same as page 1.
+    """
+
+    projects = db.scalars(project_listing_query(conditions , sort , cursor , limit)).all()
+
+    next_cursor = None
+
+    if len(projects) > limit:
+        projects = projects[:limit]
+        column , _ = SORTS[sort]
+        last = projects[-1]
+        next_cursor = encode_cursor(sort=sort , value=getattr(last , column.key) , id=last.id)
+
+    return projects , next_cursor
@@ -0,0 +1,222 @@
+import asyncio
+import itertools
+import json
+import threading
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.utils.cache_bus import bus
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+def village_channel(village_id : int) -> str:
+    return f"village:{village_id}"
+
+
+def user_channel(user_id : int) -> str:
+    return f"user:{user_id}"
+
+
+#------------------------------- Subscription -------------------------------
+
+class Subscription:
+
+    """
+    One connected client. Messages wait in a bounded queue; when the client cannot keep up
+    the queue is emptied and replaced by a single None --> the endpoint closes the stream
+    and the client reconnects and refetches (ETag endpoints make that cheap).
+    """
+
+    def __init__(self , channels : list , queue_size : int):
+        self.channels = channels
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.active = True
+        self.dropped = False
+
+    async def get(self):
+        return await self.queue.get()
+
+
+#------------------------------- Hub -------------------------------
+
+class Hub:
+
+    """
+    In-process fan-out of events to SSE / WebSocket subscribers.
+    Subscriptions live on the event loop; publish() may be called from any thread
+    (sync routes run in the threadpool) and hands delivery over to the loop.
+    Each event is serialized once, whatever the number of subscribers.
+    Every worker has its own hub: writes go through publish(db, ...) below, which reaches the hubs
+    of all workers via the cache bus. hub.publish() alone reaches this worker's subscribers only.
+    """
+
+    def __init__(self , queue_size : int = 100):
+        self.queue_size = queue_size
+        self._loop = None
+        self._channels = defaultdict(set)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.subscribers = 0
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    def bind(self , loop):
+
+        # called from the lifespan --> events are delivered on the server's loop
+
+        self._loop = loop
+
+    # subscribe / unsubscribe / delivery all run on the event loop --> no lock on the channel map
+
+    def subscribe(self , channels : list) -> Subscription:
+
+        subscription = Subscription(channels , self.queue_size)
+
+        for channel in channels:
+            self._channels[channel].add(subscription)
+
+        with self._lock:
+            self.subscribers += 1
+
+        return subscription
+
+    def unsubscribe(self , subscription : Subscription):
+
+        if not subscription.active:
+            return
+
+        subscription.active = False
+
+        with self._lock:
+            self.subscribers -= 1
+
+        for channel in subscription.channels:
+            subscribers = self._channels.get(channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._channels[channel]
+
+    def publish(self , channel : str , event_type : str , data : dict):
+
+        """
+        Publish an event to every subscriber of channel in this worker.
+        Example: hub.publish(village_channel(1), "announcement.created", {...})
+        """
+
+        if self._loop is None or self._loop.is_closed():
+            return
+
+        event_id = next(self._ids)
+        message = f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data , default=_json_default)}\n\n"
+
+        with self._lock:
+            self.published += 1
+
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        if running is self._loop:
+            self._deliver(channel , message)
+        else:
+            self._loop.call_soon_threadsafe(self._deliver , channel , message)
+
+    def _deliver(self , channel : str , message : str):
+
+        delivered = dropped = 0
+
+        for subscription in list(self._channels.get(channel , ())):
+            try:
+                subscription.queue.put_nowait(message)
+                delivered += 1
+
+            except asyncio.QueueFull:
+                # slow consumer --> free its backlog and tell it to go away
+                self.unsubscribe(subscription)
+                subscription.dropped = True
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                subscription.queue.put_nowait(None)
+                dropped += 1
+
+        if dropped:
+            logger.warning(f"Events | dropped {dropped} slow subscribers on {channel}")
+
+        with self._lock:
+            self.delivered += delivered
+            self.dropped += dropped
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "subscribers": self.subscribers,
+                "published": self.published,
+                "delivered": self.delivered,
+                "dropped_subscribers": self.dropped,
+            }
+
+
+def _json_default(value):
+
+    if isinstance(value , datetime):
+        return value.isoformat()
+
+    return str(value)
+
+
+hub = Hub(settings.EVENTS_QUEUE_SIZE)
+
+bus.on_event(hub.publish)                   # events published by the other workers
+
+
+#------------------------------- Write side -------------------------------
+
+_PENDING = "pubsub_pending"
+
+
+def publish_many(db : Session , events : list):
+
+    """
+    Publish events [(channel , event_type , data)] to the subscribers of every worker once this
+    transaction commits. Call next to the write, before db.commit() (same contract as cache_bus.invalidate).
+    Nothing is sent if the transaction rolls back.
+    """
+
+    if not events:
+        return
+
+    db.info.setdefault(_PENDING , []).extend(events)
+
+    bus.relay(db , events)
+
+
+def publish(db : Session , channel : str , event_type : str , data : dict):
+
+    # Example: publish(db, village_channel(1), "announcement.created", {...})
+    publish_many(db , [(channel , event_type , data)])
+
+
+@event.listens_for(Session , "after_commit")
+def _publish_after_commit(session):
+
+    # this worker delivers immediately; other workers hear it from the backend
+
+    if session.in_nested_transaction():
+        return
+
+    for channel , event_type , data in session.info.pop(_PENDING , ()):
+        hub.publish(channel , event_type , data)
+
+
+@event.listens_for(Session , "after_transaction_end")
+def _forget_after_rollback(session , transaction):
+
+    if transaction.parent is None:
+        session.info.pop(_PENDING , None)
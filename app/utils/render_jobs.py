@@ -0,0 +1,216 @@
+import queue
+import threading
+from app.utils.file_uploads import discard_file
+from app.utils.render_pool import render_pool
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class RenderPipeline:
+
+    """
+    Shared lifecycle of the background jobs that render in the render pool (document previews, project photos).
+    Job state lives on the pipeline's own table, so it survives restarts. A pipeline only says how to
+    - _claim(db , job_id) --> job, or None when another worker won it / there is nothing to render
+      (a guarded UPDATE --> one render per job even with several workers)
+    - _render(job_id , job) --> (fn , args , scratch files): source fetched locally, render pool call
+    - _store(job_id , job , scratch , result) --> upload what the render produced
+    - _finish(job_id , job , ok , result) --> record the outcome, return the attempts so far (None --> no retry)
+    plus _pending(db) (job ids lost by a restart) and _label(job_id) for the logs.
+    This base runs the rest:
+    - submit(job_id) after the triggering upload commits --> dispatcher thread claims and hands it to the pool
+    - finished renders are uploaded and recorded on the results thread, in completion order,
+      not on the process pool's own thread (a slow upload would hold up every other render's result)
+    - failures are retried max_attempts times, retry_seconds * attempts apart
+    """
+
+    name = "render"
+    title = "Render pipeline"
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._results = queue.Queue()
+        self._stop = threading.Event()
+        self._session_factory = None
+        self._lock = threading.Lock()
+        self.rendered = 0
+        self.failed = 0
+        self.retried = 0
+
+    #------------------------------- lifecycle -------------------------------
+
+    def start(self , session_factory):
+
+        self._session_factory = session_factory
+
+        render_pool.start()
+
+        threading.Thread(target=self._run , daemon=True , name=f"{self.name}-dispatcher").start()
+        threading.Thread(target=self._collect , daemon=True , name=f"{self.name}-results").start()
+        threading.Thread(target=self._recover , daemon=True , name=f"{self.name}-recover").start()
+
+    def stop(self):
+
+        self._stop.set()
+        self._queue.put(None)
+
+    def submit(self , job_id):
+
+        if job_id:
+            self._queue.put(job_id)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"queued" : self._queue.qsize() , "rendered" : self.rendered , "failed" : self.failed , "retried" : self.retried}
+
+    #------------------------------- pipeline hooks -------------------------------
+
+    @property
+    def max_attempts(self) -> int:
+        raise NotImplementedError
+
+    @property
+    def retry_seconds(self) -> float:
+        raise NotImplementedError
+
+    def _label(self , job_id) -> str:
+        return str(job_id)
+
+    def _pending(self , db) -> list:
+        raise NotImplementedError
+
+    def _claim(self , db , job_id):
+        raise NotImplementedError
+
+    def _render(self , job_id , job) -> tuple:
+        raise NotImplementedError
+
+    def _store(self , job_id , job , scratch : list , result):
+        pass
+
+    def _finish(self , job_id , job , ok : bool , result):
+        raise NotImplementedError
+
+    #------------------------------- retry -------------------------------
+
+    def _record(self , job_id , job , ok : bool , result=None):
+
+        try:
+            attempts = self._finish(job_id , job , ok , result)
+        except Exception:
+            logger.exception(f"{self.title} | could not record result of {self._label(job_id)}")
+            return
+
+        if not ok and attempts is not None and attempts < self.max_attempts and not self._stop.is_set():
+            with self._lock:
+                self.retried += 1
+            timer = threading.Timer(self.retry_seconds * attempts , self.submit , [job_id])
+            timer.daemon = True
+            timer.start()
+
+    @staticmethod
+    def _discard(scratch : list):
+
+        for path in scratch:
+            if path:
+                discard_file(path)
+
+    #------------------------------- workers -------------------------------
+
+    def _recover(self):
+
+        # jobs lost by a restart (never started, stale processing, failed with attempts left)
+
+        db = self._session_factory()
+
+        try:
+            job_ids = self._pending(db)
+        finally:
+            db.close()
+
+        for job_id in job_ids:
+            self.submit(job_id)
+
+        if job_ids:
+            logger.info(f"{self.title} | {len(job_ids)} jobs queued at startup")
+
+    def _done(self , job_id , job , scratch : list , future):
+
+        error = future.exception() if not future.cancelled() else None
+
+        result = None
+
+        if error is None and not future.cancelled():
+            result = future.result()
+            try:
+                self._store(job_id , job , scratch , result)
+            except Exception as e:
+                error = e
+
+        # files not handed to storage (failed render / upload), put_file removed the others
+        self._discard(scratch)
+
+        ok = error is None and not future.cancelled()
+
+        if ok:
+            with self._lock:
+                self.rendered += 1
+        else:
+            logger.warning(f"{self.title} | {self._label(job_id)} failed | {error!r}")
+            with self._lock:
+                self.failed += 1
+
+        self._record(job_id , job , ok , result)
+
+    def _collect(self):
+
+        # upload + DB writes of finished renders, in completion order
+
+        while True:
+            job_id , job , scratch , future = self._results.get()
+
+            try:
+                self._done(job_id , job , scratch , future)
+            except Exception:
+                logger.exception(f"{self.title} | could not handle result of {self._label(job_id)}")
+
+    def _run(self):
+
+        while not self._stop.is_set():
+            job_id = self._queue.get()
+
+            if job_id is None:
+                break
+
+            db = self._session_factory()
+
+            try:
+                job = self._claim(db , job_id)
+
+            except Exception:
+                logger.exception(f"{self.title} | claim failed for {self._label(job_id)}")
+                db.rollback()
+                job = None
+
+            finally:
+                db.close()
+
+            if job is None:
+                continue
+
+            try:
+                fn , args , scratch = self._render(job_id , job)
+            except Exception:
+                logger.exception(f"{self.title} | could not fetch {self._label(job_id)}")
+                self._record(job_id , job , ok=False)
+                continue
+
+            try:
+                render_pool.submit(fn , args , lambda f , job_id=job_id , job=job , scratch=scratch: self._results.put((job_id , job , scratch , f)))
+            except RuntimeError:
+                # pool shut down (stopping) or broken
+                self._discard(scratch)
+                if self._stop.is_set():
+                    break
+                self._record(job_id , job , ok=False)
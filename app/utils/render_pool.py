@@ -0,0 +1,126 @@
+import multiprocessing
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from app.config import settings
+from app.utils.file_uploads import UPLOAD_DIR , discard_file
+from app.utils.storage import get_storage , run
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class RenderPool:
+
+    """
+    Process pool shared by the CPU bound background jobs (document previews, project photo renditions).
+    - RENDER_WORKERS processes per API worker, spawned --> no inherited threads / DB connections
+    - at most RENDER_WORKERS more jobs wait in the pool; submit() blocks beyond that,
+      so a burst of uploads queues in the pipelines instead of in memory here
+    - a worker killed mid job (e.g. out of memory on a huge image) breaks the pool --> replaced
+    """
+
+    def __init__(self):
+        self._pool = None
+        self._slots = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def start(self):
+
+        with self._lock:
+            if self._pool is None:
+                self._slots = threading.BoundedSemaphore(settings.RENDER_WORKERS * 2)
+                self._pool = self._new_pool()
+
+    def stop(self):
+
+        self._stop.set()
+
+        with self._lock:
+            pool = self._pool
+
+        if pool is not None:
+            pool.shutdown(wait=False , cancel_futures=True)
+
+    def _new_pool(self):
+        return ProcessPoolExecutor(max_workers=settings.RENDER_WORKERS , mp_context=multiprocessing.get_context("spawn"))
+
+    def _replace(self , broken):
+
+        with self._lock:
+            if self._pool is not broken or self._stop.is_set():
+                return
+            self._pool = self._new_pool()
+
+        broken.shutdown(wait=False , cancel_futures=True)
+        logger.warning("Render pool | process pool restarted")
+
+    def submit(self , fn , args : tuple , callback):
+
+        """
+        Run fn(*args) in a worker process, callback(future) once done.
+        The callback runs on the executor's management thread --> it must only hand the future
+        on (e.g. to a queue); uploads / DB writes there would delay every other job's result.
+        Raises RuntimeError when the pool is shut down or broken; the job was not started.
+        """
+
+        self._slots.acquire()
+
+        with self._lock:
+            pool = self._pool
+
+        try:
+            future = pool.submit(fn , *args)
+        except RuntimeError as e:
+            self._slots.release()
+            if isinstance(e , BrokenProcessPool):
+                self._replace(pool)
+            raise
+
+        future.add_done_callback(lambda f: self._done(pool , f , callback))
+
+    def _done(self , pool , future , callback):
+
+        self._slots.release()
+
+        if not future.cancelled() and isinstance(future.exception() , BrokenProcessPool):
+            self._replace(pool)
+
+        callback(future)
+
+
+render_pool = RenderPool()
+
+
+def fetch_local(key : str , prefix : str = ".source") -> tuple:
+
+    """
+    Local file for a render process to read: (path , temp copy to remove afterwards or None).
+    Object storage --> the file is downloaded next to the spooled uploads first.
+    """
+
+    storage = get_storage()
+
+    path = storage.local_path(key)
+
+    if path is not None:
+        return path , None
+
+    tmp = str(UPLOAD_DIR / f"{prefix}-{uuid.uuid4().hex}{Path(key).suffix}")
+
+    try:
+        run(storage.get_file(key , tmp))
+    except BaseException:
+        discard_file(tmp)
+        raise
+
+    return tmp , tmp
+
+
+def scratch_path(suffix : str) -> str:
+
+    # output of a render process, handed to storage afterwards
+    return str(UPLOAD_DIR / f".render-{uuid.uuid4().hex}{suffix}")
@@ -0,0 +1,237 @@
+import heapq
+import itertools
+import threading
+from collections import defaultdict
+from datetime import datetime , timezone , timedelta
+from sqlalchemy import or_
+from app.models.announcement import Announcement
+from app.schema.announcement import AnnouncementResponse , to_utc
+from app.utils.cache_bus import registry
+from app.utils.etag import bump_version
+from app.utils.feeds import refresh_village_feed
+from app.utils.pubsub import hub , village_channel
+from app.utils.notifications import notifier
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+PUBLISH = "publish"
+EXPIRE = "expire"
+
+MAX_SLEEP = 60            # re-check the heap at least this often (clock changes, missed wake-ups)
+TOLERANCE = 1.0           # seconds between the heap time and the row time still counted as the same event
+LATE_WINDOW = 300         # events this many seconds overdue still fire (reload raced the due time, restart)
+RELOAD_CHUNK = 500        # villages per IN (...) list when reloading invalidated villages
+
+
+class AnnouncementScheduler:
+
+    """
+    Fires announcement publish / expiry events at their time, without polling the table.
+    A min-heap holds only upcoming events: loaded once at startup, then per village whenever
+    the cache bus invalidates announcements:{village} (any create / update / delete, in any worker).
+    Stale heap entries are skipped through a per village generation number.
+    On fire --> ETag version bumped, feed rebuilt (other workers evicted by the bus), live event published.
+    Every worker runs its own scheduler, so each bumps the version once per event.
+    """
+
+    name = "announcement_schedule"
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._heap = []
+        self._seq = itertools.count()
+        self._generation = defaultdict(int)
+        self._reload = set()
+        self._reload_all = False
+        self._stop = threading.Event()
+        self._session_factory = None
+        self._recent = {}                   # (announcement id, kind, time) fired within LATE_WINDOW
+        self.fired = 0
+        self.skipped = 0
+
+    #------------------------------- lifecycle -------------------------------
+
+    def start(self , session_factory):
+
+        self._session_factory = session_factory
+        self._reload_all = True
+
+        threading.Thread(target=self._run , daemon=True , name="announcement-scheduler").start()
+
+    def stop(self):
+
+        self._stop.set()
+
+        with self._cond:
+            self._cond.notify()
+
+    #------------------------------- cache bus hooks -------------------------------
+
+    def evict(self , key : str):
+
+        # announcements:{village} changed somewhere --> re-read that village's upcoming events
+
+        try:
+            village_id = int(key.split(":")[1])
+        except (IndexError , ValueError):
+            return
+
+        with self._cond:
+            self._reload.add(village_id)
+            self._cond.notify()
+
+    def clear(self):
+
+        with self._cond:
+            self._reload_all = True
+            self._cond.notify()
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            return {"queued_events" : len(self._heap) , "fired" : self.fired , "skipped_stale" : self.skipped}
+
+    #------------------------------- heap -------------------------------
+
+    def _push_rows(self , rows , now : datetime):
+
+        # caller holds the lock; slightly overdue events are kept unless they already fired
+
+        oldest = now - timedelta(seconds=LATE_WINDOW)
+
+        for announcement_id , village_id , publish_at , expires_at in rows:
+            generation = self._generation[village_id]
+            for kind , when in ((PUBLISH , to_utc(publish_at)) , (EXPIRE , to_utc(expires_at))):
+                if when is None or when <= oldest or (announcement_id , kind , when.timestamp()) in self._recent:
+                    continue
+                heapq.heappush(self._heap , (when.timestamp() , next(self._seq) , kind , announcement_id , village_id , generation))
+
+    def _upcoming(self , db , now : datetime , villages : list = None):
+
+        oldest = now - timedelta(seconds=LATE_WINDOW)
+
+        query = (db.query(Announcement.id , Announcement.village_id , Announcement.publish_at , Announcement.expires_at)
+                   .filter(or_(Announcement.publish_at > oldest , Announcement.expires_at > oldest)))
+
+        if villages is not None:
+            query = query.filter(Announcement.village_id.in_(villages))
+
+        return query.all()
+
+    def _load(self , db , villages : set , everything : bool):
+
+        now = datetime.now(timezone.utc)
+
+        if everything:
+            rows = self._upcoming(db , now)
+            with self._cond:
+                self._heap = []
+                self._push_rows(rows , now)
+            logger.info(f"Announcement scheduler | {len(self._heap)} upcoming events loaded")
+            return
+
+        # one query per RELOAD_CHUNK villages, not one per village
+
+        villages = sorted(villages)
+
+        for start in range(0 , len(villages) , RELOAD_CHUNK):
+            chunk = villages[start : start + RELOAD_CHUNK]
+            rows = self._upcoming(db , now , chunk)
+            with self._cond:
+                for village_id in chunk:
+                    self._generation[village_id] += 1
+                self._push_rows(rows , now)
+
+    def _pop_due(self) -> list:
+
+        # caller holds the lock
+
+        due = []
+        now = datetime.now(timezone.utc).timestamp()
+
+        while self._heap and self._heap[0][0] <= now:
+            when , _ , kind , announcement_id , village_id , generation = heapq.heappop(self._heap)
+            if generation != self._generation[village_id]:
+                self.skipped += 1
+                continue
+            due.append((kind , announcement_id , village_id , when))
+
+        return due
+
+    def _wait_seconds(self) -> float:
+
+        if not self._heap:
+            return MAX_SLEEP
+
+        return max(0.0 , min(MAX_SLEEP , self._heap[0][0] - datetime.now(timezone.utc).timestamp()))
+
+    #------------------------------- worker -------------------------------
+
+    def _run(self):
+
+        while not self._stop.is_set():
+            with self._cond:
+                if not self._reload and not self._reload_all:
+                    self._cond.wait(self._wait_seconds())
+
+                villages , self._reload = self._reload , set()
+                everything , self._reload_all = self._reload_all , False
+                due = self._pop_due()
+
+            if not (villages or everything or due):
+                continue
+
+            db = self._session_factory()
+
+            try:
+                if villages or everything:
+                    self._load(db , villages , everything)
+
+                for kind , announcement_id , village_id , when in due:
+                    self._fire(db , kind , announcement_id , village_id , when)
+
+            except Exception:
+                logger.exception("Announcement scheduler | run failed")
+                db.rollback()
+
+            finally:
+                db.close()
+
+    def _fire(self , db , kind : str , announcement_id : int , village_id : int , when : float):
+
+        announcement = db.get(Announcement , announcement_id)
+
+        scheduled = to_utc(announcement.publish_at if kind == PUBLISH else announcement.expires_at) if announcement else None
+
+        # edited or deleted since it was queued --> the reload already queued the new time
+
+        if scheduled is None or abs(scheduled.timestamp() - when) > TOLERANCE:
+            with self._cond:
+                self.skipped += 1
+            return
+
+        bump_version(db , f"announcements:{village_id}")
+        db.commit()
+
+        refresh_village_feed(db , village_id)
+
+        # every worker's scheduler fires this event --> local subscribers only, no relay
+
+        if kind == PUBLISH:
+            hub.publish(village_channel(village_id) , "announcement.created",
+                        AnnouncementResponse.model_validate(announcement).model_dump(mode="json"))
+            notifier.wake()                 # a scheduled alert's SMS job becomes due now
+        else:
+            hub.publish(village_channel(village_id) , "announcement.expired" , {"id" : announcement_id})
+
+        with self._cond:
+            self.fired += 1
+            self._recent[(announcement_id , kind , when)] = when
+            cutoff = datetime.now(timezone.utc).timestamp() - LATE_WINDOW
+            for event in [e for e , t in self._recent.items() if t < cutoff]:
+                del self._recent[event]
+
+        logger.info(f"Announcement scheduler | {kind} announcement {announcement_id} (village {village_id})")
+
+
+announcement_scheduler = registry.register("announcements:" , AnnouncementScheduler())
@@ -0,0 +1,283 @@
+from datetime import datetime , timezone
+from sqlalchemy import text , bindparam , insert , select , delete , literal , func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models.grievance import Grievance
+from app.models.document import Document , DocumentBlob
+from app.models.announcement import Announcement
+from app.models.project import Project
+from app.models.search import SearchEntry , SearchEntityEnum
+from app.utils.pagination import encode_cursor , cursor_values
+
+
+#------------------------------- Query helpers -------------------------------
+
+def fts5_query(q : str) -> str:
+
+    # quote every word so user input is never parsed as FTS5 syntax (AND / NEAR / column:...)
+
+    return " ".join('"' + word.replace('"' , '""') + '"' for word in q.split())
+
+
+def _ranked_sql(dialect : str , filters : str , keyset : str) -> str:
+
+    # inner query ranks matches, outer query applies the keyset so the rank alias can be compared
+
+    if dialect == "postgresql":
+        inner = f"""
+            SELECT g.id AS id, ts_rank_cd(g.search_vector, query) AS rank
+            FROM grievances g, websearch_to_tsquery('simple', :q) query
+            WHERE g.village_id = :village_id AND g.search_vector @@ query {filters}
+        """
+    else:
+        # bm25() is lower-is-better --> negate so both dialects sort rank DESC
+        inner = f"""
+            SELECT g.id AS id, -bm25(grievances_fts, 10.0, 5.0, 1.0) AS rank
+            FROM grievances_fts JOIN grievances g ON g.id = grievances_fts.rowid
+            WHERE grievances_fts MATCH :q AND g.village_id = :village_id {filters}
+        """
+
+    return f"SELECT id, rank FROM ({inner}) ranked {keyset} ORDER BY rank DESC, id DESC LIMIT :limit"
+
+
+#------------------------------- Grievance search -------------------------------
+
+def search_grievances(db : Session , village_id : int , q : str , status = None , category : str = None ,
+                      cursor : str = None , limit : int = 20):
+
+    """
+    Ranked full text search over title, description and sarpanch_reply of one village.
+    Returns (grievances, next_cursor). Pages are keyset based on (rank, id) so deep pages
+    cost the same as the first one.
+    """
+
+    dialect = db.get_bind().dialect.name
+
+    params = {"village_id" : village_id , "limit" : limit + 1}
+    params["q"] = q if dialect == "postgresql" else fts5_query(q)
+
+    filters = ""
+
+    if status is not None:
+        filters += " AND g.status = :status"
+        params["status"] = status.name
+
+    if category:
+        filters += " AND g.category = :category"
+        params["category"] = category
+
+    keyset = ""
+
+    if cursor:
+        keyset = "WHERE rank < :last_rank OR (rank = :last_rank AND id < :last_id)"
+        params["last_rank"] , params["last_id"] = cursor_values(cursor , rank=float , id=int)
+
+    rows = db.execute(text(_ranked_sql(dialect , filters , keyset)) , params).all()
+
+    next_cursor = None
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rank=rows[-1].rank , id=rows[-1].id)
+
+    # load the page in rank order
+
+    ids = [row.id for row in rows]
+    by_id = {g.id : g for g in db.query(Grievance).filter(Grievance.id.in_(ids)).all()} if ids else {}
+
+    return [by_id[i] for i in ids if i in by_id] , next_cursor
+
+
+#------------------------------- Unified index (documents / announcements / projects) -------------------------------
+
+def index_entry(db : Session , entity_type : SearchEntityEnum , entity_id : int , village_id : int , title : str , **fields):
+
+    """
+    Create or refresh the search entry of one record, in the caller's transaction.
+    fields: body, visible_from, visible_until --> left untouched on update when not passed
+    (e.g. a document rename keeps the extracted text).
+    """
+
+    values = {"village_id" : village_id , "title" : title , **fields}
+
+    updated = db.query(SearchEntry).filter(SearchEntry.entity_type == entity_type , SearchEntry.entity_id == entity_id).update(
+                  values , synchronize_session=False)
+
+    if updated:
+        return
+
+    try:
+        with db.begin_nested():
+            db.add(SearchEntry(entity_type=entity_type , entity_id=entity_id , **values))
+    except IntegrityError:
+        db.query(SearchEntry).filter(SearchEntry.entity_type == entity_type , SearchEntry.entity_id == entity_id).update(
+            values , synchronize_session=False)
+
+
+def index_new_entries(db : Session , entity_type : SearchEntityEnum , rows : list):
+
+    # records created in this transaction (e.g. a broadcast) --> one batched INSERT, no lookups
+
+    if rows:
+        db.execute(insert(SearchEntry) , [{"entity_type" : entity_type , **row} for row in rows])
+
+
+def remove_entry(db : Session , entity_type : SearchEntityEnum , entity_id : int):
+
+    db.query(SearchEntry).filter(SearchEntry.entity_type == entity_type , SearchEntry.entity_id == entity_id).delete(synchronize_session=False)
+
+
+def index_announcement(db : Session , announcement):
+
+    index_entry(db , SearchEntityEnum.announcement , announcement.id , announcement.village_id , announcement.title ,
+                body=announcement.content , visible_from=announcement.publish_at , visible_until=announcement.expires_at)
+
+
+def index_project(db : Session , project):
+
+    index_entry(db , SearchEntityEnum.project , project.id , project.village_id , project.title ,
+                body=f"{project.description} {project.category}")
+
+
+def index_document(db : Session , document):
+
+    # same content already uploaded and extracted --> searchable at once, otherwise the body
+    # is filled in by the preview pipeline (set_document_text)
+
+    body = db.query(DocumentBlob.extracted_text).filter(DocumentBlob.sha256 == document.content_hash).scalar() if document.content_hash else None
+
+    index_entry(db , SearchEntityEnum.document , document.id , document.village_id , document.title , body=body or "")
+
+
+def set_document_text(db : Session , sha256 : str , body : str):
+
+    # text extracted from a stored file --> every document using that file
+
+    document_ids = select(Document.id).where(Document.content_hash == sha256).scalar_subquery()
+
+    db.query(SearchEntry).filter(SearchEntry.entity_type == SearchEntityEnum.document , SearchEntry.entity_id.in_(document_ids)).update(
+        {SearchEntry.body : body} , synchronize_session=False)
+
+
+def rebuild_search_entries(db : Session):
+
+    """
+    Recompute every search entry from the source tables (backfill / repair).
+    One DELETE and one INSERT ... SELECT per entity type, nothing is loaded into Python.
+    """
+
+    columns = ["entity_type" , "entity_id" , "village_id" , "title" , "body" , "visible_from" , "visible_until"]
+
+    db.execute(delete(SearchEntry))
+
+    db.execute(insert(SearchEntry).from_select(columns , select(
+        literal(SearchEntityEnum.announcement.name) , Announcement.id , Announcement.village_id , Announcement.title ,
+        Announcement.content , Announcement.publish_at , Announcement.expires_at)))
+
+    db.execute(insert(SearchEntry).from_select(columns , select(
+        literal(SearchEntityEnum.project.name) , Project.id , Project.village_id , Project.title ,
+        Project.description + " " + Project.category , literal(None) , literal(None))))
+
+    db.execute(insert(SearchEntry).from_select(columns , select(
+        literal(SearchEntityEnum.document.name) , Document.id , Document.village_id , Document.title ,
+        func.coalesce(DocumentBlob.extracted_text , "") , literal(None) , literal(None))
+        .outerjoin(DocumentBlob , DocumentBlob.sha256 == Document.content_hash)))
+
+
+#------------------------------- Unified search -------------------------------
+
+ENTITY_URLS = {
+    SearchEntityEnum.document : "/api/documents/{}",
+    SearchEntityEnum.announcement : "/api/announcements/{}",
+    SearchEntityEnum.project : "/api/projects/{}",
+}
+
+
+def _entries_sql(dialect : str , filters : str , keyset : str) -> str:
+
+    if dialect == "postgresql":
+        inner = f"""
+            SELECT s.id AS id, ts_rank_cd(s.search_vector, query) AS rank
+            FROM search_entries s, websearch_to_tsquery('simple', :q) query
+            WHERE s.village_id = :village_id AND s.search_vector @@ query {filters}
+        """
+    else:
+        inner = f"""
+            SELECT s.id AS id, -bm25(search_entries_fts, 10.0, 1.0) AS rank
+            FROM search_entries_fts JOIN search_entries s ON s.id = search_entries_fts.rowid
+            WHERE search_entries_fts MATCH :q AND s.village_id = :village_id {filters}
+        """
+
+    return f"SELECT id, rank FROM ({inner}) ranked {keyset} ORDER BY rank DESC, id DESC LIMIT :limit"
+
+
+def _snippets(db : Session , dialect : str , q : str , ids : list) -> dict:
+
+    # best matching fragment of the body, only for the rows of this page
+
+    if dialect == "postgresql":
+        sql = text("""
+            SELECT id, ts_headline('simple', body, websearch_to_tsquery('simple', :q),
+                                   'MaxFragments=1, MaxWords=30, MinWords=12, StartSel="", StopSel=""') AS snippet
+            FROM search_entries WHERE id IN :ids
+        """)
+    else:
+        sql = text("""
+            SELECT rowid AS id, snippet(search_entries_fts, 1, '', '', '…', 24) AS snippet
+            FROM search_entries_fts WHERE search_entries_fts MATCH :q AND rowid IN :ids
+        """)
+
+    rows = db.execute(sql.bindparams(bindparam("ids" , expanding=True)) , {"q" : q , "ids" : ids}).all()
+
+    return {row.id : row.snippet for row in rows}
+
+
+def search_entries(db : Session , village_id : int , q : str , entity_types : list = None ,
+                   cursor : str = None , limit : int = 20):
+
+    """
+    Ranked full text search over the documents, announcements and projects of one village.
+    Title matches weigh more than body matches. Scheduled / expired announcements are skipped.
+    Returns (result dicts with snippet and url, next_cursor), keyset paged on (rank, id) like search_grievances.
+    """
+
+    dialect = db.get_bind().dialect.name
+
+    params = {"village_id" : village_id , "limit" : limit + 1 , "now" : datetime.now(timezone.utc)}
+    params["q"] = q if dialect == "postgresql" else fts5_query(q)
+
+    filters = " AND (s.visible_from IS NULL OR s.visible_from <= :now) AND (s.visible_until IS NULL OR s.visible_until > :now)"
+
+    if entity_types:
+        filters += " AND s.entity_type IN (" + " , ".join(f":type_{i}" for i in range(len(entity_types))) + ")"
+        params.update({f"type_{i}" : entity_type.name for i , entity_type in enumerate(entity_types)})
+
+    keyset = ""
+
+    if cursor:
+        keyset = "WHERE rank < :last_rank OR (rank = :last_rank AND id < :last_id)"
+        params["last_rank"] , params["last_id"] = cursor_values(cursor , rank=float , id=int)
+
+    rows = db.execute(text(_entries_sql(dialect , filters , keyset)) , params).all()
+
+    next_cursor = None
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rank=rows[-1].rank , id=rows[-1].id)
+
+    ids = [row.id for row in rows]
+
+    if not ids:
+        return [] , None
+
+    # body is not loaded, only the snippet
+
+    entries = db.query(SearchEntry.id , SearchEntry.entity_type , SearchEntry.entity_id , SearchEntry.title ,
+                       SearchEntry.created_at).filter(SearchEntry.id.in_(ids)).all()
+    by_id = {entry.id : entry for entry in entries}
+    snippets = _snippets(db , dialect , params["q"] , ids)
+
+    return [dict(by_id[i]._mapping , snippet=snippets.get(i) or "" , url=ENTITY_URLS[by_id[i].entity_type].format(by_id[i].entity_id))
+            for i in ids if i in by_id] , next_cursor
+
@@ -0,0 +1,316 @@
+import abc
+import asyncio
+import os
+import shutil
+import threading
+from pathlib import Path
+from urllib.parse import quote
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Stored files are addressed by key, e.g. documents/ab/abcd...ef.pdf
+# local --> <STORAGE_LOCAL_ROOT>/<key>, s3 --> s3://<S3_BUCKET>/<key>
+
+
+class Storage(abc.ABC):
+
+    """
+    Async file storage interface (documents, previews, project photos).
+    Blocking work (disk, boto3) runs in worker threads --> safe to await from the event loop.
+    Sync code (threadpool routes, background threads) calls it through run().
+    """
+
+    name = "base"
+
+    def local_path(self , key : str):
+        # path on this machine, None when files live elsewhere
+        return None
+
+    @abc.abstractmethod
+    def locator(self , key : str) -> str:
+        # human readable location, stored in Document.file_url
+        ...
+
+    @abc.abstractmethod
+    async def put_file(self , key : str , src_path : str , content_type : str = None):
+        # takes ownership of src_path (moved or uploaded, then removed)
+        ...
+
+    @abc.abstractmethod
+    async def get_file(self , key : str , dst_path : str):
+        ...
+
+    @abc.abstractmethod
+    async def exists(self , key : str) -> bool:
+        ...
+
+    @abc.abstractmethod
+    async def delete(self , key : str):
+        ...
+
+    async def delete_many(self , keys : list):
+        await asyncio.gather(*(self.delete(key) for key in keys))
+
+    async def presigned_url(self , key : str , filename : str = None , media_type : str = None):
+        # time limited URL the client downloads from directly, None if the backend has none
+        return None
+
+
+class LocalStorage(Storage):
+
+    name = "local"
+
+    def __init__(self , root : str):
+        self.root = Path(root)
+        self.root.mkdir(parents=True , exist_ok=True)
+
+    def _path(self , key : str) -> Path:
+
+        if ".." in Path(key).parts:
+            raise ValueError(f"Invalid storage key {key!r}")
+
+        return self.root / key
+
+    def local_path(self , key : str):
+        return str(self._path(key))
+
+    def locator(self , key : str) -> str:
+        return str(self._path(key))
+
+    def _move(self , key : str , src_path : str):
+
+        final = self._path(key)
+
+        if final.exists():                              # same content already stored
+            os.unlink(src_path)
+            return
+
+        final.parent.mkdir(parents=True , exist_ok=True)
+
+        try:
+            os.replace(src_path , final)                # atomic: readers never see a half written file
+        except OSError:
+            tmp = final.with_name(f".{final.name}.{os.getpid()}.tmp")   # other filesystem --> copy, then rename
+            shutil.copyfile(src_path , tmp)
+            os.replace(tmp , final)
+            os.unlink(src_path)
+
+    def _delete(self , key : str):
+
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    async def put_file(self , key : str , src_path : str , content_type : str = None):
+        await asyncio.to_thread(self._move , key , src_path)
+
+    async def get_file(self , key : str , dst_path : str):
+        await asyncio.to_thread(shutil.copyfile , self._path(key) , dst_path)
+
+    async def exists(self , key : str) -> bool:
+        return await asyncio.to_thread(self._path(key).exists)
+
+    async def delete(self , key : str):
+        await asyncio.to_thread(self._delete , key)
+
+
+class S3Storage(Storage):
+
+    """
+    S3 compatible object storage (AWS S3, MinIO, Ceph ...).
+    - one boto3 client per process, shared by all threads; its connection pool holds
+      S3_MAX_POOL_CONNECTIONS keep-alive connections
+    - uploads larger than S3_MULTIPART_THRESHOLD_MB go up as a multipart upload, streamed
+      from the spooled temp file part by part (never read into memory)
+    - downloads get a presigned GET URL: the client fetches the bytes from the object store,
+      API workers only sign (no network call)
+    """
+
+    name = "s3"
+
+    def __init__(self):
+
+        import boto3
+        from boto3.s3.transfer import TransferConfig
+        from botocore.config import Config
+
+        self.bucket = settings.S3_BUCKET
+        self._client = boto3.session.Session().client(
+            "s3",
+            endpoint_url=settings.S3_ENDPOINT_URL or None,
+            region_name=settings.S3_REGION,
+            aws_access_key_id=settings.S3_ACCESS_KEY_ID or None,
+            aws_secret_access_key=settings.S3_SECRET_ACCESS_KEY or None,
+            config=Config(max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS , signature_version="s3v4",
+                          retries={"max_attempts" : 3 , "mode" : "standard"}),
+        )
+
+        part_size = settings.S3_MULTIPART_THRESHOLD_MB * 1024 * 1024
+        self._transfer = TransferConfig(multipart_threshold=part_size , multipart_chunksize=part_size ,
+                                        max_concurrency=settings.S3_MULTIPART_CONCURRENCY)
+
+    def locator(self , key : str) -> str:
+        return f"s3://{self.bucket}/{key}"
+
+    def _put(self , key : str , src_path : str , content_type : str):
+
+        extra = {"ContentType" : content_type} if content_type else None
+
+        self._client.upload_file(src_path , self.bucket , key , ExtraArgs=extra , Config=self._transfer)
+
+        os.unlink(src_path)
+
+    def _exists(self , key : str) -> bool:
+
+        from botocore.exceptions import ClientError
+
+        try:
+            self._client.head_object(Bucket=self.bucket , Key=key)
+        except ClientError as e:
+            if e.response.get("Error" , {}).get("Code") in ("404" , "NoSuchKey" , "NotFound"):
+                return False
+            raise
+
+        return True
+
+    async def put_file(self , key : str , src_path : str , content_type : str = None):
+        await asyncio.to_thread(self._put , key , src_path , content_type)
+
+    async def get_file(self , key : str , dst_path : str):
+        await asyncio.to_thread(self._client.download_file , self.bucket , key , dst_path , Config=self._transfer)
+
+    async def exists(self , key : str) -> bool:
+        return await asyncio.to_thread(self._exists , key)
+
+    async def delete(self , key : str):
+        await asyncio.to_thread(self._client.delete_object , Bucket=self.bucket , Key=key)
+
+    def _delete_many(self , keys : list):
+
+        # one request per 1000 keys instead of one per key (missing keys are not an error)
+
+        for i in range(0 , len(keys) , 1000):
+            self._client.delete_objects(Bucket=self.bucket , Delete={"Objects" : [{"Key" : key} for key in keys[i:i + 1000]] , "Quiet" : True})
+
+    async def delete_many(self , keys : list):
+        await asyncio.to_thread(self._delete_many , list(keys))
+
+    async def presigned_url(self , key : str , filename : str = None , media_type : str = None):
+
+        params = {"Bucket" : self.bucket , "Key" : key}
+
+        # the object store sends the same headers the API would
+        if filename:
+            params["ResponseContentDisposition"] = f"attachment; filename*=utf-8''{quote(filename)}"
+        if media_type:
+            params["ResponseContentType"] = media_type
+
+        # signing is local computation --> no thread hop
+        return self._client.generate_presigned_url("get_object" , Params=params , ExpiresIn=settings.S3_PRESIGN_SECONDS)
+
+
+def build_storage() -> Storage:
+
+    if settings.STORAGE_BACKEND == "s3":
+        return S3Storage()
+
+    return LocalStorage(settings.STORAGE_LOCAL_ROOT)
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage() -> Storage:
+
+    # built on first use --> no boto3 import / client for processes that never touch files
+
+    global _storage
+
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = build_storage()
+                logger.info(f"Storage | {_storage.name} backend")
+
+    return _storage
+
+
+class _Loop:
+
+    # one event loop thread per process for sync callers --> its default executor (the threads
+    # doing the blocking I/O) is reused instead of a fresh loop + executor per call
+
+    def __init__(self):
+        self._loop = None
+        self._lock = threading.Lock()
+
+    def get(self):
+
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever , daemon=True , name="storage-loop").start()
+
+        return self._loop
+
+
+_loop = _Loop()
+
+
+def run(coro):
+
+    """
+    Run a storage coroutine from sync code (threadpool routes, GC / preview threads) and wait for it.
+    Never call from a coroutine --> await the method instead.
+    """
+
+    return asyncio.run_coroutine_threadsafe(coro , _loop.get()).result()
+
+
+#------------------------------- Files placed inside a transaction -------------------------------
+
+_PLACED = "storage_placed"
+
+
+def delete_on_rollback(db : Session , *keys):
+
+    """
+    Files just put in storage for rows of this transaction: deleted again if it does not commit
+    (error before the commit, failed commit), so a failed upload leaves no file that no row points at.
+    Call right after put_file, before db.commit() (same contract as cache_bus.invalidate).
+    """
+
+    db.info.setdefault(_PLACED , []).extend(keys)
+
+
+@event.listens_for(Session , "after_commit")
+def _keep_after_commit(session):
+
+    if session.in_nested_transaction():
+        return
+
+    session.info.pop(_PLACED , None)
+
+
+@event.listens_for(Session , "after_transaction_end")
+def _delete_after_rollback(session , transaction):
+
+    if transaction.parent is not None:
+        return
+
+    keys = session.info.pop(_PLACED , None)
+
+    if not keys:
+        return
+
+    try:
+        run(get_storage().delete_many(keys))
+        logger.info(f"Storage | {len(keys)} files removed, their transaction did not commit")
+    except Exception:
+        logger.exception(f"Storage | could not remove {len(keys)} files of a rolled back transaction")
@@ -0,0 +1,35 @@
+import os
+import sys
+import tempfile
+import pytest
+
+# settings are read when app is first imported --> a throwaway SQLite database, set before that
+os.environ.setdefault("DATABASE_URL" , f"sqlite:///{tempfile.mkdtemp(prefix='gram-suvidha-tests-')}/test.db")
+os.environ.setdefault("SECRET_KEY" , "test-secret")
+
+sys.path.insert(0 , os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def engine():
+
+    from app.database import Base , engine
+    from app.models import villages , user , budget , grievance , announcement , document , project , notification , search , resource_version , cache_outbox , audit
+
+    Base.metadata.create_all(bind=engine)
+
+    return engine
+
+
+@pytest.fixture
+def db(engine):
+
+    from app.database import SessionLocal
+
+    session = SessionLocal()
+
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
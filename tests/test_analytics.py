@@ -0,0 +1,116 @@
+from datetime import datetime , timedelta
+from types import SimpleNamespace
+import pytest
+from app.models.grievance import Grievance , GrievanceStatusEnum
+from app.models.user import User , RoleEnum
+from app.models.villages import Village
+from app.routers.analytics import get_village_grievance_sla , get_district_grievance_sla
+from app.utils.exception import ForbiddenException
+
+
+@pytest.fixture
+def district(db):
+
+    # two villages of Gaya, one of another district; created_at / resolved_at are set by hand
+    villages = [Village(name=name , district=district , state="Bihar" , pincode=823001 + i)
+                for i , (name , district) in enumerate([("Bodh" , "Gaya") , ("Tekari" , "Gaya") , ("Danapur" , "Patna")])]
+    db.add_all(villages)
+    db.flush()
+
+    citizen = User(name="Ravi" , phone=f"8{villages[0].id:09d}" , email=f"ravi{villages[0].id}@example.in" , hashed_password="x" ,
+                   ward_number=1 , village_id=villages[0].id)
+    db.add(citizen)
+    db.flush()
+
+    now = datetime.now()
+
+    def add(village , category , status , created_at , resolved_at=None):
+        db.add(Grievance(village_id=village.id , citizen_id=citizen.id , title="t" , description="d" , category=category ,
+                         status=status , created_at=created_at , resolved_at=resolved_at))
+
+    bodh , tekari , danapur = villages
+    resolved = GrievanceStatusEnum.resolved
+
+    for hours in range(1 , 11):
+        created = now - timedelta(days=20)
+        add(bodh , "water" , resolved , created , created + timedelta(hours=hours))
+
+    for hours in (24 , 48):
+        created = now - timedelta(days=3)
+        add(bodh , "road" , resolved , created , created + timedelta(hours=hours))
+
+    add(bodh , "water" , GrievanceStatusEnum.open , now - timedelta(days=1))
+    add(bodh , "road" , GrievanceStatusEnum.in_progress , now - timedelta(days=5))
+    add(bodh , "water" , GrievanceStatusEnum.open , now - timedelta(days=10))
+    add(bodh , "water" , GrievanceStatusEnum.open , now - timedelta(days=40))
+    add(bodh , "water" , GrievanceStatusEnum.rejected , now - timedelta(days=40))
+
+    add(tekari , "water" , resolved , now - timedelta(days=2) , now - timedelta(days=2) + timedelta(hours=2))
+    add(danapur , "water" , resolved , now - timedelta(days=2) , now - timedelta(days=2) + timedelta(hours=500))
+    db.flush()
+
+    return SimpleNamespace(bodh=bodh , tekari=tekari , danapur=danapur , now=now)
+
+
+def user(role , village) -> SimpleNamespace:
+    return SimpleNamespace(id=0 , role=role , village_id=village.id)
+
+
+def test_village_sla_percentiles_and_ageing(db , district):
+
+    report = get_village_grievance_sla(db=db , current_user=user(RoleEnum.sarpanch , district.bodh))
+
+    # nearest rank over 1..10 h, 24 h, 48 h
+    assert report["resolution"] == {"resolved_count" : 12 , "avg_hours" : 10.58 , "p50_hours" : 6.0 , "p90_hours" : 24.0 , "p95_hours" : 48.0}
+
+    assert report["by_group"]["resolution"]["water"] == {"resolved_count" : 10 , "avg_hours" : 5.5 ,
+                                                         "p50_hours" : 5.0 , "p90_hours" : 9.0 , "p95_hours" : 10.0}
+    assert report["by_group"]["resolution"]["road"]["p50_hours"] == 24.0
+
+    # open / in progress only, rejected is closed
+    assert report["open_ageing"] == {"open_count" : 4 , "0-2_days" : 1 , "3-7_days" : 1 , "8-30_days" : 1 , "over_30_days" : 1}
+    assert report["by_group"]["open_ageing"]["road"] == {"open_count" : 1 , "0-2_days" : 0 , "3-7_days" : 1 , "8-30_days" : 0 , "over_30_days" : 0}
+
+
+def test_since_limits_resolution_stats(db , district):
+
+    since = (district.now - timedelta(days=5)).date()
+
+    report = get_village_grievance_sla(since=since , db=db , current_user=user(RoleEnum.sarpanch , district.bodh))
+
+    assert report["resolution"]["resolved_count"] == 2
+    assert list(report["by_group"]["resolution"]) == ["road"]
+
+
+def test_sarpanch_sees_only_own_village(db , district):
+
+    report = get_village_grievance_sla(village_id=district.tekari.id , db=db , current_user=user(RoleEnum.sarpanch , district.bodh))
+
+    assert report["village_id"] == district.bodh.id
+
+    admin = get_village_grievance_sla(village_id=district.tekari.id , db=db , current_user=user(RoleEnum.admin , district.bodh))
+
+    assert admin["resolution"]["resolved_count"] == 1 and admin["resolution"]["p50_hours"] == 2.0
+
+    with pytest.raises(ForbiddenException):
+        get_village_grievance_sla(db=db , current_user=user(RoleEnum.citizen , district.bodh))
+
+
+def test_district_sla_by_village(db , district):
+
+    report = get_district_grievance_sla("Bihar" , "Gaya" , group_by="village" , db=db , current_user=user(RoleEnum.admin , district.bodh))
+
+    assert report["resolution"]["resolved_count"] == 13              # Danapur is another district
+    assert {village : stats["resolved_count"] for village , stats in report["by_group"]["resolution"].items()} == {
+        str(district.bodh.id) : 12 , str(district.tekari.id) : 1}
+
+    with pytest.raises(ForbiddenException):
+        get_district_grievance_sla("Bihar" , "Gaya" , db=db , current_user=user(RoleEnum.sarpanch , district.bodh))
+
+
+def test_empty_scope_reports_zero(db , district):
+
+    report = get_district_grievance_sla("Bihar" , "Nalanda" , db=db , current_user=user(RoleEnum.admin , district.bodh))
+
+    assert report["resolution"] == {"resolved_count" : 0 , "avg_hours" : None , "p50_hours" : None , "p90_hours" : None , "p95_hours" : None}
+    assert report["by_group"] == {"resolution" : {} , "open_ageing" : {}}
@@ -0,0 +1,63 @@
+import hashlib
+import pytest
+from app.models.document import DocumentBlob
+from app.utils import storage as storage_module
+from app.utils.storage import LocalStorage
+from app.utils.file_uploads import StoredFile
+from app.utils.blobs import acquire_blob , release_blob
+
+
+@pytest.fixture
+def local(tmp_path , monkeypatch):
+
+    backend = LocalStorage(str(tmp_path / "store"))
+    monkeypatch.setattr(storage_module , "_storage" , backend)
+
+    return backend
+
+
+def spooled(tmp_path , data : bytes , name : str) -> StoredFile:
+
+    path = tmp_path / name
+    path.write_bytes(data)
+
+    return StoredFile(path=str(path) , size=len(data) , sha256=hashlib.sha256(data).hexdigest())
+
+
+def blob(db , sha256 : str) -> DocumentBlob:
+
+    db.expire_all()
+
+    return db.query(DocumentBlob).filter(DocumentBlob.sha256 == sha256).one()
+
+
+def test_key_follows_content_type(db , local , tmp_path):
+
+    stored = spooled(tmp_path , b"%PDF gram panchayat resolution" , "RESOLUTION.PDF")
+
+    location = acquire_blob(db , stored , "application/pdf")
+    db.commit()
+
+    assert blob(db , stored.sha256).path == f"documents/{stored.sha256[:2]}/{stored.sha256}.pdf"
+    assert location.endswith(f"{stored.sha256}.pdf")
+
+
+def test_reacquired_blob_is_no_longer_released(db , local , tmp_path):
+
+    data = b"%PDF ward map"
+    stored = spooled(tmp_path , data , "map.pdf")
+
+    acquire_blob(db , stored , "application/pdf")
+    db.commit()
+
+    release_blob(db , stored.sha256)
+    db.commit()
+
+    released = blob(db , stored.sha256)
+    assert released.ref_count == 0 and released.released_at is not None
+
+    acquire_blob(db , spooled(tmp_path , data , "map-again.pdf") , "application/pdf")
+    db.commit()
+
+    again = blob(db , stored.sha256)
+    assert again.ref_count == 1 and again.released_at is None
@@ -0,0 +1,128 @@
+import pytest
+from app.models.cache_outbox import CacheOutbox
+from app.models.villages import Village
+from app.utils import cache_bus
+from app.utils.cache_bus import LocalCache , CacheRegistry , EVICT_ALL , invalidate
+
+
+@pytest.fixture
+def feeds(monkeypatch):
+
+    # a registry of its own --> the app's caches are not touched
+    registry = CacheRegistry()
+    monkeypatch.setattr(cache_bus , "registry" , registry)
+
+    return registry.register("announcements:" , LocalCache("test_feeds"))
+
+
+def write(db):
+
+    # invalidate() is called next to a write, inside its transaction
+    db.add(Village(name="Rampur" , district="Patna" , state="Bihar" , pincode=800001))
+    db.flush()
+
+
+def cached(cache : LocalCache , key : str):
+
+    # value in the cache, or None, without counting a lookup or filling it
+    return cache._data.get(key)
+
+
+def test_sqlite_uses_memory_backend():
+
+    assert cache_bus.bus.name == "memory"
+
+
+def test_invalidate_evicts_on_commit(db , feeds):
+
+    feeds.load("announcements:4" , lambda: "old feed")
+
+    write(db)
+    invalidate(db , "announcements:4")
+
+    assert cached(feeds , "announcements:4") == "old feed"         # still served until the write commits
+
+    db.commit()
+
+    assert cached(feeds , "announcements:4") is None
+    assert feeds.get_or_load("announcements:4" , lambda: "new feed") == "new feed"
+
+
+def test_rollback_does_not_evict(db , feeds):
+
+    feeds.load("announcements:4" , lambda: "feed")
+
+    write(db)
+    invalidate(db , "announcements:4")
+    db.rollback()
+
+    assert cached(feeds , "announcements:4") == "feed"
+
+    # the rolled back keys are forgotten, not evicted by the next commit
+    db.commit()
+
+    assert cached(feeds , "announcements:4") == "feed"
+
+
+def test_memory_backend_writes_no_outbox_rows(db , feeds):
+
+    before = db.query(CacheOutbox).count()
+
+    write(db)
+    invalidate(db , "announcements:4" , "announcements:5")
+    db.commit()
+
+    assert db.query(CacheOutbox).count() == before
+
+
+def test_registry_routes_keys_by_prefix():
+
+    registry = CacheRegistry()
+    announcements = registry.register("announcements:" , LocalCache("announcements"))
+    documents = registry.register("document:" , LocalCache("documents"))
+    versions = registry.register("" , LocalCache("versions"))
+
+    for key in ("announcements:4" , "announcements:4:5" , "announcements:40"):
+        announcements.load(key , lambda: key)
+        versions.load(key , lambda: key)
+    documents.load("document:4" , lambda: "doc")
+
+    registry.evict(["announcements:4"])
+
+    # the key and its variants, not a longer id sharing the prefix
+    assert sorted(announcements._data) == ["announcements:40"]
+    assert sorted(versions._data) == ["announcements:40"]
+    assert list(documents._data) == ["document:4"]
+
+    registry.evict([EVICT_ALL])
+
+    assert not announcements._data and not documents._data and not versions._data
+
+
+def test_fill_started_before_eviction_is_not_stored():
+
+    cache = LocalCache("feeds")
+
+    def slow_loader():
+        # a write commits (and evicts) while this reader is still loading the old value
+        cache.evict("announcements:4")
+        return "stale feed"
+
+    assert cache.get_or_load("announcements:4" , slow_loader) == "stale feed"
+    assert "announcements:4" not in cache._data
+
+    assert cache.get_or_load("announcements:4" , lambda: "fresh feed") == "fresh feed"
+    assert cache.get_or_load("announcements:4" , lambda: "not called") == "fresh feed"
+
+
+def test_cache_stays_bounded():
+
+    cache = LocalCache("feeds" , max_entries=2)
+
+    for village_id in (1 , 2 , 3):
+        cache.load(f"announcements:{village_id}" , lambda: village_id)
+
+    cache.get_or_load("announcements:2" , lambda: None)             # recently used --> kept
+    cache.load("announcements:4" , lambda: 4)
+
+    assert sorted(cache._data) == ["announcements:2" , "announcements:4"]
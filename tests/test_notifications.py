@@ -0,0 +1,238 @@
+import asyncio
+import json
+import threading
+from datetime import datetime , timezone , timedelta
+from http.server import BaseHTTPRequestHandler , ThreadingHTTPServer
+import pytest
+from app.config import settings
+from app.database import SessionLocal
+from app.models.notification import NotificationJob , NotificationJobStatusEnum
+from app.models.user import User
+from app.models.villages import Village
+from app.utils import notifications
+from app.utils.notifications import FileGateway , HttpGateway , Gateway , GatewayError , NotificationWorker , enqueue_notification
+
+
+class FakeGateway(Gateway):
+
+    # failures[phone] --> errors raised before that phone's message goes through
+
+    name = "fake"
+
+    def __init__(self , failures : dict = None):
+        self.failures = dict(failures or {})
+        self.calls = []
+        self.sent = []
+
+    async def send(self , phone : str , message : str):
+        self.calls.append(phone)
+        pending = self.failures.get(phone)
+        if pending:
+            self.failures[phone] = pending[1:]
+            raise pending[0]
+        self.sent.append((phone , message))
+
+
+@pytest.fixture
+def no_waiting(monkeypatch):
+
+    # backoff sleeps are recorded, not slept; no rate limit
+    delays = []
+
+    async def sleep(seconds):
+        delays.append(seconds)
+
+    monkeypatch.setattr(notifications.asyncio , "sleep" , sleep)
+    monkeypatch.setattr(settings , "NOTIFY_RATE_PER_SECOND" , 0)
+
+    return delays
+
+
+@pytest.fixture
+def village(db):
+
+    village = Village(name="Sonpur" , district="Saran" , state="Bihar" , pincode=841101)
+    db.add(village)
+    db.commit()
+
+    return village
+
+
+def add_residents(db , village , count : int , ward_number : int = 1) -> list:
+
+    users = [User(name=f"Resident {i}" , phone=f"7{village.id:04d}{ward_number}{i:04d}" , email=f"r{village.id}-{ward_number}-{i}@example.in" ,
+                  hashed_password="x" , ward_number=ward_number , village_id=village.id) for i in range(count)]
+    db.add_all(users)
+    db.commit()
+
+    return [user.phone for user in users]
+
+
+def worker(gateway : Gateway) -> NotificationWorker:
+
+    worker = NotificationWorker()
+    worker.worker_id = "test-worker"
+    worker._session_factory = SessionLocal
+    worker._gateway = gateway
+
+    return worker
+
+
+def run_job(db , worker : NotificationWorker):
+
+    job = worker._claim(db)
+    assert job is not None
+
+    asyncio.run(worker._run_job(db , job))
+
+    db.expire_all()
+
+    return db.get(NotificationJob , job.id)
+
+
+#------------------------------- gateways -------------------------------
+
+def test_file_gateway_writes_one_json_line_per_message(tmp_path):
+
+    gateway = FileGateway(str(tmp_path / "out" / "sms.jsonl"))
+
+    async def send():
+        await asyncio.gather(gateway.send("9876543210" , "Gram Sabha on Sunday") , gateway.send("9876543211" , "पानी की आपूर्ति बंद"))
+        await gateway.close()
+
+    asyncio.run(send())
+
+    lines = [json.loads(line) for line in (tmp_path / "out" / "sms.jsonl").read_text(encoding="utf-8").splitlines()]
+
+    assert sorted(line["to"] for line in lines) == ["9876543210" , "9876543211"]
+    assert {line["message"] for line in lines} == {"Gram Sabha on Sunday" , "पानी की आपूर्ति बंद"}
+
+
+@pytest.fixture
+def sms_provider():
+
+    # answers each POST with the next status code of codes (200 once they run out)
+    codes , received = [] , []
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def do_POST(self):
+            received.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+            self.send_response(codes.pop(0) if codes else 200)
+            self.end_headers()
+
+        def log_message(self , *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1" , 0) , Handler)
+    threading.Thread(target=server.serve_forever , daemon=True).start()
+
+    yield f"http://127.0.0.1:{server.server_port}/sms" , codes , received
+
+    server.shutdown()
+
+
+def test_http_gateway_classifies_errors(sms_provider):
+
+    url , codes , received = sms_provider
+    gateway = HttpGateway(url , timeout=5)
+
+    asyncio.run(gateway.send("9876543210" , "Camp on Monday"))
+    assert received == [{"to" : "9876543210" , "message" : "Camp on Monday"}]
+
+    for code , retryable in ((503 , True) , (429 , True) , (400 , False)):
+        codes.append(code)
+        with pytest.raises(GatewayError) as error:
+            asyncio.run(gateway.send("9876543210" , "Camp on Monday"))
+        assert error.value.retryable is retryable
+
+
+def test_http_gateway_unreachable_is_retryable():
+
+    gateway = HttpGateway("http://127.0.0.1:9/sms" , timeout=1)
+
+    with pytest.raises(GatewayError) as error:
+        asyncio.run(gateway.send("9876543210" , "Camp on Monday"))
+
+    assert error.value.retryable
+
+
+#------------------------------- delivery -------------------------------
+
+def test_transient_errors_are_retried_with_doubling_backoff(db , village , no_waiting , monkeypatch):
+
+    monkeypatch.setattr(settings , "NOTIFY_MAX_ATTEMPTS" , 3)
+    monkeypatch.setattr(settings , "NOTIFY_RETRY_BACKOFF_SECONDS" , 0.5)
+
+    phones = add_residents(db , village , 3)
+    flaky , rejected , ok = phones
+    gateway = FakeGateway({flaky : [GatewayError("HTTP 503")] * 2 , rejected : [GatewayError("HTTP 400" , retryable=False)]})
+
+    enqueue_notification(db , village.id , "Flood alert: move to the school")
+    db.commit()
+
+    job = run_job(db , worker(gateway))
+
+    assert gateway.calls.count(flaky) == 3 and gateway.calls.count(rejected) == 1 and gateway.calls.count(ok) == 1
+    assert no_waiting == [0.5 , 1.0]
+    assert sorted(phone for phone , _ in gateway.sent) == sorted([flaky , ok])
+    assert (job.status , job.sent_count , job.failed_count) == (NotificationJobStatusEnum.done , 2 , 1)
+
+
+def test_recipients_are_walked_in_batches(db , village , no_waiting , monkeypatch):
+
+    monkeypatch.setattr(settings , "NOTIFY_BATCH_SIZE" , 2)
+
+    ward_one = add_residents(db , village , 5 , ward_number=1)
+    add_residents(db , village , 2 , ward_number=2)
+    gateway = FakeGateway()
+
+    enqueue_notification(db , village.id , "Ward 1 water cut" , ward_number=1)
+    db.commit()
+
+    batches = []
+    walker = worker(gateway)
+    recipients = walker._recipients
+    monkeypatch.setattr(walker , "_recipients" , lambda *args: batches.append(recipients(*args)) or batches[-1])
+
+    job = run_job(db , walker)
+
+    assert [len(batch) for batch in batches] == [2 , 2 , 1 , 0]
+    assert sorted(phone for phone , _ in gateway.sent) == sorted(ward_one)
+    assert job.status == NotificationJobStatusEnum.done and job.sent_count == 5
+    assert job.last_user_id == batches[-2][-1][0]             # keyset cursor checkpointed after the last batch
+
+
+def test_failed_job_is_retried_later_then_marked_failed(db , village , no_waiting , monkeypatch):
+
+    monkeypatch.setattr(settings , "NOTIFY_MAX_ATTEMPTS" , 2)
+    monkeypatch.setattr(settings , "NOTIFY_JOB_RETRY_SECONDS" , 60)
+
+    add_residents(db , village , 1)
+
+    enqueue_notification(db , village.id , "Camp on Monday")
+    db.commit()
+
+    broken = worker(FakeGateway())
+
+    def database_down(*args):
+        raise RuntimeError("connection refused")
+
+    monkeypatch.setattr(broken , "_recipients" , database_down)
+
+    started = datetime.now(timezone.utc)
+    job = run_job(db , broken)
+
+    assert job.status == NotificationJobStatusEnum.pending and job.attempts == 1
+    not_before = job.not_before.replace(tzinfo=timezone.utc) if job.not_before.tzinfo is None else job.not_before
+    assert started + timedelta(seconds=59) <= not_before <= datetime.now(timezone.utc) + timedelta(seconds=61)
+
+    assert broken._claim(db) is None                            # waits for its backoff
+
+    job.not_before = started - timedelta(seconds=1)
+    db.commit()
+
+    job = run_job(db , broken)
+
+    assert job.status == NotificationJobStatusEnum.failed and job.attempts == 2
+    assert "connection refused" in job.error
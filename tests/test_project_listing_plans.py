@@ -0,0 +1,53 @@
+import pytest
+from sqlalchemy import select
+from app.models.project import Project
+from app.scripts.explain_projects import COMBINATIONS , VILLAGE_ID , explain , full_scan
+from app.utils.project_listing import project_filters , project_listing_query
+
+
+# Same filter / sort combinations as python -m app.scripts.explain_projects --check.
+# Every one must avoid a full scan; where one index of Project is the obvious fit, the plan must name it
+# (otherwise dropping e.g. ix_projects_village_category would still pass: the village index is no full scan).
+
+EXPECTED_INDEX = {
+    "village (default list)" : "ix_projects_village_newest",
+    "village, next page" : "ix_projects_village_newest",
+    "ward + status" : "ix_projects_village_ward_status",
+    "status" : "ix_projects_village_status",
+    "category" : "ix_projects_village_category",
+    "cost range, by cost" : "ix_projects_village_cost",
+    "by cost, next page" : "ix_projects_village_cost",
+    "start date range" : "ix_projects_village_start",
+}
+
+
+def plan_of(db , name : str) -> list:
+
+    filters , sort , cursor = COMBINATIONS[name]
+
+    return explain(db , project_listing_query(project_filters(VILLAGE_ID , **filters) , sort , cursor))
+
+
+@pytest.mark.parametrize("name" , list(COMBINATIONS))
+def test_listing_avoids_full_scan(db , name):
+
+    plan = plan_of(db , name)
+
+    assert plan
+    assert not full_scan(plan) , "\n".join(plan)
+
+
+@pytest.mark.parametrize("name" , list(EXPECTED_INDEX))
+def test_listing_uses_its_index(db , name):
+
+    plan = plan_of(db , name)
+
+    assert any(f"INDEX {EXPECTED_INDEX[name]} " in line for line in plan) , "\n".join(plan)
+
+
+def test_full_scan_is_detected(db):
+
+    # the check itself: a filter on an unindexed column only must be reported
+    plan = explain(db , select(Project).where(Project.description == "road"))
+
+    assert full_scan(plan) , "\n".join(plan)
@@ -0,0 +1,143 @@
+from datetime import datetime , timezone , timedelta
+import pytest
+from app.models.grievance import Grievance , GrievanceStatusEnum
+from app.models.search import SearchEntityEnum
+from app.models.user import User
+from app.models.villages import Village
+from app.utils.exception import BadRequestException
+from app.utils.search import search_grievances , search_entries , index_entry
+
+
+@pytest.fixture
+def village(db):
+
+    village = Village(name="Rampur" , district="Patna" , state="Bihar" , pincode=800001)
+    db.add(village)
+    db.flush()
+
+    return village
+
+
+@pytest.fixture
+def grievance(db , village):
+
+    citizen = User(name="Sita" , phone=f"6{village.id:09d}" , email=f"sita{village.id}@example.in" , hashed_password="x" ,
+                   ward_number=1 , village_id=village.id)
+    db.add(citizen)
+    db.flush()
+
+    def add(title , description , category="water" , sarpanch_reply=None , status=GrievanceStatusEnum.open , village_id=None):
+        row = Grievance(village_id=village_id or village.id , citizen_id=citizen.id , title=title , description=description ,
+                        category=category , sarpanch_reply=sarpanch_reply , status=status)
+        db.add(row)
+        db.flush()
+        return row
+
+    return add
+
+
+def ids(rows) -> list:
+    return [row.id for row in rows]
+
+
+#------------------------------- grievances -------------------------------
+
+def test_grievance_title_outranks_description_and_reply(db , village , grievance):
+
+    in_reply = grievance("Street light" , "Lane is dark at night" , sarpanch_reply="Water department informed as well")
+    in_title = grievance("Water pipe broken" , "Near the primary school")
+    in_description = grievance("Road damaged" , "Water logging after every rain")
+    grievance("Drain blocked" , "Smell near the market")
+
+    other = Village(name="Sonpur" , district="Patna" , state="Bihar" , pincode=800002)
+    db.add(other)
+    db.flush()
+    grievance("Water tank leaking" , "Other village" , village_id=other.id)
+
+    rows , next_cursor = search_grievances(db , village.id , "water")
+
+    assert ids(rows) == [in_title.id , in_description.id , in_reply.id]
+    assert next_cursor is None
+
+
+def test_grievance_filters(db , village , grievance):
+
+    open_water = grievance("No water supply" , "Tap dry for three days")
+    grievance("Water meter stuck" , "Bill too high" , status=GrievanceStatusEnum.in_progress)
+    grievance("Water on the road" , "Pipe leak" , category="road")
+
+    assert ids(search_grievances(db , village.id , "water" , status=GrievanceStatusEnum.open , category="water")[0]) == [open_water.id]
+
+
+def test_grievance_pages_follow_the_ranking(db , village , grievance):
+
+    for i in range(7):
+        grievance(f"Hand pump {i} not working" , "Ward " + "very " * i + "old hand pump")
+
+    everything , _ = search_grievances(db , village.id , "hand pump" , limit=50)
+    assert len(everything) == 7
+
+    pages , cursor = [] , None
+
+    while True:
+        rows , cursor = search_grievances(db , village.id , "hand pump" , cursor=cursor , limit=3)
+        pages.append(ids(rows))
+        if cursor is None:
+            break
+
+    assert [len(page) for page in pages] == [3 , 3 , 1]
+    assert sum(pages , []) == ids(everything)
+
+
+def test_search_input_is_not_query_syntax(db , village , grievance):
+
+    leak = grievance("Pipe NEAR school" , "leak")
+
+    # quotes / operators / brackets are plain words, never an FTS5 syntax error
+    for q in ('pipe" NEAR(school' , "NEAR pipe" , "pipe:near" , "pipe*"):
+        assert ids(search_grievances(db , village.id , q)[0]) == [leak.id] , q
+
+
+def test_invalid_cursor_is_rejected(db , village):
+
+    with pytest.raises(BadRequestException):
+        search_grievances(db , village.id , "water" , cursor="not-a-cursor")
+
+
+#------------------------------- documents / announcements / projects -------------------------------
+
+def test_entries_rank_titles_first_and_hide_unpublished(db , village):
+
+    now = datetime.now(timezone.utc)
+
+    index_entry(db , SearchEntityEnum.announcement , 1 , village.id , "Gram Sabha meeting" , body="Agenda: water tax and pond cleaning")
+    index_entry(db , SearchEntityEnum.project , 1 , village.id , "Water tank construction" , body="Overhead tank for ward 3")
+    index_entry(db , SearchEntityEnum.document , 1 , village.id , "Annual report" , body="Funds spent on the water supply scheme")
+    index_entry(db , SearchEntityEnum.announcement , 2 , village.id , "Water cut tomorrow" , body="" , visible_from=now + timedelta(hours=1))
+    index_entry(db , SearchEntityEnum.announcement , 3 , village.id , "Water cut last week" , body="" , visible_until=now - timedelta(hours=1))
+    db.flush()
+
+    results , _ = search_entries(db , village.id , "water")
+
+    assert results[0]["title"] == "Water tank construction" and results[0]["url"] == "/api/projects/1"
+    assert {result["title"] for result in results[1:]} == {"Gram Sabha meeting" , "Annual report"}
+    assert all("water" in result["snippet"].lower() for result in results[1:])      # snippet of the body match
+
+    documents , _ = search_entries(db , village.id , "water" , entity_types=[SearchEntityEnum.document])
+    assert [(result["entity_type"] , result["url"]) for result in documents] == [(SearchEntityEnum.document , "/api/documents/1")]
+
+
+def test_entries_pages(db , village):
+
+    for i in range(5):
+        index_entry(db , SearchEntityEnum.project , i + 1 , village.id , f"Solar street light {i}" , body="Ward " * (i + 1))
+    db.flush()
+
+    everything , _ = search_entries(db , village.id , "solar" , limit=50)
+
+    first , cursor = search_entries(db , village.id , "solar" , limit=2)
+    second , cursor = search_entries(db , village.id , "solar" , cursor=cursor , limit=2)
+    third , cursor = search_entries(db , village.id , "solar" , cursor=cursor , limit=2)
+
+    assert cursor is None
+    assert [result["id"] for result in first + second + third] == [result["id"] for result in everything]
@@ -0,0 +1,195 @@
+import hashlib
+from urllib.parse import urlparse , parse_qs
+import boto3
+import pytest
+import requests
+from moto import mock_aws
+from app.config import settings
+from app.models.document import DocumentBlob
+from app.utils import storage as storage_module
+from app.utils.storage import Storage , S3Storage , run
+from app.utils.file_uploads import StoredFile , blob_key
+from app.utils.blobs import acquire_blob , stats
+
+BUCKET = "gram-suvidha-test"
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def s3(monkeypatch):
+
+    # moto stands in for the object store: same boto3 calls, no network
+
+    for name in ("AWS_ACCESS_KEY_ID" , "AWS_SECRET_ACCESS_KEY"):
+        monkeypatch.setenv(name , "testing")
+
+    monkeypatch.setattr(settings , "S3_BUCKET" , BUCKET)
+    monkeypatch.setattr(settings , "S3_ENDPOINT_URL" , "")
+    monkeypatch.setattr(settings , "S3_MULTIPART_THRESHOLD_MB" , 5)          # S3's smallest part size
+
+    with mock_aws():
+        boto3.client("s3" , region_name=settings.S3_REGION).create_bucket(
+            Bucket=BUCKET , CreateBucketConfiguration={"LocationConstraint" : settings.S3_REGION})
+
+        backend = S3Storage()
+        monkeypatch.setattr(storage_module , "_storage" , backend)
+
+        yield backend
+
+
+def spooled(tmp_path , data : bytes , name : str = "upload.part") -> StoredFile:
+
+    # what spool_upload hands over: a temp file + its size and SHA-256
+
+    path = tmp_path / name
+    path.write_bytes(data)
+
+    return StoredFile(path=str(path) , size=len(data) , sha256=hashlib.sha256(data).hexdigest())
+
+
+def object_keys(backend : S3Storage , prefix : str = "") -> list:
+
+    response = backend._client.list_objects_v2(Bucket=BUCKET , Prefix=prefix)
+
+    return sorted(item["Key"] for item in response.get("Contents" , []))
+
+
+def test_storage_interface_is_abstract():
+
+    with pytest.raises(TypeError):
+        Storage()
+
+
+def test_put_get_exists_delete(s3 , tmp_path):
+
+    src = tmp_path / "notice.pdf"
+    src.write_bytes(b"%PDF gram sabha notice")
+
+    run(s3.put_file("documents/aa/notice.pdf" , str(src) , "application/pdf"))
+
+    assert not src.exists()                                     # put_file takes ownership of the source
+    assert run(s3.exists("documents/aa/notice.pdf"))
+    assert not run(s3.exists("documents/aa/missing.pdf"))
+    assert s3.locator("documents/aa/notice.pdf") == f"s3://{BUCKET}/documents/aa/notice.pdf"
+
+    head = s3._client.head_object(Bucket=BUCKET , Key="documents/aa/notice.pdf")
+    assert head["ContentType"] == "application/pdf"
+
+    dst = tmp_path / "copy.pdf"
+    run(s3.get_file("documents/aa/notice.pdf" , str(dst)))
+    assert dst.read_bytes() == b"%PDF gram sabha notice"
+
+    run(s3.delete("documents/aa/notice.pdf"))
+    assert not run(s3.exists("documents/aa/notice.pdf"))
+
+
+def test_large_file_is_uploaded_in_parts(s3 , tmp_path):
+
+    data = bytes(range(256)) * (11 * MB // 256)                 # 11 MB --> parts of 5 + 5 + 1 MB
+
+    src = tmp_path / "survey.pdf"
+    src.write_bytes(data)
+
+    run(s3.put_file("documents/bb/survey.pdf" , str(src)))
+
+    head = s3._client.head_object(Bucket=BUCKET , Key="documents/bb/survey.pdf")
+    assert head["ContentLength"] == len(data)
+    assert head["ETag"].strip('"').endswith("-3")                # multipart ETag: <md5 of part md5s>-<part count>
+
+    dst = tmp_path / "survey-copy.pdf"
+    run(s3.get_file("documents/bb/survey.pdf" , str(dst)))
+    assert dst.read_bytes() == data
+
+
+def test_same_content_is_stored_once(s3 , db , tmp_path):
+
+    data = b"%PDF budget statement 2024-25"
+    first = spooled(tmp_path , data , "first.part")
+    second = spooled(tmp_path , data , "second.part")
+
+    deduplicated = stats.deduplicated
+
+    location_1 = acquire_blob(db , first , "application/pdf")
+    db.commit()
+    location_2 = acquire_blob(db , second , "application/pdf")
+    db.commit()
+
+    key = blob_key(first.sha256 , "application/pdf")
+
+    assert location_1 == location_2 == f"s3://{BUCKET}/{key}"
+    assert object_keys(s3 , "documents/") == [key]
+    assert stats.deduplicated == deduplicated + 1
+
+    # both spooled files are gone: the first was uploaded, the second discarded
+    assert not (tmp_path / "first.part").exists()
+    assert not (tmp_path / "second.part").exists()
+
+    assert db.query(DocumentBlob.ref_count).filter(DocumentBlob.sha256 == first.sha256).scalar() == 2
+
+
+def test_rolled_back_upload_leaves_no_object(s3 , db , tmp_path):
+
+    stored = spooled(tmp_path , b"%PDF never committed")
+
+    acquire_blob(db , stored , "application/pdf")
+    key = blob_key(stored.sha256 , "application/pdf")
+    assert run(s3.exists(key))
+
+    db.rollback()
+
+    assert not run(s3.exists(key))
+
+
+def test_presigned_url(s3 , tmp_path):
+
+    src = tmp_path / "minutes.pdf"
+    src.write_bytes(b"%PDF minutes")
+    run(s3.put_file("documents/cc/minutes.pdf" , str(src) , "application/pdf"))
+
+    url = run(s3.presigned_url("documents/cc/minutes.pdf" , filename="Gram Sabha minutes.pdf" , media_type="application/pdf"))
+
+    parsed = urlparse(url)
+    params = parse_qs(parsed.query)
+
+    assert parsed.path.endswith("/documents/cc/minutes.pdf")
+    assert params["X-Amz-Expires"] == [str(settings.S3_PRESIGN_SECONDS)]
+    assert "X-Amz-Signature" in params
+    assert params["response-content-disposition"] == ["attachment; filename*=utf-8''Gram%20Sabha%20minutes.pdf"]
+
+    # the client downloads straight from the object store with the API's headers
+    response = requests.get(url)
+
+    assert response.status_code == 200
+    assert response.content == b"%PDF minutes"
+    assert response.headers["Content-Type"] == "application/pdf"
+    assert response.headers["Content-Disposition"] == "attachment; filename*=utf-8''Gram%20Sabha%20minutes.pdf"
+
+
+def test_delete_many(s3 , tmp_path):
+
+    keys = [f"documents/dd/{i}.pdf" for i in range(3)]
+
+    for i , key in enumerate(keys):
+        src = tmp_path / f"{i}.pdf"
+        src.write_bytes(b"%PDF " + bytes([i]))
+        run(s3.put_file(key , str(src)))
+
+    run(s3.delete_many(keys + ["documents/dd/never-stored.pdf"]))       # missing keys are not an error
+
+    assert object_keys(s3 , "documents/dd/") == []
+
+
+def test_delete_many_batches_by_thousand(s3 , monkeypatch):
+
+    calls = []
+    delete_objects = s3._client.delete_objects
+
+    def counting(**kwargs):
+        calls.append(len(kwargs["Delete"]["Objects"]))
+        return delete_objects(**kwargs)
+
+    monkeypatch.setattr(s3._client , "delete_objects" , counting)
+
+    run(s3.delete_many([f"documents/ee/{i}.pdf" for i in range(2500)]))
+
+    assert calls == [1000 , 1000 , 500]
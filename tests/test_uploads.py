@@ -0,0 +1,112 @@
+import hashlib
+import io
+import pytest
+from fastapi import FastAPI , Request
+from fastapi.testclient import TestClient
+from starlette.datastructures import UploadFile
+from app.middleware.upload_limit import UploadLimitMiddleware , MULTIPART_OVERHEAD
+from app.utils import file_uploads
+from app.utils.file_uploads import spool_upload , FileTooLarge , CHUNK_SIZE
+
+LIMIT = 1024 * 1024
+
+
+@pytest.fixture
+def upload_dir(tmp_path , monkeypatch):
+
+    monkeypatch.setattr(file_uploads , "UPLOAD_DIR" , tmp_path)
+
+    return tmp_path
+
+
+def upload(content : bytes) -> UploadFile:
+    return UploadFile(io.BytesIO(content) , filename="report.pdf")
+
+
+#------------------------------- spool_upload -------------------------------
+
+def test_spool_accepts_file_of_exactly_the_cap(upload_dir):
+
+    content = bytes(range(256)) * (LIMIT // 256)             # 4 chunks, cap hit on the last byte
+
+    stored = spool_upload(upload(content) , max_bytes=LIMIT)
+
+    assert stored.size == LIMIT
+    assert stored.sha256 == hashlib.sha256(content).hexdigest()
+    with open(stored.path , "rb") as f:
+        assert f.read() == content
+
+
+def test_spool_stops_one_byte_over_and_removes_partial_file(upload_dir):
+
+    with pytest.raises(FileTooLarge):
+        spool_upload(upload(b"x" * (LIMIT + 1)) , max_bytes=LIMIT)
+
+    assert list(upload_dir.iterdir()) == []
+
+
+def test_spool_without_cap(upload_dir):
+
+    stored = spool_upload(upload(b"y" * (CHUNK_SIZE * 3 + 7)))
+
+    assert stored.size == CHUNK_SIZE * 3 + 7
+
+
+#------------------------------- middleware -------------------------------
+
+@pytest.fixture
+def client():
+
+    # echoes the number of body bytes the route got to read
+    app = FastAPI()
+
+    @app.post("/api/documents/upload")
+    async def documents(request : Request):
+        return {"received" : len(await request.body())}
+
+    @app.post("/api/projects/{project_id}/photos")
+    async def photos(project_id : int , request : Request):
+        return {"received" : len(await request.body())}
+
+    @app.post("/api/grievances/")
+    async def grievances(request : Request):
+        return {"received" : len(await request.body())}
+
+    app.add_middleware(UploadLimitMiddleware , limits={"/api/documents/upload" : LIMIT , "/api/projects/{project_id}/photos" : LIMIT // 2})
+
+    return TestClient(app)
+
+
+def test_body_under_the_cap_passes(client):
+
+    body = b"x" * (LIMIT + MULTIPART_OVERHEAD)              # multipart overhead is on top of the file cap
+
+    response = client.post("/api/documents/upload" , content=body)
+
+    assert response.status_code == 200 and response.json() == {"received" : len(body)}
+
+
+def test_content_length_over_the_cap_is_rejected(client):
+
+    response = client.post("/api/documents/upload" , content=b"x" * (LIMIT + MULTIPART_OVERHEAD + 1))
+
+    assert response.status_code == 413 and response.json() == {"detail" : "File too large"}
+
+
+def test_chunked_body_is_cut_off_mid_stream(client):
+
+    def chunks():
+        # no Content-Length --> only the received bytes can tell
+        for _ in range(64):
+            yield b"x" * CHUNK_SIZE
+
+    response = client.post("/api/projects/7/photos" , content=chunks())
+
+    assert response.status_code == 413 and response.json() == {"detail" : "File too large"}
+
+
+def test_other_routes_are_not_capped(client):
+
+    response = client.post("/api/grievances/" , content=b"x" * (LIMIT * 2))
+
+    assert response.status_code == 200